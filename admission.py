@@ -0,0 +1,343 @@
+"""
+Per-client admission control for the expensive LLM endpoints.
+
+Each client (a configured API key, or the address when none is sent) owns a token bucket
+refilled at ``rate`` tokens per second up to ``burst``; a request spends
+tokens in proportion to its estimated cost (videos to analyze, variants to
+generate). A request costing more than the burst runs once the bucket is
+full and leaves it in debt, so large jobs are charged in full. Admitted requests then wait for one of ``max_in_flight`` slots in a
+bounded queue. Over-quota clients get a 429 and a full queue a 503, both with
+Retry-After, instead of piling up until the worker timeout.
+
+Buckets live in process memory, or in SQLite so every gunicorn worker draws
+from the same quota.
+"""
+from typing import AbstractSet, Dict, Any, Iterable, Optional, Tuple
+import asyncio
+import hashlib
+import os
+import threading
+import time
+
+from memory import ConnectionPool, DEFAULT_DATA_DIR
+
+# Relative cost of one request before scaling by its size
+BASE_COST = {
+    "analyze": 1.0,
+    "niche-analysis": 1.0,
+    "generate-script": 1.0,
+    "create-visual-plan": 1.0,
+    "full-pipeline": 1.0
+}
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, status_code: int, message: str, retry_after: float):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = max(1, int(retry_after + 0.999))
+
+
+class MemoryBucketStore:
+    """Token buckets of this process"""
+
+    blocking = False
+    backend = "memory"
+
+    def __init__(self, rate: float, burst: float, max_clients: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets: Dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def take(self, client: str, cost: float) -> Tuple[bool, float]:
+        """
+        Spend ``cost`` tokens (a negative cost refunds). Returns (allowed, tokens left).
+
+        A cost above the burst needs a full bucket and drives it negative.
+        """
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                if len(self._buckets) >= self.max_clients:
+                    self._prune(now)
+                bucket = self._buckets[client] = [self.burst, now]
+            tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            allowed = tokens >= min(cost, self.burst)
+            if allowed:
+                tokens = min(self.burst, tokens - cost)
+            bucket[0], bucket[1] = tokens, now
+            return allowed, tokens
+
+    def _prune(self, now: float):
+        # Buckets that have refilled are indistinguishable from new ones
+        full = [c for c, (tokens, updated) in self._buckets.items() if tokens + (now - updated) * self.rate >= self.burst]
+        for client in full:
+            del self._buckets[client]
+
+    def open(self):
+        pass
+
+    def snapshot(self, limit: int = 20) -> Dict[str, float]:
+        now = time.monotonic()
+        with self._lock:
+            levels = {c: min(self.burst, t + (now - u) * self.rate) for c, (t, u) in self._buckets.items()}
+        return dict(sorted(levels.items(), key=lambda item: item[1])[:limit])
+
+    def close(self):
+        pass
+
+
+class SQLiteBucketStore:
+    """
+    Token buckets shared by every worker through a small SQLite database.
+
+    The database is opened on first use, in the worker, never at import: with
+    ``gunicorn --preload`` the forked workers would inherit the connections.
+    """
+
+    blocking = True
+    backend = "sqlite"
+
+    _CREATE_TABLE = '''
+        CREATE TABLE IF NOT EXISTS rate_limit_buckets (
+            client TEXT PRIMARY KEY,
+            tokens REAL NOT NULL,
+            updated REAL NOT NULL
+        )
+    '''
+    _SELECT = "SELECT tokens, updated FROM rate_limit_buckets WHERE client = ?"
+    _UPSERT = '''
+        INSERT INTO rate_limit_buckets (client, tokens, updated) VALUES (?, ?, ?)
+        ON CONFLICT(client) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated
+    '''
+
+    def __init__(self, rate: float, burst: float, db_path: str, pool_size: int = 2):
+        self.rate = rate
+        self.burst = burst
+        self.db_path = db_path
+        self.pool_size = pool_size
+        self._pool: Optional[ConnectionPool] = None
+        self._lock = threading.Lock()
+
+    def open(self) -> ConnectionPool:
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+                    pool = ConnectionPool(self.db_path, self.pool_size, busy_timeout_ms=2000, cache_size_kb=1024)
+                    with pool.connection() as conn:
+                        conn.execute(self._CREATE_TABLE)
+                    self._pool = pool
+        return self._pool
+
+    def take(self, client: str, cost: float) -> Tuple[bool, float]:
+        # Wall-clock time: monotonic clocks are not comparable across processes
+        now = time.time()
+        with self.open().connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(self._SELECT, (client,)).fetchone()
+                tokens = self.burst if row is None else min(self.burst, row[0] + max(0.0, now - row[1]) * self.rate)
+                allowed = tokens >= min(cost, self.burst)
+                if allowed:
+                    tokens = min(self.burst, tokens - cost)
+                conn.execute(self._UPSERT, (client, tokens, now))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return allowed, tokens
+
+    def snapshot(self, limit: int = 20) -> Dict[str, float]:
+        now = time.time()
+        with self.open().connection() as conn:
+            rows = conn.execute(
+                "SELECT client, MIN(?, tokens + (? - updated) * ?) AS level FROM rate_limit_buckets ORDER BY level LIMIT ?",
+                (self.burst, now, self.rate, limit)
+            ).fetchall()
+        return {client: level for client, level in rows}
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        store: Any,
+        max_in_flight: int = 8,
+        max_queue: int = 16,
+        queue_timeout: float = 10,
+        videos_per_token: int = 50,
+        trusted_proxies: int = 0,
+        api_keys: Iterable[str] = ()
+    ):
+        self.store = store
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.videos_per_token = videos_per_token
+        self.trusted_proxies = trusted_proxies
+        # Only digests are kept; see client_id
+        self.api_keys = frozenset(_digest(key) for key in api_keys if key)
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.in_flight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected_quota = 0
+        self.rejected_queue = 0
+
+    @classmethod
+    def from_env(cls) -> "AdmissionController":
+        """Build the controller from ADMISSION_* environment variables"""
+        rate = float(os.environ.get("ADMISSION_RATE", 0.5))
+        burst = float(os.environ.get("ADMISSION_BURST", 20))
+        if os.environ.get("ADMISSION_BACKEND", "memory").lower() == "sqlite":
+            data_dir = os.environ.get("MEMORY_DATA_DIR", DEFAULT_DATA_DIR)
+            db_path = os.environ.get("ADMISSION_DB_PATH", os.path.join(data_dir, "rate_limits.db"))
+            store = SQLiteBucketStore(rate, burst, db_path)
+        else:
+            store = MemoryBucketStore(rate, burst)
+        return cls(
+            store,
+            max_in_flight=int(os.environ.get("ADMISSION_MAX_IN_FLIGHT", 8)),
+            max_queue=int(os.environ.get("ADMISSION_MAX_QUEUE", 16)),
+            queue_timeout=float(os.environ.get("ADMISSION_QUEUE_TIMEOUT", 10)),
+            videos_per_token=int(os.environ.get("ADMISSION_VIDEOS_PER_TOKEN", 50)),
+            trusted_proxies=int(os.environ.get("TRUSTED_PROXY_COUNT", 0)),
+            api_keys=[key.strip() for key in os.environ.get("ADMISSION_API_KEYS", "").split(",")]
+        )
+
+    def estimate_cost(self, kind: str, body: Any = None) -> float:
+        """
+        Tokens a request spends: its base cost plus one token per
+        ``videos_per_token`` videos, and for /full-pipeline two more (script and
+        visual plan) per platform x hook variant. Batches cost the base cost
+        per item, and ``analysis_type="fast"`` requests only the base cost.
+        """
+        cost = BASE_COST.get(kind, 1.0)
+        if isinstance(body, list):
+            # Batch endpoints: every item is a request of its own
+            return cost * max(1, len(body))
+        if not isinstance(body, dict):
+            return cost
+        if body.get("analysis_type") == "fast":
+            # Rule-based analysis makes no LLM call, whatever the batch size
+            return cost
+        videos = body.get("videos")
+        if isinstance(videos, list):
+            cost += len(videos) / self.videos_per_token
+        if kind == "full-pipeline":
+            platforms = body.get("platforms") or [body.get("platform")]
+            hook_variants = body.get("hook_variants") or [None]
+            cost += 2 * len(platforms) * len(hook_variants)
+        return cost
+
+    async def admit(self, client: str, cost: float) -> float:
+        """
+        Charge ``client`` and wait for an execution slot.
+
+        Returns the charged cost, to be handed back to ``release``. Raises
+        AdmissionRejected when the client is over quota or the queue is full.
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+        if self._slots.locked() and self.queued >= self.max_queue:
+            self.rejected_queue += 1
+            raise AdmissionRejected(503, "Server is at capacity, retry shortly", self.queue_timeout)
+
+        if self.store.blocking:
+            allowed, tokens = await asyncio.to_thread(self.store.take, client, cost)
+        else:
+            allowed, tokens = self.store.take(client, cost)
+        if not allowed:
+            self.rejected_quota += 1
+            needed = min(cost, self.store.burst)
+            raise AdmissionRejected(429, f"Rate limit exceeded: request costs {cost:.1f} tokens, {tokens:.1f} available", (needed - tokens) / self.store.rate)
+
+        self.queued += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected_queue += 1
+            await self._refund(client, cost)
+            raise AdmissionRejected(503, "Timed out waiting for capacity, retry shortly", self.queue_timeout)
+        finally:
+            self.queued -= 1
+        self.in_flight += 1
+        self.admitted += 1
+        return cost
+
+    async def _refund(self, client: str, cost: float):
+        if self.store.blocking:
+            await asyncio.to_thread(self.store.take, client, -cost)
+        else:
+            self.store.take(client, -cost)
+
+    def release(self):
+        self.in_flight -= 1
+        self._slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """Limiter state for /health; client ids are hashed"""
+        try:
+            lowest = {_public_id(client): round(tokens, 2) for client, tokens in self.store.snapshot().items()}
+        except Exception as e:
+            lowest = {"error": str(e)}
+        return {
+            "backend": self.store.backend,
+            "rate": self.store.rate,
+            "burst": self.store.burst,
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "rejected_quota": self.rejected_quota,
+            "rejected_queue": self.rejected_queue,
+            "lowest_buckets": lowest
+        }
+
+
+def _digest(value: str) -> str:
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+
+def _public_id(client: str) -> str:
+    """Bucket key as shown on /health: addresses are hashed like API keys"""
+    kind, _, value = client.partition(":")
+    return client if kind == "key" else f"{kind}:{_digest(value)[:16]}"
+
+
+def client_id(
+    api_key: Optional[str],
+    forwarded_for: Optional[str],
+    host: Optional[str],
+    trusted_proxies: int = 0,
+    api_keys: AbstractSet[str] = frozenset()
+) -> str:
+    """
+    Bucket key: a hash of the API key, else the caller's address.
+
+    Keys are only trusted when their digest is in ``api_keys``
+    (ADMISSION_API_KEYS); an unknown key would otherwise buy a fresh bucket
+    per request, so it falls back to the address. Clients can send any
+    X-Forwarded-For, so only the entries appended by our own
+    ``trusted_proxies`` proxies count: the address is the one the outermost
+    proxy saw, ``trusted_proxies`` entries from the right. Without trusted
+    proxies, or with a shorter chain, the peer address is used.
+    """
+    if api_key and _digest(api_key) in api_keys:
+        return "key:" + _digest(api_key)[:16]
+    if forwarded_for and trusted_proxies > 0:
+        entries = [entry.strip() for entry in forwarded_for.split(",")]
+        if len(entries) >= trusted_proxies and entries[-trusted_proxies]:
+            return "ip:" + entries[-trusted_proxies]
+    return "ip:" + (host or "unknown")
+
+
+admission = AdmissionController.from_env()
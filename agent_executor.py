@@ -0,0 +1,232 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, Callable, Awaitable
+import asyncio
+import contextvars
+import inspect
+import logging
+import os
+import threading
+import time
+
+from metrics import AGENT_CALLS, AGENT_LATENCY, AGENT_QUEUE_WAIT, current_agent
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_limits(value: str) -> Dict[str, int]:
+    """Parse a comma separated "agent=limit" list into a dict"""
+    limits = {}
+    for item in value.split(","):
+        if "=" not in item:
+            continue
+        name, limit = item.split("=", 1)
+        try:
+            limits[name.strip()] = max(1, int(limit))
+        except ValueError:
+            logger.warning(f"Ignoring invalid concurrency limit {item!r}")
+    return limits
+
+
+class AgentStats:
+    """Queue depth, wait time and call counters for a single agent"""
+
+    def __init__(self, name: str = ""):
+        self.name = name
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.in_flight = 0
+        self.calls = 0
+        self.errors = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.last_wait = 0.0
+        self.total_run = 0.0
+
+    def enqueue(self):
+        with self._lock:
+            self.queued += 1
+
+    def start(self, wait: float):
+        with self._lock:
+            self.queued -= 1
+            self.in_flight += 1
+            self.calls += 1
+            self.total_wait += wait
+            self.last_wait = wait
+            self.max_wait = max(self.max_wait, wait)
+        AGENT_QUEUE_WAIT.labels(self.name).observe(wait)
+
+    def abandon(self):
+        with self._lock:
+            self.queued -= 1
+
+    def finish(self, elapsed: float, failed: bool):
+        with self._lock:
+            self.in_flight -= 1
+            self.total_run += elapsed
+            if failed:
+                self.errors += 1
+        AGENT_CALLS.labels(self.name, "error" if failed else "ok").inc()
+        AGENT_LATENCY.labels(self.name).observe(elapsed)
+
+    def snapshot(self, limit: int) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "limit": limit,
+                "queued": self.queued,
+                "in_flight": self.in_flight,
+                "calls": self.calls,
+                "errors": self.errors,
+                "avg_wait_ms": round(self.total_wait / self.calls * 1000, 2) if self.calls else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 2),
+                "last_wait_ms": round(self.last_wait * 1000, 2),
+                "avg_run_ms": round(self.total_run / self.calls * 1000, 2) if self.calls else 0.0,
+            }
+
+
+class AgentExecutor:
+    """
+    Runs agent calls without blocking the event loop.
+
+    Coroutine methods (or an ``a``-prefixed async twin such as ``agenerate_script``)
+    are awaited directly. Plain blocking methods are offloaded to a bounded
+    thread pool. Every agent gets its own semaphore so one slow agent cannot
+    take all of the pool's threads.
+    """
+
+    def __init__(self, max_workers: int = 8, default_limit: int = 4, agent_limits: Optional[Dict[str, int]] = None):
+        self.max_workers = max_workers
+        self.default_limit = default_limit
+        self.agent_limits = dict(agent_limits or {})
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="agent")
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._stats: Dict[str, AgentStats] = {}
+
+    @classmethod
+    def from_env(cls) -> "AgentExecutor":
+        """Build an executor from AGENT_EXECUTOR_* environment variables"""
+        return cls(
+            max_workers=int(os.environ.get("AGENT_EXECUTOR_WORKERS", 8)),
+            default_limit=int(os.environ.get("AGENT_CONCURRENCY_DEFAULT", 4)),
+            agent_limits=_parse_limits(os.environ.get("AGENT_CONCURRENCY_LIMITS", "")),
+        )
+
+    def _limit_for(self, agent_name: str) -> int:
+        return self.agent_limits.get(agent_name, self.default_limit)
+
+    def _semaphore_for(self, agent_name: str) -> asyncio.Semaphore:
+        if agent_name not in self._semaphores:
+            self._semaphores[agent_name] = asyncio.Semaphore(self._limit_for(agent_name))
+        return self._semaphores[agent_name]
+
+    def _stats_for(self, agent_name: str) -> AgentStats:
+        if agent_name not in self._stats:
+            self._stats[agent_name] = AgentStats(agent_name)
+        return self._stats[agent_name]
+
+    @staticmethod
+    def _async_method(agent: Any, method: str) -> Optional[Callable]:
+        """Return a native coroutine implementation of ``method`` if the agent has one"""
+        for name in (method, f"a{method}"):
+            fn = getattr(agent, name, None)
+            if fn is not None and inspect.iscoroutinefunction(fn):
+                return fn
+        return None
+
+    async def run_coroutine(self, agent_name: str, fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """
+        Await ``fn(*args, **kwargs)`` under the agent's concurrency limit.
+
+        For agent work that is not a single method call, such as consuming a
+        token stream; queueing and run time are counted as for ``run``.
+        """
+        stats = self._stats_for(agent_name)
+        token = current_agent.set(agent_name)
+        enqueued = time.perf_counter()
+        stats.enqueue()
+        started = False
+        try:
+            async with self._semaphore_for(agent_name):
+                started = True
+                stats.start(time.perf_counter() - enqueued)
+                return await self._timed(stats, fn(*args, **kwargs))
+        finally:
+            current_agent.reset(token)
+            if not started:
+                stats.abandon()
+
+    async def run(self, agent_name: str, agent: Any, method: str, *args, **kwargs) -> Any:
+        """Call ``agent.method(*args, **kwargs)`` under the agent's concurrency limit"""
+        async_fn = self._async_method(agent, method)
+        if async_fn is not None:
+            return await self.run_coroutine(agent_name, async_fn, *args, **kwargs)
+
+        stats = self._stats_for(agent_name)
+        # Lets the LLM client attribute its calls to this agent
+        token = current_agent.set(agent_name)
+        enqueued = time.perf_counter()
+        stats.enqueue()
+        # Whether the call started or was abandoned while queued; decided
+        # once under the lock, whichever of the pool thread and the loop
+        # gets there first
+        state_lock = threading.Lock()
+        started = False
+        abandoned = False
+        try:
+            async with self._semaphore_for(agent_name):
+                fn = getattr(agent, method)
+
+                def call():
+                    nonlocal started
+                    with state_lock:
+                        if abandoned:
+                            # Cancelled while waiting for a pool thread
+                            return None
+                        started = True
+                    stats.start(time.perf_counter() - enqueued)
+                    began = time.perf_counter()
+                    try:
+                        result = fn(*args, **kwargs)
+                    except Exception:
+                        stats.finish(time.perf_counter() - began, failed=True)
+                        raise
+                    stats.finish(time.perf_counter() - began, failed=False)
+                    return result
+
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self._pool, contextvars.copy_context().run, call)
+        finally:
+            current_agent.reset(token)
+            with state_lock:
+                if not started:
+                    abandoned = True
+            if abandoned:
+                stats.abandon()
+
+    @staticmethod
+    async def _timed(stats: AgentStats, coro) -> Any:
+        began = time.perf_counter()
+        try:
+            result = await coro
+        except BaseException:
+            stats.finish(time.perf_counter() - began, failed=True)
+            raise
+        stats.finish(time.perf_counter() - began, failed=False)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-agent queue depth and wait times for /health"""
+        agents = {name: stats.snapshot(self._limit_for(name)) for name, stats in self._stats.items()}
+        return {
+            "max_workers": self.max_workers,
+            "queue_depth": sum(a["queued"] for a in agents.values()),
+            "in_flight": sum(a["in_flight"] for a in agents.values()),
+            "agents": agents,
+        }
+
+    def shutdown(self, wait: bool = False):
+        self._pool.shutdown(wait=wait)
+
+
+# Shared executor for the API process
+agent_executor = AgentExecutor.from_env()
@@ -0,0 +1,121 @@
+"""
+Lazy, fault-isolated agent loading.
+
+Agents are registered with a loader (import a module, build an instance)
+and only loaded on first use or by a background warm-up once the server is
+accepting traffic. A loader that fails is logged with its traceback and
+reported on readiness instead of being swallowed, and it is retried on the
+next request. Load timings are kept per agent.
+"""
+from typing import Dict, Any, Callable, List, Optional
+from datetime import datetime
+import asyncio
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class _AgentEntry:
+    def __init__(self, name: str, loader: Callable[[], Any], on_load: Optional[Callable[[Any], None]] = None):
+        self.name = name
+        self.loader = loader
+        self.on_load = on_load
+        self.value: Any = None
+        self.state = "pending"
+        self.attempts = 0
+        self.load_ms: Optional[float] = None
+        self.loaded_at: Optional[str] = None
+        self.error: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def load(self) -> Any:
+        if self.state == "ready":
+            return self.value
+        with self._lock:
+            if self.state == "ready":
+                return self.value
+            self.state = "loading"
+            self.attempts += 1
+            started = time.perf_counter()
+            try:
+                value = self.loader()
+                if self.on_load is not None:
+                    self.on_load(value)
+            except Exception as e:
+                self.state = "failed"
+                self.error = f"{type(e).__name__}: {str(e)}"
+                logger.exception(f"Failed to load agent {self.name}")
+                raise
+            finally:
+                self.load_ms = round((time.perf_counter() - started) * 1000, 1)
+            self.value = value
+            self.state = "ready"
+            self.error = None
+            self.loaded_at = datetime.utcnow().isoformat()
+            logger.info(f"Loaded agent {self.name} in {self.load_ms}ms")
+            return value
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "attempts": self.attempts,
+            "load_ms": self.load_ms,
+            "loaded_at": self.loaded_at,
+            "error": self.error
+        }
+
+
+class AgentRegistry:
+    def __init__(self):
+        self._entries: Dict[str, _AgentEntry] = {}
+        self.warmup_started: Optional[str] = None
+        self.warmup_finished: Optional[str] = None
+
+    def register(self, name: str, loader: Callable[[], Any], on_load: Optional[Callable[[Any], None]] = None):
+        """Register ``loader``; ``on_load`` runs once on the freshly loaded value"""
+        self._entries[name] = _AgentEntry(name, loader, on_load)
+
+    def names(self) -> List[str]:
+        return list(self._entries)
+
+    def get(self, name: str) -> Any:
+        """Load (if needed) and return an agent from synchronous code"""
+        return self._entries[name].load()
+
+    async def aget(self, name: str) -> Any:
+        """Load (if needed) and return an agent without blocking the event loop"""
+        entry = self._entries[name]
+        if entry.state == "ready":
+            return entry.value
+        return await asyncio.to_thread(entry.load)
+
+    def load_all(self):
+        """Load every agent now, e.g. before gunicorn forks its workers"""
+        for entry in self._entries.values():
+            try:
+                entry.load()
+            except Exception:
+                pass
+
+    async def warm_up(self):
+        """Load every agent in the background; failures stay visible on readiness"""
+        self.warmup_started = datetime.utcnow().isoformat()
+        for name in self._entries:
+            try:
+                await self.aget(name)
+            except Exception:
+                pass
+        self.warmup_finished = datetime.utcnow().isoformat()
+
+    def ready(self) -> bool:
+        return all(entry.state == "ready" for entry in self._entries.values())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready(),
+            "warmup_started": self.warmup_started,
+            "warmup_finished": self.warmup_finished,
+            "agents": {name: entry.stats() for name, entry in self._entries.items()}
+        }
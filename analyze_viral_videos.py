@@ -1,34 +1,102 @@
 import json
+import sys
 import asyncio
 import argparse
-from typing import List, Dict, Any
+from itertools import chain
+from typing import List, Dict, Any, Optional, Iterable, Iterator
 
 # Import our content strategy agent
 from agents.content_strategy_agent import ContentStrategyAgent, VideoData, ContentAnalysisRequest
+from chunked_analysis import chunked_analyze_stream, chunk_threshold
+from video_ingest import IngestReport, open_input, iter_records, iter_batches
+from near_duplicates import collapse_near_duplicates, DEFAULT_THRESHOLD, MAX_REPORTED_CLUSTERS
 
-async def analyze_videos_from_file(file_path: str) -> Dict[str, Any]:
-    """Analyze videos from a JSON file"""
-    # Load videos from JSON file
-    with open(file_path, 'r') as f:
-        video_data = json.load(f)
-    
-    # Create video objects
-    videos = [VideoData(**video) for video in video_data]
-    
-    # Create request
-    request = ContentAnalysisRequest(videos=videos)
+def collapse_batches(batches: Iterable[List[VideoData]], threshold: float, summary: Dict[str, Any]) -> Iterator[List[VideoData]]:
+    """
+    Collapse near-duplicates within each batch, accumulating the reports into
+    ``summary``. Duplicates in different batches are not merged, so larger
+    ``--batch-size`` values catch more of them.
+    """
+    summary.update({"videos": 0, "clusters": 0, "duplicates": 0, "threshold": threshold, "collapsed_clusters": 0, "largest_clusters": []})
+    for batch in batches:
+        representatives, report = collapse_near_duplicates(batch, threshold)
+        for key in ("videos", "clusters", "duplicates", "collapsed_clusters"):
+            summary[key] += report[key]
+        summary["largest_clusters"] = sorted(
+            summary["largest_clusters"] + report["largest_clusters"],
+            key=lambda c: (-c["size"], -c["views"])
+        )[:MAX_REPORTED_CLUSTERS]
+        yield representatives
+
+async def analyze_videos_from_file(
+    file_path: str,
+    chunked: bool = False,
+    shard_tokens: int = None,
+    parallel: int = None,
+    batch_size: int = 1000,
+    errors_file: Optional[str] = None,
+    agent: Optional[ContentStrategyAgent] = None,
+    dedup_threshold: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Analyze videos from an NDJSON or JSON array file (optionally gzipped).
     
-    # Initialize agent and process request
-    agent = ContentStrategyAgent()
-    result = await agent.process_request(request)
+    The file is parsed incrementally and validated in batches of
+    ``batch_size``; invalid records are skipped and summarized under
+    ``ingest`` (all of them are written to ``errors_file`` when given). Exports
+    up to ANALYSIS_CHUNK_THRESHOLD videos are analyzed in one request, larger
+    ones in concurrent shards as the file is read. With ``dedup_threshold``
+    near-duplicate videos are collapsed per batch and summarized under
+    ``dedup``.
+    """
+    report = IngestReport(error_file=errors_file)
+    agent = agent or ContentStrategyAgent()
+    dedup: Dict[str, Any] = {}
+    try:
+        with open_input(file_path) as f:
+            batches = iter_batches(iter_records(f), VideoData, batch_size, report)
+            if dedup_threshold:
+                batches = collapse_batches(batches, dedup_threshold, dedup)
+            
+            # Buffer just enough videos to tell a small export from a large one
+            head: List[VideoData] = []
+            for batch in batches:
+                head.extend(batch)
+                if len(head) > chunk_threshold():
+                    break
+            
+            # The head only stays empty once the whole file has been read
+            if not head:
+                raise ValueError(f"No valid videos in {file_path} ({report.invalid} invalid records)")
+            if not chunked and len(head) <= chunk_threshold():
+                result = await agent.process_request(ContentAnalysisRequest(videos=head))
+            else:
+                result = await chunked_analyze_stream(
+                    chain([head], batches),
+                    lambda shard: agent.process_request(ContentAnalysisRequest(videos=shard)),
+                    token_budget=shard_tokens,
+                    max_parallel=parallel
+                )
+    finally:
+        report.close()
     
+    result["ingest"] = report.summary()
+    if dedup:
+        result["dedup"] = dedup
     return result
 
 def main():
     parser = argparse.ArgumentParser(description='Analyze viral short-form videos')
-    parser.add_argument('--file', '-f', type=str, help='Path to JSON file containing video data')
+    parser.add_argument('--file', '-f', type=str, help='Path to a JSON array or NDJSON file (optionally .gz) containing video data')
     parser.add_argument('--output', '-o', type=str, help='Path to save analysis results (optional)')
     parser.add_argument('--sample', '-s', action='store_true', help='Generate sample video data file')
+    parser.add_argument('--chunked', action='store_true', help='Force sharded map-reduce analysis (automatic above ANALYSIS_CHUNK_THRESHOLD videos)')
+    parser.add_argument('--shard-tokens', type=int, default=None, help='Token budget per shard')
+    parser.add_argument('--parallel', type=int, default=None, help='Shards analyzed concurrently')
+    parser.add_argument('--batch-size', type=int, default=1000, help='Records validated per batch while reading the file')
+    parser.add_argument('--errors', type=str, default=None, help='Write every skipped record and its error to this NDJSON file')
+    parser.add_argument('--dedup', action='store_true', help='Collapse near-duplicate videos (reuploads, near-identical titles) before analysis')
+    parser.add_argument('--dedup-threshold', type=float, default=DEFAULT_THRESHOLD, help='Similarity at which two videos count as duplicates')
     
     args = parser.parse_args()
     
@@ -85,18 +153,28 @@ def main():
         return
     
     # Analyze videos
-    result = asyncio.run(analyze_videos_from_file(args.file))
+    result = asyncio.run(analyze_videos_from_file(
+        args.file, args.chunked, args.shard_tokens, args.parallel, args.batch_size, args.errors,
+        dedup_threshold=args.dedup_threshold if args.dedup else None
+    ))
     
-    # Pretty print the results
-    bn formatted_result = json.dumps(result, indent=2)
-    print("\n===== CONTENT ANALYSIS RESULTS =====")
-    print(formatted_result)
+    ingest = result["ingest"]
+    if "dedup" in result:
+        print(f"Collapsed {result['dedup']['duplicates']} near-duplicate videos into {result['dedup']['collapsed_clusters']} clusters", file=sys.stderr)
+    if ingest["invalid"]:
+        print(f"Skipped {ingest['invalid']} of {ingest['records']} records (see 'ingest.errors'{' and ' + args.errors if args.errors else ''})", file=sys.stderr)
     
-    # Save results if output path is provided
+    # Save results if output path is provided, streaming the JSON to disk
     if args.output:
         with open(args.output, 'w') as f:
-            f.write(formatted_result)
+            json.dump(result, f, indent=2)
         print(f"\nResults saved to {args.output}")
+        return
+    
+    # Otherwise pretty print the results
+    print("\n===== CONTENT ANALYSIS RESULTS =====")
+    json.dump(result, sys.stdout, indent=2)
+    print()
 
 if __name__ == "__main__":
     main()
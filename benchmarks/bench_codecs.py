@@ -0,0 +1,73 @@
+"""
+Stored size and decode cost of the ContentMemory analysis_data codecs.
+
+"legacy" is the original json.dumps TEXT format; the others are the codecs
+registered in memory_codecs.
+
+    python benchmarks/bench_codecs.py --rows 20000
+"""
+from typing import Dict, Any
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import memory_codecs
+
+
+def sample_analysis(i: int) -> Dict[str, Any]:
+    return {
+        "hook_patterns": [
+            {"type": "question-based", "example": f"What if I told you habit #{i} could change your life?"},
+            {"type": "shock-based", "example": "You've been charging your phone wrong."}
+        ],
+        "format_trends": ["Hook → Insight → Visual Demo → CTA", "Fast-paced cuts with meme overlays and subtitles"],
+        "engagement_tactics": ["Open loops (e.g., 'Wait for it...')", "Direct CTAs ('Follow me for more')"],
+        "content_themes": ["Time management hacks", "Exposing common myths"],
+        "summary": f"The most effective viral videos use fast-paced editing with captions (batch {i})."
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark analysis_data storage codecs')
+    parser.add_argument('--rows', type=int, default=20000, help='Analyses to encode and decode')
+    parser.add_argument('--output', '-o', type=str, help='Save results as JSON')
+    args = parser.parse_args()
+
+    analyses = [sample_analysis(i) for i in range(args.rows)]
+    results = {}
+
+    legacy = [json.dumps(a) for a in analyses]
+    started = time.perf_counter()
+    for row in legacy:
+        json.loads(row)
+    results["legacy"] = {
+        "avg_bytes": round(sum(len(r.encode("utf-8")) for r in legacy) / args.rows, 1),
+        "decode_us": round((time.perf_counter() - started) / args.rows * 1e6, 2)
+    }
+
+    for name in memory_codecs.available_codecs():
+        encoded = [memory_codecs.encode(a, name) for a in analyses]
+        started = time.perf_counter()
+        for row in encoded:
+            memory_codecs.decode(row)
+        results[name] = {
+            "avg_bytes": round(sum(len(r) for r in encoded) / args.rows, 1),
+            "decode_us": round((time.perf_counter() - started) / args.rows * 1e6, 2)
+        }
+
+    print(f"orjson: {'yes' if memory_codecs.orjson is not None else 'no'}")
+    for name, stats in results.items():
+        print(f"{name:>8}: {stats['avg_bytes']:>8} bytes/row  {stats['decode_us']:>7} us/decode")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark of near-duplicate collapsing on synthetic scraped titles.
+
+Each batch mixes unique titles with reuploads of a subset of them: the same
+title re-cased, with punctuation changes, or with tags such as "(reupload)"
+or "#shorts" appended. Ground truth is known, so the run reports how many
+reuploads were collapsed (recall) and how many distinct videos were merged
+into another one's cluster. Originals are built from a few templates and
+differ only in topics and episode numbers, so some of those merges are
+texts that are in fact near-identical.
+
+    python benchmarks/bench_dedup.py --sizes 1000 10000 100000
+"""
+from types import SimpleNamespace
+from typing import Any, List, Tuple
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from near_duplicates import collapse_near_duplicates, cluster_texts, _text, DEFAULT_THRESHOLD
+
+OPENERS = ["5 Morning Habits", "You've Been Charging Your Phone Wrong", "Why Nobody Talks About", "How to Fix",
+           "I Tried", "3 Exercises You're Doing Wrong", "What I Eat in a Day as a", "The Truth About"]
+TOPICS = ["budgeting", "sourdough", "deadlifts", "skincare", "remote work", "meal prep", "sleep", "investing",
+          "running", "coffee", "minimalism", "dog training", "study tips", "home office", "cold showers"]
+TAGS = [" (reupload)", " #shorts", "!!", " | full video", " 🔥", ""]
+
+
+def make_videos(count: int, duplicate_share: float = 0.3, seed: int = 11) -> Tuple[List[Any], List[int], List[bool]]:
+    """Videos, the original each one is or copies, and whether it is a copy"""
+    rng = random.Random(seed)
+    originals = int(count * (1 - duplicate_share))
+    videos, truth = [], []
+    for i in range(originals):
+        title = f"{rng.choice(OPENERS)} {rng.choice(TOPICS)} {rng.choice(TOPICS)} part {i}"
+        description = f"Everything about {rng.choice(TOPICS)} in {rng.randint(1, 60)} seconds, episode {i}"
+        videos.append(SimpleNamespace(title=title, description=description, views=rng.randint(1_000, 5_000_000)))
+        truth.append(i)
+    for _ in range(count - originals):
+        source = rng.randrange(originals)
+        original = videos[source]
+        title = original.title + rng.choice(TAGS)
+        if rng.random() < 0.5:
+            title = title.upper() if rng.random() < 0.5 else title.lower()
+        videos.append(SimpleNamespace(title=title, description=original.description, views=rng.randint(1_000, 500_000)))
+        truth.append(source)
+    order = list(range(count))
+    rng.shuffle(order)
+    return [videos[i] for i in order], [truth[i] for i in order], [i >= originals for i in order]
+
+
+def quality(clusters: List[int], truth: List[int], is_copy: List[bool]) -> Tuple[float, int]:
+    """Share of copies clustered with their original, and originals merged into another original's cluster"""
+    cluster_of = {original: cluster for cluster, original, copied in zip(clusters, truth, is_copy) if not copied}
+    copies = [(cluster, original) for cluster, original, copied in zip(clusters, truth, is_copy) if copied]
+    found = sum(1 for cluster, original in copies if cluster == cluster_of[original])
+    merged = len(cluster_of) - len(set(cluster_of.values()))
+    return found / max(1, len(copies)), merged
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark near-duplicate collapsing')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000], help='Batch sizes')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='Similarity threshold')
+    parser.add_argument('--output', '-o', type=str, help='Save results as JSON')
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        videos, truth, is_copy = make_videos(size)
+        started = time.perf_counter()
+        representatives, report = collapse_near_duplicates(videos, args.threshold)
+        elapsed = time.perf_counter() - started
+        recall, merged = quality(cluster_texts([_text(v) for v in videos], args.threshold), truth, is_copy)
+        results.append({
+            "videos": size,
+            "clusters": report["clusters"],
+            "true_clusters": len(set(truth)),
+            "recall": round(recall, 4),
+            "wrongly_merged": merged,
+            "elapsed_ms": round(elapsed * 1000, 1)
+        })
+        print(f"{size:>7} videos: {elapsed * 1000:8.1f} ms  {report['clusters']:>7} clusters "
+              f"(true {len(set(truth))})  recall {recall:.4f}  wrongly merged {merged}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Reads and writes per second for ContentMemory, before and after pooling.
+
+"before" reproduces the original implementation: one sqlite3.connect per
+call, default rollback journal, no index on last_updated. "after" is the
+pooled WAL-mode ContentMemory from memory.py.
+
+    python benchmarks/bench_memory.py --rows 5000 --threads 4
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from memory import ContentMemory, MemoryConfig
+
+SAMPLE_ANALYSIS = {
+    "hook_patterns": [{"type": "question-based", "example": "What if I told you..."}],
+    "format_trends": ["Hook -> Insight -> Visual Demo -> CTA"],
+    "engagement_tactics": ["Open loops", "Direct CTAs"],
+    "content_themes": ["Time management hacks"],
+    "summary": "Fast-paced edits with captions and a curiosity hook."
+}
+
+
+class LegacyContentMemory:
+    """The connect-per-call implementation ContentMemory replaced"""
+
+    def __init__(self, db_path: str, retention_days: int = 30):
+        self.db_path = db_path
+        self.retention_days = retention_days
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS content_memory (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    video_id TEXT UNIQUE,
+                    platform TEXT,
+                    analysis_data TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+
+    def add_content(self, video_id: str, platform: str, analysis_data: Dict[str, Any]):
+        with sqlite3.connect(self.db_path, timeout=30) as conn:
+            conn.execute('''
+                INSERT OR REPLACE INTO content_memory
+                (video_id, platform, analysis_data, last_updated)
+                VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+            ''', (video_id, platform, json.dumps(analysis_data)))
+
+    def get_content(self, video_id: str) -> Dict[str, Any]:
+        with sqlite3.connect(self.db_path, timeout=30) as conn:
+            # The original query embedded the parameter inside a string
+            # literal and could not run; the modifier is bound here instead.
+            result = conn.execute('''
+                SELECT analysis_data FROM content_memory
+                WHERE video_id = ? AND last_updated > datetime('now', ?)
+            ''', (video_id, f"-{self.retention_days} days")).fetchone()
+            return json.loads(result[0]) if result else None
+
+
+def _rate(fn: Callable[[int], Any], count: int, threads: int) -> float:
+    started = time.perf_counter()
+    if threads > 1:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(fn, range(count)))
+    else:
+        for i in range(count):
+            fn(i)
+    return count / (time.perf_counter() - started)
+
+
+def run(store: Any, rows: int, threads: int) -> Dict[str, float]:
+    write = lambda i: store.add_content(f"video-{i}", "tiktok", SAMPLE_ANALYSIS)
+    read = lambda i: store.get_content(f"video-{i % rows}")
+    return {
+        "writes_per_sec": round(_rate(write, rows, threads), 1),
+        "reads_per_sec": round(_rate(read, rows, threads), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark ContentMemory reads and writes')
+    parser.add_argument('--rows', type=int, default=5000, help='Rows to write and read')
+    parser.add_argument('--threads', type=int, default=4, help='Concurrent callers')
+    parser.add_argument('--output', '-o', type=str, help='Save results as JSON')
+    args = parser.parse_args()
+
+    results = {"rows": args.rows, "threads": args.threads}
+    with tempfile.TemporaryDirectory() as tmp:
+        results["before"] = run(LegacyContentMemory(os.path.join(tmp, "legacy.db")), args.rows, args.threads)
+        memory = ContentMemory(MemoryConfig(db_path=os.path.join(tmp, "pooled.db")))
+        results["after"] = run(memory, args.rows, args.threads)
+        memory.close()
+
+    for label in ("before", "after"):
+        print(f"{label:>6}: {results[label]['writes_per_sec']:>10} writes/s  {results[label]['reads_per_sec']:>10} reads/s")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Micro-benchmark of the /niche-analysis filter and insight aggregation.
+
+"before" is the original implementation: up to three filtering passes with
+.lower() on every field, then eight list(set(...)) passes. "after" is
+niche_engine.filter_and_aggregate, which also counts values, sums their
+views and merges accent/case variants.
+
+    python benchmarks/bench_niche_filter.py --sizes 1000 10000 100000
+"""
+from types import SimpleNamespace
+from typing import Any, Dict, List
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from niche_engine import filter_and_aggregate
+
+NICHES = ["Fitness", "Home Fitness", "Productivity", "Personal Finance", "Cooking", "Skincare", "Café Culture", "Travel"]
+PROBLEMS = ["lack of time", "weight loss plateau", "procrastination", "debt", "picky eaters", "acne", "burnout"]
+AUDIENCES = ["busy parents", "college students", "remote workers", "beginners", "retirees"]
+FIELDS = ["solution", "emotional_triggers", "sub_niche", "pain_points", "value_proposition"]
+
+
+def make_videos(count: int, seed: int = 7) -> List[Any]:
+    rng = random.Random(seed)
+    return [
+        SimpleNamespace(
+            title=f"Video {i}",
+            views=rng.randint(1_000, 5_000_000),
+            niche=rng.choice(NICHES),
+            problem=rng.choice(PROBLEMS),
+            audience=rng.choice(AUDIENCES),
+            **{field: f"{field} {rng.randint(0, 50)}" for field in FIELDS}
+        )
+        for i in range(count)
+    ]
+
+
+def legacy(videos: List[Any], target_niche: str, target_problem: str, target_audience: str) -> Dict[str, Any]:
+    filtered_videos = videos
+    if target_niche:
+        filtered_videos = [v for v in filtered_videos if v.niche and target_niche.lower() in v.niche.lower()]
+    if target_problem:
+        filtered_videos = [v for v in filtered_videos if v.problem and target_problem.lower() in v.problem.lower()]
+    if target_audience:
+        filtered_videos = [v for v in filtered_videos if v.audience and target_audience.lower() in v.audience.lower()]
+    return {
+        "problems": list(set([v.problem for v in filtered_videos if v.problem])),
+        "audiences": list(set([v.audience for v in filtered_videos if v.audience])),
+        "solutions": list(set([v.solution for v in filtered_videos if v.solution])),
+        "emotional_triggers": list(set([v.emotional_triggers for v in filtered_videos if v.emotional_triggers])),
+        "niches": list(set([v.niche for v in filtered_videos if v.niche])),
+        "sub_niches": list(set([v.sub_niche for v in filtered_videos if v.sub_niche])),
+        "pain_points": list(set([v.pain_points for v in filtered_videos if v.pain_points])),
+        "value_propositions": list(set([v.value_proposition for v in filtered_videos if v.value_proposition]))
+    }
+
+
+def best_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark niche filtering and aggregation')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000], help='Payload sizes')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement (best is kept)')
+    parser.add_argument('--output', '-o', type=str, help='Save results as JSON')
+    args = parser.parse_args()
+
+    scenarios = {
+        "all targets": {"target_niche": "fitness", "target_problem": "time", "target_audience": "parents"},
+        "niche only": {"target_niche": "fitness", "target_problem": None, "target_audience": None},
+        "no targets": {"target_niche": None, "target_problem": None, "target_audience": None}
+    }
+    results = []
+    for size in args.sizes:
+        videos = make_videos(size)
+        for scenario, targets in scenarios.items():
+            before = best_of(lambda: legacy(videos, **targets), args.repeat)
+            after = best_of(lambda: filter_and_aggregate(videos, **targets), args.repeat)
+            after_prefix = best_of(lambda: filter_and_aggregate(videos, match_mode="prefix", **targets), args.repeat)
+            results.append({
+                "videos": size,
+                "scenario": scenario,
+                "before_ms": round(before * 1000, 2),
+                "after_ms": round(after * 1000, 2),
+                "after_prefix_ms": round(after_prefix * 1000, 2)
+            })
+            print(f"{size:>7} videos, {scenario:<11}: before {before * 1000:8.2f} ms  after {after * 1000:8.2f} ms  after(prefix) {after_prefix * 1000:8.2f} ms")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Serialization time and bytes on the wire for a /niche-analysis response.
+
+"before" is what FastAPI did with ``response_model=Dict[str, Any]``: validate
+the dict against the response model, run ``jsonable_encoder`` over it and
+render it with the stdlib encoder (each step only when fastapi/pydantic are
+installed). "after" renders the result with responses.dumps (orjson when
+installed). Sizes are reported raw, gzip and brotli compressed, and for a
+``?fields=`` selection.
+
+    python benchmarks/bench_responses.py --videos 500
+"""
+from types import SimpleNamespace
+from typing import Any, Dict, List
+import argparse
+import gzip
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from niche_engine import filter_and_aggregate
+from responses import dumps, select_fields, orjson, brotli
+
+NICHES = ["Fitness", "Home Fitness", "Productivity", "Personal Finance", "Cooking", "Skincare", "Café Culture", "Travel"]
+PROBLEMS = ["lack of time", "weight loss plateau", "procrastination", "debt", "picky eaters", "acne", "burnout"]
+AUDIENCES = ["busy parents", "college students", "remote workers", "beginners", "retirees"]
+HOOK_TYPES = ["question-based", "shock-based", "curiosity", "listicle", "story", "challenge"]
+WORDS = "quick easy daily hidden simple proven secret honest real tiny big morning night budget lazy".split()
+
+
+def _phrase(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def make_videos(count: int, seed: int = 7) -> List[Any]:
+    rng = random.Random(seed)
+    return [
+        SimpleNamespace(
+            title=f"{_phrase(rng, 5)} #{i}",
+            views=rng.randint(1_000, 5_000_000),
+            niche=rng.choice(NICHES),
+            problem=rng.choice(PROBLEMS),
+            audience=rng.choice(AUDIENCES),
+            solution=_phrase(rng, 6),
+            emotional_triggers=rng.choice(["fear of missing out", "curiosity", "relief", "pride", "surprise"]),
+            sub_niche=f"{rng.choice(NICHES)} {rng.choice(WORDS)}",
+            pain_points=_phrase(rng, 8),
+            value_proposition=_phrase(rng, 7)
+        )
+        for i in range(count)
+    ]
+
+
+def make_response(count: int) -> Dict[str, Any]:
+    """A merged analysis of ``count`` videos plus their niche insights"""
+    rng = random.Random(11)
+    videos = make_videos(count)
+    _, niche_insights = filter_and_aggregate(videos)
+    return {
+        "hook_patterns": [
+            {"type": rng.choice(HOOK_TYPES), "example": video.title, "views": video.views}
+            for video in sorted(videos, key=lambda v: v.views, reverse=True)[:count // 5]
+        ],
+        "format_trends": [f"Hook → {_phrase(rng, 3)} → CTA" for _ in range(10)],
+        "engagement_tactics": [_phrase(rng, 6) for _ in range(10)],
+        "content_themes": [_phrase(rng, 3) for _ in range(10)],
+        "summary": " ".join(_phrase(rng, 12) for _ in range(8)),
+        "chunking": {"videos": count, "shards": max(1, count // 150), "max_parallel": 4, "token_budget": 6000, "failed_shards": [], "elapsed_ms": 1234.5},
+        "niche_insights": niche_insights
+    }
+
+
+def legacy_pipeline():
+    """The steps FastAPI ran for a ``response_model=Dict[str, Any]`` endpoint"""
+    steps = []
+    try:
+        from pydantic import TypeAdapter
+        adapter = TypeAdapter(Dict[str, Any])
+        steps.append(("response_model", adapter.validate_python))
+    except ImportError:
+        pass
+    try:
+        from fastapi.encoders import jsonable_encoder
+        steps.append(("jsonable_encoder", jsonable_encoder))
+    except ImportError:
+        pass
+
+    def run(content: Any) -> bytes:
+        for _, step in steps:
+            content = step(content)
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+    return run, [name for name, _ in steps]
+
+
+def best_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark response serialization and compression')
+    parser.add_argument('--videos', type=int, nargs='+', default=[500], help='Videos behind the analyzed response')
+    parser.add_argument('--fields', type=str, default="summary,hook_patterns.type,niche_insights.problems", help='?fields= selection to measure')
+    parser.add_argument('--repeat', type=int, default=20, help='Runs per measurement (best is kept)')
+    parser.add_argument('--output', '-o', type=str, help='Save results as JSON')
+    args = parser.parse_args()
+
+    legacy, legacy_steps = legacy_pipeline()
+    print(f"before: {' + '.join(legacy_steps + ['json.dumps'])}")
+    print(f"after:  {'orjson' if orjson is not None else 'json.dumps (orjson not installed)'}")
+    results = []
+    for count in args.videos:
+        content = make_response(count)
+        body = dumps(content)
+        selected = dumps(select_fields(content, args.fields))
+        before = best_of(lambda: legacy(content), args.repeat)
+        after = best_of(lambda: dumps(content), args.repeat)
+        selected_time = best_of(lambda: dumps(select_fields(content, args.fields)), args.repeat)
+        gzip_time = best_of(lambda: gzip.compress(body, compresslevel=6), args.repeat)
+        result = {
+            "videos": count,
+            "before_ms": round(before * 1000, 3),
+            "after_ms": round(after * 1000, 3),
+            "fields_ms": round(selected_time * 1000, 3),
+            "gzip_ms": round(gzip_time * 1000, 3),
+            "bytes": len(body),
+            "gzip_bytes": len(gzip.compress(body, compresslevel=6)),
+            "fields_bytes": len(selected),
+            "fields_gzip_bytes": len(gzip.compress(selected, compresslevel=6))
+        }
+        if brotli is not None:
+            result["brotli_ms"] = round(best_of(lambda: brotli.compress(body, quality=4), args.repeat) * 1000, 3)
+            result["brotli_bytes"] = len(brotli.compress(body, quality=4))
+        results.append(result)
+        print(f"{count:>6} videos: before {result['before_ms']:8.3f} ms  after {result['after_ms']:8.3f} ms  with ?fields= {result['fields_ms']:8.3f} ms")
+        print(f"{'':>14}bytes {result['bytes']:>9}  gzip {result['gzip_bytes']:>8} ({result['gzip_ms']:.3f} ms)"
+              + (f"  brotli {result['brotli_bytes']:>8} ({result['brotli_ms']:.3f} ms)" if brotli is not None else "")
+              + f"  ?fields= {result['fields_bytes']:>8} ({result['fields_gzip_bytes']} gzip)")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({"before_steps": legacy_steps, "results": results}, f, indent=2)
+        print(f"\nResults saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
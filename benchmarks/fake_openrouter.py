@@ -0,0 +1,202 @@
+"""
+Local stand-in for the OpenRouter chat completions API.
+
+Answers ``POST /api/v1/chat/completions`` after a latency drawn from a
+configurable distribution, fails a configurable share of calls with
+429/5xx (429s carry Retry-After) and streams the completion as SSE chunks
+when the request sets ``"stream": true``. The completion is a JSON object
+with the fields the strategy, scriptwriter and visual planner agents read,
+so every pipeline stage can parse it. ``GET /stats`` reports call counts.
+
+    python benchmarks/fake_openrouter.py --port 9100 --latency lognormal:0.8,0.5 --error-rate 0.02
+
+Latency distributions (seconds): ``fixed:S``, ``uniform:LOW,HIGH``,
+``normal:MEAN,STDDEV``, ``lognormal:MEDIAN,SIGMA``.
+"""
+from typing import Any, Callable, Dict, Sequence
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+import uvicorn
+
+COMPLETION = {
+    "hook_patterns": [
+        {"type": "question-based", "example": "What if I told you this one habit could change your life?"},
+        {"type": "shock-based", "example": "You're doing this wrong — here's why."}
+    ],
+    "format_trends": ["Hook → Insight → Visual Demo → CTA", "Fast-paced cuts with meme overlays and subtitles"],
+    "engagement_tactics": ["Open loops (e.g., 'Wait for it...')", "Direct CTAs ('Follow me for more')"],
+    "content_themes": ["Time management hacks", "Exposing common myths"],
+    "summary": "The most effective viral videos lead with a curiosity hook, use fast-paced editing and close with a direct CTA.",
+    "title": "The 1-3-5 Rule",
+    "script": "I can't believe I didn't know this sooner. [show overwhelmed person] Here's the 1-3-5 Rule: one big thing, three medium things, five small things. [show list] Stitch this with your results!",
+    "cta": "Stitch this with your results!",
+    "theme": "productivity",
+    "estimated_duration": 30,
+    "hook_type": "shock-based",
+    "scenes": [
+        {"timestamp": "0:00-0:03", "description": "Close-up of a cluttered desk", "stock_footage": ["messy desk"], "text_overlay": "You're doing this wrong", "transition": "quick zoom"},
+        {"timestamp": "0:03-0:20", "description": "Notebook with the 1-3-5 list", "stock_footage": ["notebook writing"], "text_overlay": "1 big, 3 medium, 5 small", "transition": "swipe"},
+        {"timestamp": "0:20-0:30", "description": "Completed list and CTA", "stock_footage": ["check marks"], "text_overlay": "Stitch this!", "transition": "cut"}
+    ],
+    "voiceover": "Energetic, fast-paced",
+    "music": "Upbeat lo-fi",
+    "editing_tips": ["Cut every 2 seconds", "Burn in captions"]
+}
+
+
+def latency_sampler(spec: str) -> Callable[[], float]:
+    """Parse a ``kind:params`` latency spec into a function returning seconds"""
+    kind, _, params = spec.partition(":")
+    values = [float(value) for value in params.split(",") if value]
+    samplers = {
+        "fixed": lambda: values[0],
+        "uniform": lambda: random.uniform(values[0], values[1]),
+        "normal": lambda: random.gauss(values[0], values[1]),
+        "lognormal": lambda: random.lognormvariate(math.log(values[0]), values[1])
+    }
+    if kind not in samplers:
+        raise ValueError(f"Unknown latency distribution {kind!r}; use one of {', '.join(samplers)}")
+    sample = samplers[kind]
+    sample()
+    return lambda: max(0.0, sample())
+
+
+class FakeOpenRouter:
+    def __init__(
+        self,
+        latency: Callable[[], float],
+        error_rate: float = 0.0,
+        error_statuses: Sequence[int] = (429, 500, 503),
+        stall_rate: float = 0.0,
+        stall_seconds: float = 120.0,
+        tokens_per_second: float = 200.0,
+        completion: Dict[str, Any] = COMPLETION
+    ):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_statuses = list(error_statuses)
+        self.stall_rate = stall_rate
+        self.stall_seconds = stall_seconds
+        self.tokens_per_second = tokens_per_second
+        self.content = json.dumps(completion)
+        self.calls = 0
+        self.errors: Dict[str, int] = {}
+        self.stalls = 0
+        self.streams = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.started = time.time()
+
+    def _chunk(self, completion_id: str, model: str, delta: Dict[str, Any], finish_reason: Any = None) -> str:
+        body = {"id": completion_id, "object": "chat.completion.chunk", "model": model, "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+        return f"data: {json.dumps(body)}\n\n"
+
+    async def _stream(self, completion_id: str, model: str):
+        # Roughly four characters per token
+        pieces = [self.content[i:i + 4] for i in range(0, len(self.content), 4)]
+        delay = 1 / self.tokens_per_second if self.tokens_per_second > 0 else 0
+        try:
+            yield self._chunk(completion_id, model, {"role": "assistant"})
+            for piece in pieces:
+                await asyncio.sleep(delay)
+                yield self._chunk(completion_id, model, {"content": piece})
+            yield self._chunk(completion_id, model, {}, "stop")
+            yield "data: [DONE]\n\n"
+        finally:
+            self.in_flight -= 1
+
+    async def chat_completions(self, request: Request):
+        payload = await request.json()
+        model = payload.get("model", "fake/model")
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        streaming = False
+        try:
+            if random.random() < self.stall_rate:
+                self.stalls += 1
+                await asyncio.sleep(self.stall_seconds)
+            await asyncio.sleep(self.latency())
+            if random.random() < self.error_rate:
+                status = random.choice(self.error_statuses)
+                self.errors[str(status)] = self.errors.get(str(status), 0) + 1
+                headers = {"Retry-After": "1"} if status == 429 else None
+                return JSONResponse({"error": {"code": status, "message": "Injected failure"}}, status_code=status, headers=headers)
+            completion_id = f"gen-{uuid.uuid4().hex[:12]}"
+            if payload.get("stream"):
+                self.streams += 1
+                streaming = True
+                return StreamingResponse(self._stream(completion_id, model), media_type="text/event-stream")
+            prompt_chars = sum(len(str(message.get("content", ""))) for message in payload.get("messages", []))
+            return JSONResponse({
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": self.content}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": prompt_chars // 4, "completion_tokens": len(self.content) // 4, "total_tokens": (prompt_chars + len(self.content)) // 4}
+            })
+        finally:
+            if not streaming:
+                self.in_flight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "stalls": self.stalls,
+            "streams": self.streams,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "uptime_seconds": round(time.time() - self.started, 1)
+        }
+
+
+def create_app(fake: FakeOpenRouter) -> FastAPI:
+    app = FastAPI(title="Fake OpenRouter")
+    app.add_api_route("/api/v1/chat/completions", fake.chat_completions, methods=["POST"])
+    app.add_api_route("/chat/completions", fake.chat_completions, methods=["POST"])
+    app.add_api_route("/stats", fake.stats, methods=["GET"])
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a fake OpenRouter chat completions server')
+    parser.add_argument('--host', type=str, default="127.0.0.1", help='Bind address')
+    parser.add_argument('--port', type=int, default=9100, help='Port')
+    parser.add_argument('--latency', type=str, default="lognormal:0.8,0.5", help='Latency distribution, e.g. fixed:0.5 or lognormal:0.8,0.5')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of calls answered with an error status')
+    parser.add_argument('--error-status', type=int, nargs='+', default=[429, 500, 503], help='Error statuses to inject')
+    parser.add_argument('--stall-rate', type=float, default=0.0, help='Share of calls that hang for --stall-seconds first')
+    parser.add_argument('--stall-seconds', type=float, default=120.0, help='How long a stalled call hangs')
+    parser.add_argument('--tokens-per-second', type=float, default=200.0, help='Streaming speed')
+    parser.add_argument('--completion', type=str, default=None, help='JSON file with the completion object to return')
+    args = parser.parse_args()
+
+    completion = COMPLETION
+    if args.completion:
+        with open(args.completion, 'r') as f:
+            completion = json.load(f)
+
+    fake = FakeOpenRouter(
+        latency_sampler(args.latency),
+        error_rate=args.error_rate,
+        error_statuses=args.error_status,
+        stall_rate=args.stall_rate,
+        stall_seconds=args.stall_seconds,
+        tokens_per_second=args.tokens_per_second,
+        completion=completion
+    )
+    uvicorn.run(create_app(fake), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,442 @@
+"""
+Load test of the content strategy API against a fake OpenRouter.
+
+Every endpoint is driven in turn, either closed-loop at a fixed concurrency
+(``--concurrency``) or open-loop at a target request rate with Poisson
+arrivals (``--rate``). Open-loop latencies are measured from the scheduled
+send time, so a saturated server is not hidden by the load generator slowing
+down. Each scenario reports throughput, p50/p95/p99 latency, status counts,
+the fake provider's call count and per-worker CPU and RSS read from /proc
+(Linux). Request bodies are unique per request unless ``--repeat-payloads``
+is given, so the result cache does not turn the run into a cache benchmark.
+
+With ``--spawn`` the fake OpenRouter (benchmarks/fake_openrouter.py) and the
+API under gunicorn are started on local ports and stopped afterwards;
+otherwise ``--target`` is used as is and ``--server-pid`` selects the process
+(and its children) to sample.
+
+    python benchmarks/load_test.py --spawn --workers 2 --concurrency 16 --duration 30 -o before.json
+    python benchmarks/load_test.py --spawn --rate 20 --endpoints analyze full-pipeline --latency fixed:0.5
+"""
+from typing import Any, Callable, Dict, List, Optional
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENDPOINTS = ["analyze", "niche-analysis", "generate-script", "create-visual-plan", "full-pipeline"]
+NICHES = ["Fitness", "Productivity", "Personal Finance", "Cooking", "Skincare", "Travel"]
+PROBLEMS = ["lack of time", "procrastination", "debt", "picky eaters", "acne", "burnout"]
+AUDIENCES = ["busy parents", "college students", "remote workers", "beginners"]
+HOOK_TYPES = ["question-based", "shock-based", "curiosity", "listicle"]
+
+
+def _videos(rng: random.Random, count: int, niche_fields: bool = False) -> List[Dict[str, Any]]:
+    videos = []
+    for i in range(count):
+        video = {
+            "title": f"{rng.choice(HOOK_TYPES)} video {rng.randint(0, 10 ** 9)}",
+            "description": f"How I fixed {rng.choice(PROBLEMS)} in {rng.randint(2, 30)} days",
+            "views": rng.randint(1_000, 5_000_000),
+            "publishedAt": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "channel": f"channel{rng.randint(1, 500)}"
+        }
+        if niche_fields:
+            video.update({
+                "niche": rng.choice(NICHES),
+                "problem": rng.choice(PROBLEMS),
+                "audience": rng.choice(AUDIENCES),
+                "solution": f"solution {rng.randint(0, 100)}",
+                "pain_points": f"pain point {rng.randint(0, 100)}"
+            })
+        videos.append(video)
+    return videos
+
+
+def payload_factory(endpoint: str, videos: int, seed: int, repeat: bool) -> Callable[[], Dict[str, Any]]:
+    """Request bodies for ``endpoint``; the same body every time when ``repeat``"""
+    rng = random.Random(seed)
+
+    def build() -> Dict[str, Any]:
+        if endpoint == "analyze":
+            return {"videos": _videos(rng, videos), "analysis_type": "full"}
+        if endpoint == "niche-analysis":
+            return {"videos": _videos(rng, videos, niche_fields=True), "analysis_type": "full", "target_niche": rng.choice(NICHES)}
+        if endpoint == "generate-script":
+            return {
+                "hook_patterns": [{"type": rng.choice(HOOK_TYPES), "example": f"Example hook {rng.randint(0, 10 ** 9)}"}],
+                "format_trends": ["Hook → Insight → Visual Demo → CTA"],
+                "engagement_tactics": ["Open loops", "Direct CTAs"],
+                "content_themes": [f"theme {rng.randint(0, 10 ** 9)}"],
+                "summary": "Lead with a curiosity hook and close with a direct CTA.",
+                "platform": "TikTok"
+            }
+        if endpoint == "create-visual-plan":
+            return {
+                "script": f"Script {rng.randint(0, 10 ** 9)}: one big thing, three medium things, five small things.",
+                "hook": "I can't believe I didn't know this sooner.",
+                "cta": "Stitch this with your results!",
+                "niche": rng.choice(NICHES).lower(),
+                "tone": "informative",
+                "platform": "TikTok"
+            }
+        if endpoint == "full-pipeline":
+            return {"videos": _videos(rng, videos), "platform": "TikTok"}
+        raise ValueError(f"Unknown endpoint {endpoint!r}")
+
+    if repeat:
+        body = build()
+        return lambda: body
+    return build
+
+
+def percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, int(round(q / 100 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def _children(pid: int) -> List[int]:
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r") as f:
+                # The command name may contain spaces; fields resume after its ")"
+                fields = f.read().rsplit(")", 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        if int(fields[1]) == pid:
+            children.append(int(entry))
+    return children
+
+
+def _cpu_seconds(pid: int) -> Optional[float]:
+    try:
+        with open(f"/proc/{pid}/stat", "r") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+    except OSError:
+        return None
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def _rss_mb(pid: int) -> Optional[float]:
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+class ProcessSampler:
+    """Samples CPU and RSS of a server process and its workers while a scenario runs"""
+
+    def __init__(self, pid: Optional[int], interval: float = 0.5):
+        self.pid = pid
+        self.interval = interval
+        self._samples: Dict[int, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def _pids(self) -> List[int]:
+        if self.pid is None or not os.path.exists("/proc"):
+            return []
+        return [self.pid] + _children(self.pid)
+
+    def _sample(self, first: bool = False):
+        now = time.monotonic()
+        for pid in self._pids():
+            cpu, rss = _cpu_seconds(pid), _rss_mb(pid)
+            if cpu is None:
+                continue
+            entry = self._samples.setdefault(pid, {"first": (now, cpu), "last": (now, cpu), "cpu_max": 0.0, "rss_max": 0.0})
+            last_time, last_cpu = entry["last"]
+            if now > last_time and not first:
+                entry["cpu_max"] = max(entry["cpu_max"], (cpu - last_cpu) / (now - last_time) * 100)
+            entry["last"] = (now, cpu)
+            entry["rss_max"] = max(entry["rss_max"], rss or 0.0)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            self._sample()
+
+    def start(self):
+        self._samples = {}
+        self._sample(first=True)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> List[Dict[str, Any]]:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._sample()
+        workers = []
+        for pid, entry in sorted(self._samples.items()):
+            (first_time, first_cpu), (last_time, last_cpu) = entry["first"], entry["last"]
+            elapsed = last_time - first_time
+            workers.append({
+                "pid": pid,
+                "role": "master" if pid == self.pid else "worker",
+                "cpu_percent_avg": round((last_cpu - first_cpu) / elapsed * 100, 1) if elapsed > 0 else None,
+                "cpu_percent_max": round(entry["cpu_max"], 1),
+                "rss_mb_max": round(entry["rss_max"], 1)
+            })
+        return workers
+
+
+async def _send(client: httpx.AsyncClient, endpoint: str, body: Dict[str, Any]) -> str:
+    try:
+        response = await client.post(f"/{endpoint}", json=body)
+        await response.aread()
+        return str(response.status_code)
+    except httpx.TimeoutException:
+        return "timeout"
+    except httpx.HTTPError as e:
+        return type(e).__name__
+
+
+async def closed_loop(client: httpx.AsyncClient, endpoint: str, payload: Callable[[], Dict[str, Any]], concurrency: int, duration: float) -> List[tuple]:
+    """``concurrency`` clients each sending the next request as soon as the last one finishes"""
+    deadline = time.monotonic() + duration
+    results = []
+
+    async def user():
+        while time.monotonic() < deadline:
+            started = time.monotonic()
+            status = await _send(client, endpoint, payload())
+            results.append((status, time.monotonic() - started))
+
+    await asyncio.gather(*[user() for _ in range(concurrency)])
+    return results
+
+
+async def open_loop(client: httpx.AsyncClient, endpoint: str, payload: Callable[[], Dict[str, Any]], rate: float, duration: float, max_outstanding: int) -> List[tuple]:
+    """Poisson arrivals at ``rate`` requests per second, independent of response times"""
+    results = []
+    tasks = set()
+    rng = random.Random(1)
+
+    async def request(scheduled: float):
+        status = await _send(client, endpoint, payload())
+        results.append((status, time.monotonic() - scheduled))
+
+    started = time.monotonic()
+    next_send = started
+    while next_send < started + duration:
+        await asyncio.sleep(max(0.0, next_send - time.monotonic()))
+        if len(tasks) >= max_outstanding:
+            results.append(("dropped", None))
+        else:
+            task = asyncio.create_task(request(next_send))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        next_send += rng.expovariate(rate)
+    await asyncio.gather(*tasks)
+    return results
+
+
+def summarize(endpoint: str, results: List[tuple], elapsed: float) -> Dict[str, Any]:
+    statuses: Dict[str, int] = {}
+    for status, _ in results:
+        statuses[status] = statuses.get(status, 0) + 1
+    ok_latencies = sorted(latency * 1000 for status, latency in results if status.startswith("2"))
+    all_latencies = sorted(latency * 1000 for _, latency in results if latency is not None)
+    rounded = lambda value: round(value, 1) if value is not None else None
+    return {
+        "endpoint": endpoint,
+        "requests": len(results),
+        "ok": len(ok_latencies),
+        "statuses": statuses,
+        "elapsed_seconds": round(elapsed, 2),
+        "throughput_rps": round(len(ok_latencies) / elapsed, 2) if elapsed else None,
+        "latency_ms": {
+            "p50": rounded(percentile(ok_latencies, 50)),
+            "p95": rounded(percentile(ok_latencies, 95)),
+            "p99": rounded(percentile(ok_latencies, 99)),
+            "max": rounded(ok_latencies[-1] if ok_latencies else None),
+            "mean": rounded(sum(ok_latencies) / len(ok_latencies) if ok_latencies else None)
+        },
+        "latency_all_ms": {
+            "p50": rounded(percentile(all_latencies, 50)),
+            "p99": rounded(percentile(all_latencies, 99))
+        }
+    }
+
+
+async def _fake_stats(fake_url: Optional[str]) -> Optional[Dict[str, Any]]:
+    if not fake_url:
+        return None
+    try:
+        async with httpx.AsyncClient(timeout=5) as client:
+            return (await client.get(f"{fake_url}/stats")).json()
+    except httpx.HTTPError:
+        return None
+
+
+async def run_scenarios(args, target: str, server_pid: Optional[int], fake_url: Optional[str]) -> List[Dict[str, Any]]:
+    limits = httpx.Limits(max_connections=max(args.concurrency or 0, args.max_outstanding), max_keepalive_connections=100)
+    headers = {"X-API-Key": "load-test"}
+    scenarios = []
+    async with httpx.AsyncClient(base_url=target, timeout=args.timeout, limits=limits, headers=headers) as client:
+        for index, endpoint in enumerate(args.endpoints):
+            payload = payload_factory(endpoint, args.videos, args.seed + index, args.repeat_payloads)
+
+            async def drive(duration: float) -> List[tuple]:
+                if args.rate:
+                    return await open_loop(client, endpoint, payload, args.rate, duration, args.max_outstanding)
+                return await closed_loop(client, endpoint, payload, args.concurrency, duration)
+
+            if args.warmup:
+                await drive(args.warmup)
+            sampler = ProcessSampler(server_pid)
+            fake_before = await _fake_stats(fake_url)
+            sampler.start()
+            started = time.monotonic()
+            results = await drive(args.duration)
+            elapsed = time.monotonic() - started
+            scenario = summarize(endpoint, results, elapsed)
+            scenario["workers"] = await sampler.stop()
+            fake_after = await _fake_stats(fake_url)
+            if fake_before and fake_after:
+                calls = fake_after["calls"] - fake_before["calls"]
+                scenario["llm_calls"] = calls
+                scenario["llm_calls_per_request"] = round(calls / scenario["requests"], 2) if scenario["requests"] else None
+            scenarios.append(scenario)
+            latency = scenario["latency_ms"]
+            print(f"{endpoint:<20} {scenario['ok']:>6}/{scenario['requests']:<6} ok  {scenario['throughput_rps']:>8} req/s  "
+                  f"p50 {latency['p50']} ms  p95 {latency['p95']} ms  p99 {latency['p99']} ms  statuses {scenario['statuses']}")
+            for worker in scenario["workers"]:
+                print(f"{'':<22}{worker['role']:<7} {worker['pid']:>7}: cpu avg {worker['cpu_percent_avg']}%  max {worker['cpu_percent_max']}%  rss {worker['rss_mb_max']} MB")
+    return scenarios
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_ready(url: str, timeout: float):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"{url} did not become ready within {timeout}s")
+
+
+def spawn(args, data_dir: str):
+    """Start the fake OpenRouter and the API; returns (processes, target, api pid, fake url)"""
+    fake_port, api_port = _free_port(), _free_port()
+    fake = subprocess.Popen([
+        sys.executable, os.path.join(REPO_DIR, "benchmarks", "fake_openrouter.py"),
+        "--port", str(fake_port),
+        "--latency", args.latency,
+        "--error-rate", str(args.error_rate),
+        "--stall-rate", str(args.stall_rate),
+        "--tokens-per-second", str(args.tokens_per_second)
+    ])
+    fake_url = f"http://127.0.0.1:{fake_port}"
+    env = {
+        **os.environ,
+        "OPENROUTER_BASE_URL": f"{fake_url}/api/v1",
+        "OPENROUTER_API_KEY": "load-test",
+        "MEMORY_DATA_DIR": data_dir,
+        "MEMORY_MAINTENANCE_ENABLED": "false",
+        "ADMISSION_ENABLED": "true" if args.admission else "false",
+        "RESULT_CACHE_SHARED": "false"
+    }
+    env.pop("PROMETHEUS_MULTIPROC_DIR", None)
+    api = subprocess.Popen([
+        sys.executable, "-m", "gunicorn", args.app,
+        "--workers", str(args.workers),
+        "--worker-class", "uvicorn.workers.UvicornWorker",
+        "--bind", f"127.0.0.1:{api_port}",
+        "--timeout", "180",
+        "--log-level", "warning"
+    ], cwd=REPO_DIR, env=env)
+    processes = [api, fake]
+    try:
+        _wait_ready(f"{fake_url}/stats", 30)
+        _wait_ready(f"http://127.0.0.1:{api_port}/ready", args.ready_timeout)
+    except Exception:
+        stop(processes)
+        raise
+    return processes, f"http://127.0.0.1:{api_port}", api.pid, fake_url
+
+
+def stop(processes: List[subprocess.Popen]):
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the API endpoints against a fake OpenRouter')
+    parser.add_argument('--target', type=str, default="http://127.0.0.1:8000", help='Base URL of a running API (ignored with --spawn)')
+    parser.add_argument('--server-pid', type=int, default=None, help='PID of the running server (gunicorn master) to sample')
+    parser.add_argument('--fake-url', type=str, default=None, help='Base URL of a running fake OpenRouter, to count LLM calls')
+    parser.add_argument('--spawn', action='store_true', help='Start the fake OpenRouter and the API under gunicorn')
+    parser.add_argument('--app', type=str, default="content_strategy_api:app", help='ASGI app to spawn')
+    parser.add_argument('--workers', type=int, default=2, help='Gunicorn workers to spawn')
+    parser.add_argument('--admission', action='store_true', help='Keep admission control enabled when spawning')
+    parser.add_argument('--ready-timeout', type=float, default=120, help='Seconds to wait for /ready when spawning')
+    parser.add_argument('--latency', type=str, default="lognormal:0.8,0.5", help='Fake OpenRouter latency distribution')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fake OpenRouter error rate')
+    parser.add_argument('--stall-rate', type=float, default=0.0, help='Fake OpenRouter share of stalled calls')
+    parser.add_argument('--tokens-per-second', type=float, default=200.0, help='Fake OpenRouter streaming speed')
+    parser.add_argument('--endpoints', type=str, nargs='+', default=ENDPOINTS, choices=ENDPOINTS, help='Endpoints to drive, one scenario each')
+    parser.add_argument('--concurrency', type=int, default=8, help='Closed-loop concurrent clients')
+    parser.add_argument('--rate', type=float, default=None, help='Open-loop requests per second (overrides --concurrency)')
+    parser.add_argument('--max-outstanding', type=int, default=1000, help='Open-loop cap on requests in flight; beyond it arrivals are dropped')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds per scenario')
+    parser.add_argument('--warmup', type=float, default=5, help='Unmeasured seconds before each scenario')
+    parser.add_argument('--videos', type=int, default=20, help='Videos per analysis request')
+    parser.add_argument('--repeat-payloads', action='store_true', help='Send the same body every time (exercises the result cache)')
+    parser.add_argument('--timeout', type=float, default=180, help='Client timeout per request')
+    parser.add_argument('--seed', type=int, default=42, help='Payload random seed')
+    parser.add_argument('--output', '-o', type=str, help='Save results as JSON')
+    args = parser.parse_args()
+
+    processes: List[subprocess.Popen] = []
+    target, server_pid, fake_url = args.target, args.server_pid, args.fake_url
+    with tempfile.TemporaryDirectory() as data_dir:
+        if args.spawn:
+            processes, target, server_pid, fake_url = spawn(args, data_dir)
+        try:
+            scenarios = asyncio.run(run_scenarios(args, target, server_pid, fake_url))
+        finally:
+            stop(processes)
+
+    if args.output:
+        config = {key: value for key, value in vars(args).items() if key != "output"}
+        with open(args.output, 'w') as f:
+            json.dump({"started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), "config": config, "scenarios": scenarios}, f, indent=2)
+        print(f"\nResults saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+Map-reduce analysis for video batches too large for one LLM call.
+
+Videos are ranked by views and packed into shards that fit a token budget.
+Shards are analyzed concurrently, and the partial hook patterns, format
+trends, engagement tactics and content themes are merged into a single
+ranked analysis.
+"""
+from typing import Dict, Any, List, Callable, Awaitable, Iterable, Optional, Sequence, Tuple
+import asyncio
+import logging
+import os
+import re
+import time
+
+logger = logging.getLogger(__name__)
+
+LIST_FIELDS = ("format_trends", "engagement_tactics", "content_themes")
+
+# Rough prompt cost of a video: ~4 characters per token plus JSON framing
+_CHARS_PER_TOKEN = 4
+_TOKENS_PER_VIDEO_OVERHEAD = 24
+
+_NON_WORD = re.compile(r"[^\w]+", re.UNICODE)
+
+
+def chunk_threshold() -> int:
+    """Batches larger than this many videos are analyzed in shards"""
+    return int(os.environ.get("ANALYSIS_CHUNK_THRESHOLD", 200))
+
+
+def estimate_tokens(video: Any) -> int:
+    text_length = sum(len(getattr(video, field, None) or "") for field in ("title", "description", "channel"))
+    return text_length // _CHARS_PER_TOKEN + _TOKENS_PER_VIDEO_OVERHEAD
+
+
+def make_shards(videos: Sequence[Any], token_budget: int = 6000, max_videos: int = 150) -> List[List[Any]]:
+    """Rank videos by views and pack them into shards within the token budget"""
+    ranked = sorted(videos, key=lambda v: getattr(v, "views", 0) or 0, reverse=True)
+    shards: List[List[Any]] = []
+    current: List[Any] = []
+    current_tokens = 0
+    for video in ranked:
+        tokens = estimate_tokens(video)
+        if current and (current_tokens + tokens > token_budget or len(current) >= max_videos):
+            shards.append(current)
+            current, current_tokens = [], 0
+        current.append(video)
+        current_tokens += tokens
+    if current:
+        shards.append(current)
+    return shards
+
+
+def _key(text: Any) -> str:
+    return _NON_WORD.sub(" ", str(text)).casefold().strip()
+
+
+def merge_analyses(partials: List[Dict[str, Any]], weights: List[float], top_k: int = 10) -> Dict[str, Any]:
+    """
+    Reduce step: deduplicate and re-rank shard results.
+
+    An item's score is the summed weight (total views) of every shard that
+    reported it, so patterns seen across many high-performing shards rise to
+    the top. Hook patterns are deduplicated by type and keep the example from
+    the heaviest shard.
+    """
+    hooks: Dict[str, Dict[str, Any]] = {}
+    lists: Dict[str, Dict[str, List[Any]]] = {field: {} for field in LIST_FIELDS}
+
+    for partial, weight in zip(partials, weights):
+        for pattern in partial.get("hook_patterns") or []:
+            if isinstance(pattern, dict):
+                hook_type = pattern.get("type") or ""
+            else:
+                hook_type, pattern = str(pattern), {"type": str(pattern)}
+            key = _key(hook_type)
+            if not key:
+                continue
+            entry = hooks.get(key)
+            if entry is None:
+                hooks[key] = {"pattern": dict(pattern), "score": weight, "best": weight, "shards": 1}
+            else:
+                entry["score"] += weight
+                entry["shards"] += 1
+                if weight > entry["best"]:
+                    entry["pattern"], entry["best"] = dict(pattern), weight
+        for field in LIST_FIELDS:
+            for item in partial.get(field) or []:
+                key = _key(item)
+                if not key:
+                    continue
+                entry = lists[field].get(key)
+                if entry is None:
+                    lists[field][key] = [item, weight]
+                else:
+                    entry[1] += weight
+
+    ranked_hooks = sorted(hooks.values(), key=lambda e: (-e["score"], -e["shards"]))[:top_k]
+    merged = {"hook_patterns": [e["pattern"] for e in ranked_hooks]}
+    for field in LIST_FIELDS:
+        merged[field] = [item for item, _ in sorted(lists[field].values(), key=lambda e: -e[1])[:top_k]]
+
+    # The summary of the heaviest shard describes the best-performing videos
+    heaviest = max(range(len(partials)), key=lambda i: weights[i])
+    merged["summary"] = partials[heaviest].get("summary", "")
+    return merged
+
+
+def _shard_weight(shard: List[Any]) -> float:
+    return float(sum(getattr(v, "views", 0) or 0 for v in shard)) or 1.0
+
+
+def _reduce(
+    outcomes: List[Tuple[int, int, float, Any]],
+    videos: int,
+    max_parallel: int,
+    token_budget: int,
+    top_k: int,
+    started: float
+) -> Dict[str, Any]:
+    """Merge ``(shard index, shard size, weight, result or exception)`` outcomes"""
+    partials, weights, failed = [], [], []
+    for index, size, weight, outcome in sorted(outcomes, key=lambda o: o[0]):
+        if isinstance(outcome, BaseException):
+            logger.error(f"Analysis shard {index} failed: {str(outcome)}")
+            failed.append({"shard": index, "videos": size, "error": str(outcome)})
+            continue
+        partials.append(outcome)
+        weights.append(weight)
+
+    if not partials:
+        raise RuntimeError(f"All {len(outcomes)} analysis shards failed: {failed[0]['error'] if failed else 'no videos'}")
+
+    result = merge_analyses(partials, weights, top_k)
+    result["chunking"] = {
+        "videos": videos,
+        "shards": len(outcomes),
+        "max_parallel": max_parallel,
+        "token_budget": token_budget,
+        "failed_shards": failed,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)
+    }
+    return result
+
+
+async def chunked_analyze(
+    videos: Sequence[Any],
+    analyze_shard: Callable[[List[Any]], Awaitable[Dict[str, Any]]],
+    token_budget: Optional[int] = None,
+    max_videos: Optional[int] = None,
+    max_parallel: Optional[int] = None,
+    top_k: int = 10
+) -> Dict[str, Any]:
+    """
+    Analyze ``videos`` shard by shard with at most ``max_parallel`` in flight.
+
+    ``analyze_shard`` receives one shard's videos and returns a regular
+    analysis dict. Failed shards are reported under ``chunking`` and left out
+    of the merge; the call only fails if every shard does.
+    """
+    token_budget = token_budget or int(os.environ.get("ANALYSIS_SHARD_TOKENS", 6000))
+    max_videos = max_videos or int(os.environ.get("ANALYSIS_SHARD_MAX_VIDEOS", 150))
+    max_parallel = max_parallel or int(os.environ.get("ANALYSIS_MAX_PARALLEL", 4))
+
+    if not videos:
+        raise ValueError("No videos to analyze")
+    started = time.perf_counter()
+    shards = make_shards(videos, token_budget, max_videos)
+    semaphore = asyncio.Semaphore(max_parallel)
+
+    async def run(shard: List[Any]) -> Dict[str, Any]:
+        async with semaphore:
+            return await analyze_shard(shard)
+
+    results = await asyncio.gather(*[run(shard) for shard in shards], return_exceptions=True)
+    outcomes = [(index, len(shard), _shard_weight(shard), result) for index, (shard, result) in enumerate(zip(shards, results))]
+    return _reduce(outcomes, len(videos), max_parallel, token_budget, top_k, started)
+
+
+async def chunked_analyze_stream(
+    batches: Iterable[List[Any]],
+    analyze_shard: Callable[[List[Any]], Awaitable[Dict[str, Any]]],
+    token_budget: Optional[int] = None,
+    max_videos: Optional[int] = None,
+    max_parallel: Optional[int] = None,
+    top_k: int = 10
+) -> Dict[str, Any]:
+    """
+    chunked_analyze for inputs too large to hold in memory.
+
+    ``batches`` is consumed lazily (in a worker thread, so a blocking file
+    reader doesn't stall running shards) and only while a shard slot is free.
+    Videos are ranked and packed within each batch; the last, partly filled
+    shard of a batch is topped up from the next one. Only shard results are
+    kept, so memory stays bounded by the batch size and ``max_parallel``.
+    """
+    token_budget = token_budget or int(os.environ.get("ANALYSIS_SHARD_TOKENS", 6000))
+    max_videos = max_videos or int(os.environ.get("ANALYSIS_SHARD_MAX_VIDEOS", 150))
+    max_parallel = max_parallel or int(os.environ.get("ANALYSIS_MAX_PARALLEL", 4))
+
+    started = time.perf_counter()
+    semaphore = asyncio.Semaphore(max_parallel)
+    outcomes: List[Tuple[int, int, float, Any]] = []
+    tasks: List[asyncio.Task] = []
+    videos = 0
+
+    async def run(index: int, shard: List[Any]):
+        try:
+            result = await analyze_shard(shard)
+        except Exception as e:
+            result = e
+        finally:
+            semaphore.release()
+        outcomes.append((index, len(shard), _shard_weight(shard), result))
+
+    async def submit(shard: List[Any]):
+        await semaphore.acquire()
+        tasks.append(asyncio.create_task(run(len(tasks), shard)))
+
+    iterator = iter(batches)
+    carry: List[Any] = []
+    try:
+        while True:
+            batch = await asyncio.to_thread(next, iterator, None)
+            if batch is None:
+                break
+            if not batch:
+                continue
+            videos += len(batch)
+            shards = make_shards(carry + batch, token_budget, max_videos)
+            carry = shards.pop()
+            for shard in shards:
+                await submit(shard)
+        if carry:
+            await submit(carry)
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+    if not videos:
+        raise ValueError("No videos to analyze")
+    return _reduce(outcomes, videos, max_parallel, token_budget, top_k, started)
@@ -1,14 +1,34 @@
-from fastapi import FastAPI, HTTPException, Body
-from pydantic import BaseModel, Field
-from typing import List, Dict, Any, Optional
+from fastapi import FastAPI, HTTPException, Body, Query, Request, Depends
+from fastapi.responses import StreamingResponse, JSONResponse, Response
+from pydantic import Field
+from typing import List, Dict, Any, Optional, Tuple, Callable, Awaitable
 import uvicorn
 import json
 import asyncio
+import os
+import time
+from datetime import datetime, timedelta
 
 # Import our agents
 from agents.content_strategy_agent import ContentStrategyAgent, VideoData, ContentAnalysisRequest
 from agents.content_scriptwriter_agent import ContentScriptwriterAgent, ScriptRequest
 from agents.visual_content_planner_agent import VisualContentPlannerAgent, VisualPlanRequest
+from agent_executor import agent_executor
+from result_cache import result_cache, request_key
+from streaming import Emit, event_stream, MEDIA_TYPES, STREAM_HEADERS
+from memory import get_content_memory
+from niche_engine import filter_and_aggregate, insight_values
+from hook_classifier import classify, narrow
+from near_duplicates import collapse_near_duplicates, DEFAULT_THRESHOLD as DEDUP_THRESHOLD
+from incremental_analysis import incremental_analyze
+from chunked_analysis import chunked_analyze, chunk_threshold
+from llm_client import llm_client, attach_llm_client
+from agent_registry import AgentRegistry
+from metrics import MetricsMiddleware, stage_timer, render as render_metrics
+from responses import FastJSONResponse, CompressionMiddleware, json_response
+from admission import admission, client_id, AdmissionRejected
+from job_queue import JobQueue, Progress, WebhookURLError
+from contextlib import asynccontextmanager
 
 # Enhanced VideoData model with niche-specific fields
 class EnhancedVideoData(VideoData):
@@ -27,27 +47,225 @@ class EnhancedContentAnalysisRequest(ContentAnalysisRequest):
     target_niche: Optional[str] = None
     target_problem: Optional[str] = None
     target_audience: Optional[str] = None
+    target_match: str = Field("substring", pattern="^(substring|token|prefix)$")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled OpenRouter client per worker, shared by all agents
+    await llm_client.start()
+    # SQLite-backed stores are opened here, in the worker, so nothing opened
+    # at import is inherited by workers forked with gunicorn --preload
+    await asyncio.to_thread(result_cache.open)
+    await asyncio.to_thread(admission.store.open)
+    warmup = None
+    if os.environ.get("AGENT_WARMUP", "true").lower() == "true":
+        warmup = asyncio.create_task(agents.warm_up())
+    job_queue.start()
+    yield
+    if warmup is not None:
+        warmup.cancel()
+    await job_queue.stop()
+    await llm_client.aclose()
 
 app = FastAPI(
     title="TitanFlow Content Strategy AI",
     description="API for creating viral short-form video content from analysis to visual production plans",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
+)
+# Large JSON results are compressed; streamed events are sent as they are
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=int(os.environ.get("RESPONSE_COMPRESSION_MIN_SIZE", 1024)),
+    gzip_level=int(os.environ.get("RESPONSE_GZIP_LEVEL", 6)),
+    brotli_quality=int(os.environ.get("RESPONSE_BROTLI_QUALITY", 4))
 )
+app.add_middleware(MetricsMiddleware)
 # In content_strategy_api.py
 if __name__ == "__main__":
     uvicorn.run("content_strategy_api:app", host="0.0.0.0", port=8000, reload=True)
-# Initialize our agents
-content_agent = ContentStrategyAgent()
-scriptwriter_agent = ContentScriptwriterAgent()
-visual_planner_agent = VisualContentPlannerAgent()
+# Agents are built on first use or by the warm-up task, sharing the LLM client
+agents = AgentRegistry()
+agents.register("strategy", ContentStrategyAgent, attach_llm_client)
+agents.register("scriptwriter", ContentScriptwriterAgent, attach_llm_client)
+agents.register("visual_planner", VisualContentPlannerAgent, attach_llm_client)
+
+def _cache_version(agent: Any) -> str:
+    """Model and prompt version that cached results of an agent depend on"""
+    return ":".join(str(part) for part in (
+        os.environ.get("RESULT_CACHE_VERSION", "1"),
+        getattr(agent, "model", ""),
+        getattr(agent, "prompt_version", "")
+    ))
+
+async def _cached_shard_analysis(request: ContentAnalysisRequest) -> Dict[str, Any]:
+    """Run the strategy agent on one batch through the result cache"""
+    content_agent = await agents.aget("strategy")
+    key = request_key("analyze", request, _cache_version(content_agent))
+    return await result_cache.get_or_compute(
+        key, lambda: agent_executor.run("strategy", content_agent, "process_request", request)
+    )
+
+def _prepass_per_label() -> int:
+    """Videos per recognized hook type or format the LLM pre-pass keeps; 0 disables it"""
+    return int(os.environ.get("ANALYSIS_PREPASS_PER_LABEL", 0))
+
+async def _cached_analysis(request: ContentAnalysisRequest) -> Dict[str, Any]:
+    """
+    Analyze a batch, splitting batches over ANALYSIS_CHUNK_THRESHOLD into shards.
+
+    ``analysis_type="fast"`` skips the LLM and returns the rule-based
+    classification. Otherwise, with ANALYSIS_PREPASS_PER_LABEL set, the rules
+    first narrow the batch to a few examples per recognized hook and format
+    plus every video they cannot explain, and only those reach the agent.
+    """
+    if request.analysis_type == "fast":
+        return await asyncio.to_thread(classify, request.videos)
+    prepass = None
+    per_label = _prepass_per_label()
+    if per_label:
+        videos, prepass = await asyncio.to_thread(narrow, request.videos, per_label)
+        request = ContentAnalysisRequest(videos=videos, analysis_type=request.analysis_type)
+    if len(request.videos) <= chunk_threshold():
+        result = await _cached_shard_analysis(request)
+    else:
+        result = await chunked_analyze(
+            request.videos,
+            lambda shard: _cached_shard_analysis(ContentAnalysisRequest(videos=shard, analysis_type=request.analysis_type))
+        )
+    # Copy rather than annotate the cached result in place
+    return {**result, "prepass": prepass} if prepass else result
+
+def _plain_videos(videos: List[VideoData]) -> List[VideoData]:
+    """The videos without niche fields, as the standard analysis sees them"""
+    return [VideoData(
+        title=v.title,
+        description=v.description,
+        views=v.views,
+        publishedAt=v.publishedAt,
+        channel=v.channel
+    ) for v in videos]
+
+async def _incremental_analysis(videos: List[VideoData], analysis_type: str, platform: Optional[str]) -> Dict[str, Any]:
+    """
+    Analyze only the videos content memory holds no current features for.
+
+    Niche fields of enhanced videos (niche, emotional triggers, ...) are
+    stored with their features but not sent to the agent.
+    """
+    version = f"{_cache_version(await agents.aget('strategy'))}:{analysis_type}"
+    return await incremental_analyze(
+        videos,
+        lambda fresh: _cached_analysis(ContentAnalysisRequest(videos=_plain_videos(fresh), analysis_type=analysis_type)),
+        get_content_memory(),
+        version,
+        platform
+    )
+
+def _admitted(kind: str):
+    """
+    Dependency charging the caller's token bucket by the estimated cost of the
+    request and holding an execution slot until the response is finished.
+    """
+    async def dependency(request: Request):
+        if os.environ.get("ADMISSION_ENABLED", "true").lower() != "true":
+            yield
+            return
+        try:
+            body = await request.json()
+        except Exception:
+            body = None
+        client = client_id(
+            request.headers.get("x-api-key"),
+            request.headers.get("x-forwarded-for"),
+            request.client.host if request.client else None,
+            admission.trusted_proxies,
+            admission.api_keys
+        )
+        try:
+            await admission.admit(client, admission.estimate_cost(kind, body))
+        except AdmissionRejected as e:
+            raise HTTPException(status_code=e.status_code, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+        try:
+            yield
+        finally:
+            admission.release()
+    return Depends(dependency)
+
+def _dedup_param():
+    """``?dedup=true`` collapsing near-duplicate videos before analysis"""
+    return Query(False, description="Collapse near-duplicate videos (reuploads, near-identical titles) before analysis")
+
+def _dedup_threshold_param():
+    return Query(DEDUP_THRESHOLD, gt=0, le=1, description="Estimated Jaccard similarity at which two videos count as duplicates")
+
+async def _collapsed(request: Any, dedup: bool, threshold: float) -> Tuple[Any, Optional[Dict[str, Any]]]:
+    """The request with one video per near-duplicate cluster, and the cluster report"""
+    if not dedup:
+        return request, None
+    videos, report = await asyncio.to_thread(collapse_near_duplicates, request.videos, threshold)
+    return request.model_copy(update={"videos": videos}), report
+
+def _fields_param():
+    """``?fields=`` selector trimming a response to the listed dotted paths"""
+    return Query(None, description="Comma-separated dotted paths to return, e.g. visual_plan.scenes or variants.script.title")
 
 @app.get("/")
 async def root():
     return {"message": "Welcome to TitanFlow Content Strategy AI", 
-            "endpoints": ["/analyze", "/generate-script", "/create-visual-plan", "/full-pipeline", "/niche-analysis"]}
+            "endpoints": ["/analyze", "/generate-script", "/generate-script/batch", "/create-visual-plan", "/create-visual-plan/batch", "/full-pipeline", "/full-pipeline/stream", "/jobs", "/niche-analysis", "/search", "/trends", "/metrics"]}
 
-@app.post("/analyze", response_model=Dict[str, Any])
-async def analyze_videos(request: ContentAnalysisRequest = Body(...)):
+@app.get("/health")
+async def health_check():
+    """
+    Liveness check with agent executor queue depth and wait times, cache and
+    LLM client (retries, circuit state), admission control and job queue
+    statistics.
+    """
+    # Both read SQLite; in threads so /health never waits behind a busy writer
+    admission_stats, job_queue_stats = await asyncio.gather(
+        asyncio.to_thread(admission.stats),
+        asyncio.to_thread(job_queue.stats)
+    )
+    return {
+        "status": "healthy",
+        "timestamp": datetime.utcnow().isoformat(),
+        "agent_executor": agent_executor.stats(),
+        "result_cache": result_cache.stats(),
+        "llm_client": llm_client.stats(),
+        "admission": admission_stats,
+        "job_queue": job_queue_stats,
+        "agents": agents.stats()["agents"]
+    }
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics, aggregated over all workers in multiprocess mode"""
+    body, content_type, status_code = render_metrics()
+    return Response(body, media_type=content_type, status_code=status_code)
+
+@app.get("/ready")
+async def readiness_check():
+    """
+    Readiness check: 503 until all three agents have been built. Liveness
+    stays on /health, which never waits for agents.
+    """
+    stats = agents.stats()
+    return JSONResponse(
+        {"status": "ready" if stats["ready"] else "not ready", "timestamp": datetime.utcnow().isoformat(), **stats},
+        status_code=200 if stats["ready"] else 503
+    )
+
+@app.post("/analyze", dependencies=[_admitted("analyze")])
+async def analyze_videos(
+    request: ContentAnalysisRequest = Body(...),
+    dedup: bool = _dedup_param(),
+    dedup_threshold: float = _dedup_threshold_param(),
+    incremental: bool = Query(False, description="Only send videos not yet analyzed (or changed since) to the LLM"),
+    platform: Optional[str] = Query(None, description="Platform stored with the videos' features in incremental mode; without it they are left out of /trends"),
+    fields: Optional[str] = _fields_param()
+):
     """
     Analyze a list of viral videos and extract structured insights.
     
@@ -57,67 +275,125 @@ async def analyze_videos(request: ContentAnalysisRequest = Body(...)):
     - Engagement tactics
     - Content themes
     - Overall summary
+    
+    ``analysis_type="fast"`` answers in milliseconds from rule-based hook,
+    format and engagement classifiers weighted by views, without an LLM call;
+    ``content_themes`` is then empty.
+    
+    Batches larger than ANALYSIS_CHUNK_THRESHOLD videos are split into
+    token-budgeted shards analyzed concurrently and merged; the response then
+    carries a ``chunking`` section with shard counts and failures.
+    
+    With ``?dedup=true`` near-duplicate videos are collapsed first into their
+    most viewed member carrying the summed views; the ``dedup`` section
+    reports cluster counts and the largest clusters.
+    
+    With ``?incremental=true`` per-video features are stored in content
+    memory, keyed by video id (or a hash of channel, title and publish date).
+    Videos already analyzed with unchanged title and description are not
+    sent to the LLM again, only their stored views are updated; their stored
+    batch analyses are merged with the fresh one, weighted by today's views.
+    The ``incremental`` section counts known, new and changed videos.
     """
     try:
-        result = await content_agent.process_request(request)
-        return result
+        request, dedup_report = await _collapsed(request, dedup, dedup_threshold)
+        if incremental and request.analysis_type != "fast":
+            result = await _incremental_analysis(request.videos, request.analysis_type, platform)
+        else:
+            result = await _cached_analysis(request)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+    if dedup_report:
+        result = {**result, "dedup": dedup_report}
+    return json_response(result, fields)
 
-@app.post("/niche-analysis", response_model=Dict[str, Any])
-async def analyze_niche_videos(request: EnhancedContentAnalysisRequest = Body(...)):
+@app.post("/niche-analysis", dependencies=[_admitted("niche-analysis")])
+async def analyze_niche_videos(
+    request: EnhancedContentAnalysisRequest = Body(...),
+    dedup: bool = _dedup_param(),
+    dedup_threshold: float = _dedup_threshold_param(),
+    incremental: bool = Query(False, description="Only send videos not yet analyzed (or changed since) to the LLM"),
+    platform: Optional[str] = Query(None, description="Platform stored with the videos' features in incremental mode; without it they are left out of /trends"),
+    fields: Optional[str] = _fields_param()
+):
     """
     Analyze videos with enhanced niche-specific data.
     
     This endpoint accepts additional fields like problem, audience, solution, etc.
     and can filter analysis based on target niche, problem, or audience.
+    ``?dedup=true`` collapses near-duplicates before filtering, as on /analyze.
+    ``?incremental=true`` works as on /analyze and stores the niche fields
+    with each video, so their niches and emotional triggers reach /trends.
     """
     try:
-        # Filter videos by target parameters if provided
-        filtered_videos = request.videos
-        
-        if request.target_niche:
-            filtered_videos = [v for v in filtered_videos if v.niche and request.target_niche.lower() in v.niche.lower()]
-        
-        if request.target_problem:
-            filtered_videos = [v for v in filtered_videos if v.problem and request.target_problem.lower() in v.problem.lower()]
-            
-        if request.target_audience:
-            filtered_videos = [v for v in filtered_videos if v.audience and request.target_audience.lower() in v.audience.lower()]
-        
-        # Create standard request with filtered videos
-        standard_request = ContentAnalysisRequest(
-            videos=[VideoData(
-                title=v.title,
-                description=v.description,
-                views=v.views,
-                publishedAt=v.publishedAt,
-                channel=v.channel
-            ) for v in filtered_videos],
-            analysis_type=request.analysis_type
-        )
-        
-        # Process with standard agent
-        result = await content_agent.process_request(standard_request)
-        
-        # Add niche-specific insights
-        result["niche_insights"] = {
-            "problems": list(set([v.problem for v in filtered_videos if v.problem])),
-            "audiences": list(set([v.audience for v in filtered_videos if v.audience])),
-            "solutions": list(set([v.solution for v in filtered_videos if v.solution])),
-            "emotional_triggers": list(set([v.emotional_triggers for v in filtered_videos if v.emotional_triggers])),
-            "niches": list(set([v.niche for v in filtered_videos if v.niche])),
-            "sub_niches": list(set([v.sub_niche for v in filtered_videos if v.sub_niche])),
-            "pain_points": list(set([v.pain_points for v in filtered_videos if v.pain_points])),
-            "value_propositions": list(set([v.value_proposition for v in filtered_videos if v.value_proposition]))
-        }
-        
-        return result
+        request, dedup_report = await _collapsed(request, dedup, dedup_threshold)
+        if incremental and request.analysis_type != "fast":
+            result = await _run_niche_analysis(request, incremental=True, platform=platform)
+        else:
+            result = await _cached_niche_analysis(request)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Niche analysis failed: {str(e)}")
+    if dedup_report:
+        result = {**result, "dedup": dedup_report}
+    return json_response(result, fields)
+
+async def _cached_niche_analysis(request: EnhancedContentAnalysisRequest) -> Dict[str, Any]:
+    """Run the niche analysis through the result cache"""
+    key = request_key("niche-analysis", request, _cache_version(await agents.aget("strategy")))
+    return await result_cache.get_or_compute(key, lambda: _run_niche_analysis(request))
+
+async def _run_niche_analysis(
+    request: EnhancedContentAnalysisRequest,
+    incremental: bool = False,
+    platform: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Filter videos by the niche targets and analyze the remainder, with
+    ``incremental`` storing the videos in content memory.
+    """
+    # Filter videos and aggregate niche insights in a single pass
+    filtered_videos, niche_insights = await asyncio.to_thread(
+        filter_and_aggregate,
+        request.videos,
+        target_niche=request.target_niche,
+        target_problem=request.target_problem,
+        target_audience=request.target_audience,
+        match_mode=request.target_match
+    )
+    
+    if incremental:
+        result = await _incremental_analysis(filtered_videos, request.analysis_type, platform)
+    else:
+        # Process the filtered videos with the standard agent
+        result = await _cached_analysis(
+            ContentAnalysisRequest(videos=_plain_videos(filtered_videos), analysis_type=request.analysis_type)
+        )
+    
+    # Add niche-specific insights, ranked by total views
+    result["niche_insights"] = niche_insights
+    
+    return result
+
+async def _run_script(request: ScriptRequest) -> Dict[str, Any]:
+    result = await agent_executor.run("scriptwriter", await agents.aget("scriptwriter"), "generate_script", request)
+    return result.dict()
 
-@app.post("/generate-script", response_model=Dict[str, Any])
-async def generate_script(request: ScriptRequest = Body(...)):
+async def _run_visual_plan(request: VisualPlanRequest) -> Dict[str, Any]:
+    result = await agent_executor.run("visual_planner", await agents.aget("visual_planner"), "create_visual_plan", request)
+    return result.dict()
+
+async def _cached_script(request: ScriptRequest) -> Dict[str, Any]:
+    """Run the scriptwriter agent through the result cache"""
+    key = request_key("generate-script", request, _cache_version(await agents.aget("scriptwriter")))
+    return await result_cache.get_or_compute(key, lambda: _run_script(request))
+
+async def _cached_visual_plan(request: VisualPlanRequest) -> Dict[str, Any]:
+    """Run the visual planner agent through the result cache"""
+    key = request_key("create-visual-plan", request, _cache_version(await agents.aget("visual_planner")))
+    return await result_cache.get_or_compute(key, lambda: _run_visual_plan(request))
+
+@app.post("/generate-script", dependencies=[_admitted("generate-script")])
+async def generate_script(request: ScriptRequest = Body(...), fields: Optional[str] = _fields_param()):
     """
     Generate an optimized short-form video script based on content analysis data.
     
@@ -128,13 +404,13 @@ async def generate_script(request: ScriptRequest = Body(...)):
     - Metadata (estimated duration, hook type, theme)
     """
     try:
-        result = scriptwriter_agent.generate_script(request)
-        return result.dict()
+        result = await _cached_script(request)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Script generation failed: {str(e)}")
+    return json_response(result, fields)
 
-@app.post("/create-visual-plan", response_model=Dict[str, Any])
-async def create_visual_plan(request: VisualPlanRequest = Body(...)):
+@app.post("/create-visual-plan", dependencies=[_admitted("create-visual-plan")])
+async def create_visual_plan(request: VisualPlanRequest = Body(...), fields: Optional[str] = _fields_param()):
     """
     Create a detailed visual production plan from a short-form video script.
     
@@ -147,13 +423,258 @@ async def create_visual_plan(request: VisualPlanRequest = Body(...)):
     - Platform-specific editing tips
     """
     try:
-        result = visual_planner_agent.create_visual_plan(request)
-        return result.dict()
+        result = await _cached_visual_plan(request)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Visual plan creation failed: {str(e)}")
+    return json_response(result, fields)
+
+def _batch_response(
+    items: List[Any],
+    run: Callable[[Any], Awaitable[Dict[str, Any]]],
+    max_parallel: Optional[int],
+    timeout: Optional[float]
+) -> StreamingResponse:
+    """
+    Run ``run`` over ``items`` concurrently and stream NDJSON as items finish.
+
+    Emits one ``item`` event per request (``index``, ``result``, ``error``,
+    ``elapsed_ms``) and a closing ``done`` summary. Items still running when
+    the batch timeout expires are cancelled and reported as errors.
+    """
+    parallel_cap = int(os.environ.get("BATCH_MAX_PARALLEL", 8))
+    timeout_cap = float(os.environ.get("BATCH_TIMEOUT", 600))
+    parallelism = max(1, min(max_parallel or parallel_cap, parallel_cap))
+    deadline = min(timeout or timeout_cap, timeout_cap)
+    
+    async def produce(emit: Emit):
+        started = time.perf_counter()
+        semaphore = asyncio.Semaphore(parallelism)
+        
+        async def one(index: int, item: Any) -> bool:
+            async with semaphore:
+                item_started = time.perf_counter()
+                result, error = None, None
+                try:
+                    result = await run(item)
+                except Exception as e:
+                    error = str(e)
+                await emit("item", {
+                    "index": index,
+                    "result": result,
+                    "error": error,
+                    "elapsed_ms": round((time.perf_counter() - item_started) * 1000, 1)
+                })
+                return error is None
+        
+        tasks = {asyncio.create_task(one(index, item)): index for index, item in enumerate(items)}
+        done, pending = await asyncio.wait(tasks, timeout=deadline)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        for task in sorted(pending, key=tasks.get):
+            await emit("item", {"index": tasks[task], "result": None, "error": f"Batch timeout of {deadline:g}s exceeded", "elapsed_ms": None})
+        
+        succeeded = sum(1 for task in done if task.result())
+        await emit("done", {
+            "items": len(items),
+            "succeeded": succeeded,
+            "failed": len(items) - succeeded,
+            "timed_out": len(pending),
+            "max_parallel": parallelism,
+            "total_ms": round((time.perf_counter() - started) * 1000, 1)
+        })
+    
+    return StreamingResponse(
+        event_stream(produce, "ndjson", float(os.environ.get("STREAM_HEARTBEAT_INTERVAL", 15))),
+        media_type=MEDIA_TYPES["ndjson"],
+        headers=STREAM_HEADERS
+    )
+
+def _check_batch_size(items: List[Any]):
+    limit = int(os.environ.get("BATCH_MAX_ITEMS", 500))
+    if not items:
+        raise HTTPException(status_code=422, detail="Batch is empty")
+    if len(items) > limit:
+        raise HTTPException(status_code=413, detail=f"Batch of {len(items)} items exceeds the limit of {limit}")
+
+@app.post("/generate-script/batch", dependencies=[_admitted("generate-script")])
+async def generate_script_batch(
+    requests: List[ScriptRequest] = Body(...),
+    max_parallel: Optional[int] = Query(None, ge=1),
+    timeout: Optional[float] = Query(None, gt=0)
+):
+    """
+    Generate scripts for an array of script requests.
+    
+    Requests run concurrently (at most ``max_parallel``, capped by
+    BATCH_MAX_PARALLEL) and results stream back as NDJSON in completion order,
+    each tagged with its ``index`` in the array. The whole batch is bounded by
+    ``timeout`` seconds (capped by BATCH_TIMEOUT).
+    """
+    _check_batch_size(requests)
+    return _batch_response(requests, _cached_script, max_parallel, timeout)
+
+@app.post("/create-visual-plan/batch", dependencies=[_admitted("create-visual-plan")])
+async def create_visual_plan_batch(
+    requests: List[VisualPlanRequest] = Body(...),
+    max_parallel: Optional[int] = Query(None, ge=1),
+    timeout: Optional[float] = Query(None, gt=0)
+):
+    """
+    Create visual plans for an array of visual plan requests, streamed back as
+    NDJSON like /generate-script/batch.
+    """
+    _check_batch_size(requests)
+    return _batch_response(requests, _cached_visual_plan, max_parallel, timeout)
+
+async def _pipeline_analysis(videos: List[Dict[str, Any]], target_niche: Optional[str] = None, target_problem: Optional[str] = None) -> Dict[str, Any]:
+    """Pipeline stage 1: analyze the raw video dicts"""
+    with stage_timer("analysis"):
+        return await _pipeline_analysis_stage(videos, target_niche, target_problem)
+
+async def _pipeline_analysis_stage(videos: List[Dict[str, Any]], target_niche: Optional[str], target_problem: Optional[str]) -> Dict[str, Any]:
+    video_data = []
+    for video in videos:
+        # Create VideoData or EnhancedVideoData based on available fields
+        if any(key in video for key in ["problem", "audience", "solution", "niche"]):
+            video_data.append(EnhancedVideoData(**video))
+        else:
+            video_data.append(VideoData(**video))
+    
+    # Use niche-specific analysis if enhanced data is available
+    if any(isinstance(v, EnhancedVideoData) for v in video_data):
+        analysis_request = EnhancedContentAnalysisRequest(
+            videos=video_data, 
+            analysis_type="full",
+            target_niche=target_niche,
+            target_problem=target_problem
+        )
+        return await _cached_niche_analysis(analysis_request)
+    
+    analysis_request = ContentAnalysisRequest(videos=video_data, analysis_type="full")
+    return await _cached_analysis(analysis_request)
+
+def _pipeline_script_request(analysis_result: Dict[str, Any], platform: str, hook_variant: Optional[str] = None) -> ScriptRequest:
+    """Build the script request for one platform / hook variant"""
+    hook_patterns = analysis_result.get("hook_patterns", [])
+    if hook_variant:
+        # Steer the script towards one hook type, falling back to the bare type name
+        matching = [p for p in hook_patterns if isinstance(p, dict) and str(p.get("type", "")).lower() == hook_variant.lower()]
+        hook_patterns = matching or [{"type": hook_variant, "example": ""}]
+    
+    script_request = ScriptRequest(
+        hook_patterns=hook_patterns,
+        format_trends=analysis_result.get("format_trends", []),
+        engagement_tactics=analysis_result.get("engagement_tactics", []),
+        content_themes=analysis_result.get("content_themes", []),
+        summary=analysis_result.get("summary", ""),
+        platform=platform
+    )
+    
+    # Add niche insights if available, as the plain value lists the scriptwriter takes
+    if "niche_insights" in analysis_result:
+        script_request.niche_insights = insight_values(analysis_result["niche_insights"])
+    
+    return script_request
+
+def _pipeline_visual_request(script_result: Dict[str, Any], platform: str) -> VisualPlanRequest:
+    """Build the visual plan request from a generated script"""
+    return VisualPlanRequest(
+        script=script_result["script"],
+        hook=script_result.get("title"),
+        cta=script_result.get("cta"),
+        niche=script_result.get("theme"),
+        tone="engaging and informative",
+        platform=platform
+    )
+
+async def _streamed_script(request: ScriptRequest, on_token: Optional[Callable[[str], Awaitable[None]]] = None) -> Dict[str, Any]:
+    """
+    Generate a script, forwarding LLM tokens to ``on_token`` when possible.
+
+    Token streaming needs a scriptwriter exposing ``astream_script``, an async
+    iterator yielding text chunks followed by the final script. Otherwise the
+    whole script is produced in one go. Either way the call holds one of the
+    scriptwriter's agent executor slots.
+    """
+    scriptwriter_agent = await agents.aget("scriptwriter")
+    stream = getattr(scriptwriter_agent, "astream_script", None)
+    if stream is None or on_token is None:
+        return await _cached_script(request)
+    
+    async def compute() -> Dict[str, Any]:
+        result = None
+        async for chunk in stream(request):
+            if isinstance(chunk, str):
+                await on_token(chunk)
+            else:
+                result = chunk
+        return result.dict() if hasattr(result, "dict") else result
+    
+    key = request_key("generate-script", request, _cache_version(scriptwriter_agent))
+    return await result_cache.get_or_compute(key, lambda: agent_executor.run_coroutine("scriptwriter", compute))
+
+async def _pipeline_variant(analysis_result: Dict[str, Any], platform: str, hook_variant: Optional[str] = None, emit: Optional[Emit] = None) -> Dict[str, Any]:
+    """Pipeline stages 2 and 3 for a single variant, with timings and errors captured"""
+    variant = {"platform": platform, "hook_variant": hook_variant, "script": None, "visual_plan": None, "error": None, "timings": {}}
+    label = {"platform": platform, "hook_variant": hook_variant}
+    started = time.perf_counter()
+    try:
+        on_token = None
+        if emit is not None:
+            async def on_token(token: str):
+                await emit("script_token", {**label, "token": token})
+        
+        stage_started = time.perf_counter()
+        with stage_timer("script"):
+            variant["script"] = await _streamed_script(_pipeline_script_request(analysis_result, platform, hook_variant), on_token)
+        variant["timings"]["script_ms"] = round((time.perf_counter() - stage_started) * 1000, 1)
+        if emit is not None:
+            await emit("script", {**label, "script": variant["script"], "timings": dict(variant["timings"])})
+        
+        stage_started = time.perf_counter()
+        with stage_timer("visual_plan"):
+            variant["visual_plan"] = await _cached_visual_plan(_pipeline_visual_request(variant["script"], platform))
+        variant["timings"]["visual_plan_ms"] = round((time.perf_counter() - stage_started) * 1000, 1)
+        if emit is not None:
+            await emit("visual_plan", {**label, "visual_plan": variant["visual_plan"], "timings": dict(variant["timings"])})
+    except Exception as e:
+        variant["error"] = str(e)
+    variant["timings"]["total_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    if emit is not None:
+        await emit("variant", {**label, "error": variant["error"], "timings": variant["timings"]})
+    return variant
 
-@app.post("/full-pipeline", response_model=Dict[str, Any])
-async def full_pipeline(videos: List[Dict[str, Any]] = Body(...), platform: str = Body("TikTok"), target_niche: Optional[str] = Body(None), target_problem: Optional[str] = Body(None)):
+def _pipeline_variants(platform: str, platforms: Optional[List[str]], hook_variants: Optional[List[str]]) -> List[Tuple[str, Optional[str]]]:
+    """Every (platform, hook variant) combination to fan out to"""
+    return [(p, h) for p in (platforms or [platform]) for h in (hook_variants or [None])]
+
+def _pipeline_parallelism(max_parallel: Optional[int]) -> int:
+    """Clamp the requested fan-out parallelism to the server-side cap"""
+    cap = int(os.environ.get("PIPELINE_MAX_PARALLEL", 4))
+    return max(1, min(max_parallel or cap, cap))
+
+async def _fan_out(analysis_result: Dict[str, Any], variants: List[Tuple[str, Optional[str]]], max_parallel: int, emit: Optional[Emit] = None) -> List[Dict[str, Any]]:
+    """Run the script and visual plan stages for all variants concurrently"""
+    semaphore = asyncio.Semaphore(max_parallel)
+    
+    async def run(platform: str, hook_variant: Optional[str]) -> Dict[str, Any]:
+        async with semaphore:
+            return await _pipeline_variant(analysis_result, platform, hook_variant, emit)
+    
+    return await asyncio.gather(*[run(p, h) for p, h in variants])
+
+@app.post("/full-pipeline", dependencies=[_admitted("full-pipeline")])
+async def full_pipeline(
+    videos: List[Dict[str, Any]] = Body(...),
+    platform: str = Body("TikTok"),
+    target_niche: Optional[str] = Body(None),
+    target_problem: Optional[str] = Body(None),
+    platforms: Optional[List[str]] = Body(None),
+    hook_variants: Optional[List[str]] = Body(None),
+    max_parallel: Optional[int] = Body(None),
+    fields: Optional[str] = _fields_param()
+):
     """
     Run the complete content creation pipeline:
     1. Analyze viral videos
@@ -161,65 +682,365 @@ async def full_pipeline(videos: List[Dict[str, Any]] = Body(...), platform: str
     3. Create a detailed visual production plan
     
     Returns the results from all three stages.
+    
+    Passing ``platforms`` and/or ``hook_variants`` switches to fan-out mode: the
+    analysis runs once and a script and visual plan are produced concurrently
+    for every platform x hook variant combination (at most ``max_parallel`` at
+    a time). Each variant reports its own timings and error.
     """
     try:
+        started = time.perf_counter()
+        
         # Step 1: Analyze videos
-        video_data = []
-        for video in videos:
-            # Create VideoData or EnhancedVideoData based on available fields
-            if any(key in video for key in ["problem", "audience", "solution", "niche"]):
-                video_data.append(EnhancedVideoData(**video))
-            else:
-                video_data.append(VideoData(**video))
+        analysis_result = await _pipeline_analysis(videos, target_niche, target_problem)
+        analysis_ms = round((time.perf_counter() - started) * 1000, 1)
         
-        # Use niche-specific analysis if enhanced data is available
-        if any(isinstance(v, EnhancedVideoData) for v in video_data):
-            analysis_request = EnhancedContentAnalysisRequest(
-                videos=video_data, 
-                analysis_type="full",
-                target_niche=target_niche,
-                target_problem=target_problem
+        # Steps 2 and 3 for every requested variant
+        if platforms or hook_variants:
+            variants = await _fan_out(
+                analysis_result,
+                _pipeline_variants(platform, platforms, hook_variants),
+                _pipeline_parallelism(max_parallel)
             )
-            analysis_result = await analyze_niche_videos(analysis_request)
-        else:
-            analysis_request = ContentAnalysisRequest(videos=video_data, analysis_type="full")
-            analysis_result = await content_agent.process_request(analysis_request)
+            return json_response({
+                "analysis": analysis_result,
+                "variants": variants,
+                "timings": {
+                    "analysis_ms": analysis_ms,
+                    "total_ms": round((time.perf_counter() - started) * 1000, 1)
+                }
+            }, fields)
         
         # Step 2: Generate script
-        script_request = ScriptRequest(
-            hook_patterns=analysis_result.get("hook_patterns", []),
-            format_trends=analysis_result.get("format_trends", []),
-            engagement_tactics=analysis_result.get("engagement_tactics", []),
-            content_themes=analysis_result.get("content_themes", []),
-            summary=analysis_result.get("summary", ""),
-            platform=platform
-        )
-        
-        # Add niche insights if available
-        if "niche_insights" in analysis_result:
-            script_request.niche_insights = analysis_result["niche_insights"]
-        
-        script_result = scriptwriter_agent.generate_script(script_request)
+        with stage_timer("script"):
+            script_result = await _cached_script(_pipeline_script_request(analysis_result, platform))
         
         # Step 3: Create visual plan
-        visual_request = VisualPlanRequest(
-            script=script_result.script,
-            hook=script_result.title,
-            cta=script_result.cta,
-            niche=script_result.theme,
-            tone="engaging and informative",
-            platform=platform
-        )
-        visual_result = visual_planner_agent.create_visual_plan(visual_request)
+        with stage_timer("visual_plan"):
+            visual_result = await _cached_visual_plan(_pipeline_visual_request(script_result, platform))
         
         # Return all results
+        return json_response({
+            "analysis": analysis_result,
+            "script": script_result,
+            "visual_plan": visual_result
+        }, fields)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Pipeline execution failed: {str(e)}")
+
+@app.post("/full-pipeline/stream", dependencies=[_admitted("full-pipeline")])
+async def full_pipeline_stream(
+    videos: List[Dict[str, Any]] = Body(...),
+    platform: str = Body("TikTok"),
+    target_niche: Optional[str] = Body(None),
+    target_problem: Optional[str] = Body(None),
+    platforms: Optional[List[str]] = Body(None),
+    hook_variants: Optional[List[str]] = Body(None),
+    max_parallel: Optional[int] = Body(None),
+    stream_format: str = Query("sse", alias="format", pattern="^(sse|ndjson)$")
+):
+    """
+    Streaming variant of /full-pipeline.
+    
+    Takes the same body and emits each stage as soon as it is ready, either as
+    Server-Sent Events (``?format=sse``, default) or NDJSON (``?format=ndjson``):
+    - analysis: the shared analysis result
+    - script_token: script text chunks, when the scriptwriter can stream
+    - script / visual_plan: per-variant stage results
+    - variant: per-variant timings and error
+    - done: overall timings
+    
+    Keep-alive frames are sent while a stage is still running.
+    """
+    variants = _pipeline_variants(platform, platforms, hook_variants)
+    
+    async def produce(emit: Emit):
+        started = time.perf_counter()
+        await emit("started", {"variants": [{"platform": p, "hook_variant": h} for p, h in variants]})
+        
+        analysis_result = await _pipeline_analysis(videos, target_niche, target_problem)
+        analysis_ms = round((time.perf_counter() - started) * 1000, 1)
+        await emit("analysis", {"analysis": analysis_result, "timings": {"analysis_ms": analysis_ms}})
+        
+        results = await _fan_out(analysis_result, variants, _pipeline_parallelism(max_parallel), emit)
+        await emit("done", {
+            "failed_variants": sum(1 for v in results if v["error"]),
+            "timings": {
+                "analysis_ms": analysis_ms,
+                "total_ms": round((time.perf_counter() - started) * 1000, 1)
+            }
+        })
+    
+    return StreamingResponse(
+        event_stream(produce, stream_format, float(os.environ.get("STREAM_HEARTBEAT_INTERVAL", 15))),
+        media_type=MEDIA_TYPES[stream_format],
+        headers=STREAM_HEADERS
+    )
+
+async def _run_pipeline_job(payload: Dict[str, Any], progress: Progress) -> Dict[str, Any]:
+    """
+    Job handler running /full-pipeline for a stored request body.
+
+    Partial results are saved after the analysis and after every script and
+    visual plan, so GET /jobs/{id} shows progress while the job runs.
+    """
+    started = time.perf_counter()
+    platform = payload.get("platform") or "TikTok"
+    platforms, hook_variants = payload.get("platforms"), payload.get("hook_variants")
+    variants = _pipeline_variants(platform, platforms, hook_variants)
+    
+    analysis_result = await _pipeline_analysis(payload["videos"], payload.get("target_niche"), payload.get("target_problem"))
+    analysis_ms = round((time.perf_counter() - started) * 1000, 1)
+    partial: Dict[str, Any] = {"analysis": analysis_result, "variants": {}}
+    await progress(partial)
+    
+    async def emit(event: str, data: Dict[str, Any]):
+        if event not in ("script", "visual_plan", "variant"):
+            return
+        label = f"{data['platform']}/{data['hook_variant'] or 'default'}"
+        entry = partial["variants"].setdefault(label, {"platform": data["platform"], "hook_variant": data["hook_variant"]})
+        entry.update({key: value for key, value in data.items() if key not in ("platform", "hook_variant")})
+        await progress(partial)
+    
+    results = await _fan_out(analysis_result, variants, _pipeline_parallelism(payload.get("max_parallel")), emit)
+    if platforms or hook_variants:
         return {
             "analysis": analysis_result,
-            "script": script_result.dict(),
-            "visual_plan": visual_result.dict()
+            "variants": results,
+            "timings": {
+                "analysis_ms": analysis_ms,
+                "total_ms": round((time.perf_counter() - started) * 1000, 1)
+            }
         }
+    if results[0]["error"]:
+        raise RuntimeError(results[0]["error"])
+    return {"analysis": analysis_result, "script": results[0]["script"], "visual_plan": results[0]["visual_plan"]}
+
+job_queue = JobQueue.from_env({"full-pipeline": _run_pipeline_job})
+
+@app.post("/jobs", status_code=202, dependencies=[_admitted("full-pipeline")])
+async def create_job(
+    videos: List[Dict[str, Any]] = Body(...),
+    platform: str = Body("TikTok"),
+    target_niche: Optional[str] = Body(None),
+    target_problem: Optional[str] = Body(None),
+    platforms: Optional[List[str]] = Body(None),
+    hook_variants: Optional[List[str]] = Body(None),
+    max_parallel: Optional[int] = Body(None),
+    priority: int = Body(0, ge=-10, le=10),
+    webhook_url: Optional[str] = Body(None, pattern="^https?://")
+):
+    """
+    Queue a /full-pipeline run and return its job id immediately.
+    
+    Takes the same body as /full-pipeline plus ``priority`` (higher runs
+    first) and an optional ``webhook_url`` that receives the finished job as
+    a POST. Webhooks must point at a public address, or at a host listed in
+    JOBS_WEBHOOK_ALLOWED_HOSTS when that is set. Poll GET /jobs/{job_id} for status, partial and final results.
+    Jobs are stored in SQLite and survive restarts.
+    """
+    payload = {
+        "videos": videos,
+        "platform": platform,
+        "target_niche": target_niche,
+        "target_problem": target_problem,
+        "platforms": platforms,
+        "hook_variants": hook_variants,
+        "max_parallel": max_parallel
+    }
+    try:
+        job = await job_queue.submit("full-pipeline", payload, priority, webhook_url)
+    except WebhookURLError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Pipeline execution failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to queue job: {str(e)}")
+    return {"job_id": job["job_id"], "status": job["status"], "queue_position": job.get("queue_position"), "status_url": f"/jobs/{job['job_id']}"}
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, fields: Optional[str] = _fields_param()):
+    """
+    Status of a queued job: ``progress`` holds partial results while it runs,
+    ``result`` or ``error`` the outcome once it has finished.
+    """
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return json_response(job, fields)
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """Cancel a job that has not started yet"""
+    if not await job_queue.cancel(job_id):
+        job = await job_queue.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+        raise HTTPException(status_code=409, detail=f"Job {job_id} is {job['status']} and can no longer be cancelled")
+    return {"job_id": job_id, "status": "cancelled"}
+
+def _import_record(line: bytes) -> Tuple[str, str, Dict[str, Any]]:
+    """Parse and validate one NDJSON import line"""
+    record = json.loads(line)
+    if not isinstance(record, dict):
+        raise ValueError("record must be a JSON object")
+    video_id = record.get("video_id")
+    platform = record.get("platform")
+    analysis_data = record.get("analysis_data", record.get("analysis"))
+    if not video_id or not platform:
+        raise ValueError("video_id and platform are required")
+    if not isinstance(analysis_data, dict):
+        raise ValueError("analysis_data must be a JSON object")
+    return str(video_id), str(platform), analysis_data
+
+@app.post("/memory/import")
+async def import_memory(request: Request, batch_size: Optional[int] = Query(None, ge=1, le=10000)):
+    """
+    Bulk import analyzed videos into content memory from an NDJSON upload.
+    
+    Each line is an object with ``video_id``, ``platform`` and ``analysis_data``.
+    The body is parsed as it streams in and written in batches; invalid lines
+    are skipped and reported instead of aborting the import.
+    """
+    memory = get_content_memory()
+    batch_size = batch_size or memory.config.batch_size
+    max_reported_errors = 100
+    imported, failed, line_number = 0, 0, 0
+    errors: List[Dict[str, Any]] = []
+    batch: List[Tuple[str, str, Dict[str, Any]]] = []
+    buffer = b""
+    
+    def parse(line: bytes):
+        nonlocal failed
+        if not line.strip():
+            return
+        try:
+            batch.append(_import_record(line))
+        except Exception as e:
+            failed += 1
+            if len(errors) < max_reported_errors:
+                errors.append({"line": line_number, "error": str(e)})
+    
+    try:
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                line_number += 1
+                parse(line)
+            if len(batch) >= batch_size:
+                imported += await asyncio.to_thread(memory.add_many, batch, batch_size)
+                batch = []
+        if buffer:
+            line_number += 1
+            parse(buffer)
+        if batch:
+            imported += await asyncio.to_thread(memory.add_many, batch, batch_size)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Import failed after {imported} records: {str(e)}")
+    
+    return {"imported": imported, "failed": failed, "lines": line_number, "errors": errors}
+
+@app.get("/memory/export")
+async def export_memory(platform: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None):
+    """
+    Stream stored analyses as NDJSON, optionally filtered by platform and a
+    ``last_updated`` window (``YYYY-MM-DD HH:MM:SS``).
+    """
+    memory = get_content_memory()
+    rows = memory.iter_content(platform=platform, since=since, until=until)
+    return StreamingResponse(
+        (json.dumps(row, default=str) + "\n" for row in rows),
+        media_type=MEDIA_TYPES["ndjson"]
+    )
+
+@app.get("/search")
+async def search_memory(
+    q: Optional[str] = Query(None, description="Full-text query over titles, descriptions, niches, problems and hook types"),
+    platform: Optional[str] = None,
+    niche: Optional[str] = None,
+    hook_type: Optional[str] = None,
+    min_views: Optional[int] = Query(None, ge=0),
+    max_views: Optional[int] = Query(None, ge=0),
+    days: Optional[int] = Query(None, ge=1, description="Only videos published in the last N days"),
+    published_after: Optional[str] = Query(None, description="YYYY-MM-DD"),
+    published_before: Optional[str] = Query(None, description="YYYY-MM-DD"),
+    sort: str = Query("views", pattern="^(views|published_at|last_updated)$"),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=200),
+    facets: Optional[List[str]] = Query(None, description="Facets to count: platform, niche, hook_type"),
+    fields: Optional[str] = _fields_param()
+):
+    """
+    Search stored analyses with pagination and facet counts.
+    
+    For example fitness videos with more than 1M views from the last 30 days:
+    ``/search?niche=fitness&min_views=1000000&days=30``
+    """
+    if days and not published_after:
+        published_after = (datetime.utcnow() - timedelta(days=days)).strftime("%Y-%m-%d")
+    try:
+        result = await asyncio.to_thread(
+            get_content_memory().search,
+            query=q,
+            platform=platform,
+            niche=niche,
+            hook_type=hook_type,
+            min_views=min_views,
+            max_views=max_views,
+            published_after=published_after,
+            published_before=published_before,
+            sort=sort,
+            limit=page_size,
+            offset=(page - 1) * page_size,
+            facets=facets
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
+    result["page"] = page
+    result["page_size"] = page_size
+    return json_response(result, fields)
+
+@app.get("/trends")
+async def get_trends(
+    days: int = Query(7, ge=1, le=366, description="Window length in publish days, ending at until"),
+    since: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}-\d{2}$", description="YYYY-MM-DD; overrides days"),
+    until: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}-\d{2}$", description="YYYY-MM-DD, defaults to today"),
+    platform: Optional[str] = None,
+    niche: Optional[str] = None,
+    group_by: Optional[str] = Query(None, pattern="^(platform|niche)$"),
+    dimensions: Optional[List[str]] = Query(None, description="hook_type, theme, emotional_trigger"),
+    top_k: int = Query(10, ge=1, le=100),
+    fields: Optional[str] = _fields_param()
+):
+    """
+    Top hook types, themes and emotional triggers over a window of days.
+    
+    Counts videos stored by ``?incremental=true`` analyses with a platform
+    and by /memory/import. Themes are the batch's content themes each video's
+    title or description mentions; emotional triggers and niches are the
+    videos' own fields, so they come from /niche-analysis or imports.
+    
+    Served from rollups maintained on every memory write, so the cost does
+    not grow with the number of stored analyses. For example the top five
+    fitness hooks of the last 30 days per platform:
+    ``/trends?niche=fitness&days=30&group_by=platform&dimensions=hook_type&top_k=5``
+    """
+    try:
+        result = await asyncio.to_thread(
+            get_content_memory().trends,
+            days=days,
+            since=since,
+            until=until,
+            platform=platform,
+            niche=niche,
+            group_by=group_by,
+            dimensions=dimensions,
+            top_k=top_k
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Trends failed: {str(e)}")
+    return json_response(result, fields)
 
 @app.get("/sample")
 async def get_sample_request():
@@ -277,11 +1098,20 @@ async def get_sample_request():
             "videos": sample_videos,
             "analysis_type": "full"
         },
+        "analyze_fast_endpoint": {
+            "videos": sample_videos,
+            "analysis_type": "fast"
+        },
         "generate_script_endpoint": sample_analysis,
         "create_visual_plan_endpoint": sample_script,
         "full_pipeline_endpoint": {
             "videos": sample_videos,
             "platform": "TikTok"
+        },
+        "full_pipeline_fan_out_endpoint": {
+            "videos": sample_videos,
+            "platforms": ["TikTok", "YouTube Shorts", "Instagram Reels"],
+            "max_parallel": 3
         }
     }
 
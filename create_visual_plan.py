@@ -1,13 +1,17 @@
 import json
 import argparse
-from typing import Dict, Any
+import glob
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, Optional
 
 # Import our agents
 from agents.content_strategy_agent import ContentStrategyAgent, VideoData, ContentAnalysisRequest
 from agents.content_scriptwriter_agent import ContentScriptwriterAgent, ScriptRequest
 from agents.visual_content_planner_agent import VisualContentPlannerAgent, VisualPlanRequest
 
-def create_visual_plan(script_data: Dict[str, Any]) -> Dict[str, Any]:
+def create_visual_plan(script_data: Dict[str, Any], agent: Optional[VisualContentPlannerAgent] = None) -> Dict[str, Any]:
     """Create a visual plan from script data"""
     # Create visual plan request
     request = VisualPlanRequest(
@@ -20,22 +24,74 @@ def create_visual_plan(script_data: Dict[str, Any]) -> Dict[str, Any]:
     )
     
     # Initialize visual planner agent and create plan
-    agent = VisualContentPlannerAgent()
+    agent = agent or VisualContentPlannerAgent()
     result = agent.create_visual_plan(request)
     
     return result.dict()
 
+def create_visual_plans_batch(input_dir: str, output_dir: str, platform: str = "TikTok", jobs: int = 4) -> Dict[str, Any]:
+    """
+    Create a visual plan for every script JSON file in ``input_dir``.
+
+    Accepts bare script files as well as ``{"analysis": ..., "script": ...}``
+    files saved by generate_video_script.py. Files are processed by ``jobs``
+    threads sharing one agent and written to ``output_dir/<name>.visual_plan.json``.
+    """
+    files = sorted(glob.glob(os.path.join(input_dir, "*.json")))
+    os.makedirs(output_dir, exist_ok=True)
+    agent = VisualContentPlannerAgent()
+    
+    def process(path: str) -> str:
+        with open(path, 'r') as f:
+            script_data = json.load(f)
+        if isinstance(script_data.get("script"), dict):
+            script_data = script_data["script"]
+        script_data.setdefault("platform", platform)
+        visual_plan = create_visual_plan(script_data, agent)
+        output_path = os.path.join(output_dir, f"{os.path.splitext(os.path.basename(path))[0]}.visual_plan.json")
+        with open(output_path, 'w') as f:
+            json.dump(visual_plan, f, indent=2)
+        return output_path
+    
+    started = time.perf_counter()
+    errors = []
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        futures = {pool.submit(process, path): path for path in files}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                print(f"OK    {path} -> {future.result()}")
+            except Exception as e:
+                errors.append({"file": path, "error": str(e)})
+                print(f"FAIL  {path}: {str(e)}")
+    
+    return {
+        "files": len(files),
+        "succeeded": len(files) - len(errors),
+        "failed": len(errors),
+        "errors": errors,
+        "elapsed_s": round(time.perf_counter() - started, 2)
+    }
+
 def main():
     parser = argparse.ArgumentParser(description='Create visual production plans for short-form video scripts')
     parser.add_argument('--script', '-s', type=str, help='Path to JSON file containing script data')
-    parser.add_argument('--output', '-o', type=str, help='Path to save visual plan (optional)')
+    parser.add_argument('--output', '-o', type=str, help='Path to save visual plan (optional; output directory with --batch)')
     parser.add_argument('--platform', '-p', type=str, default="TikTok", 
                         choices=["TikTok", "Instagram", "YouTube"], 
                         help='Target platform for the visual plan')
     parser.add_argument('--demo', '-d', action='store_true', help='Run with demo data')
+    parser.add_argument('--batch', '-b', type=str, help='Directory of script JSON files to create visual plans for in parallel')
+    parser.add_argument('--jobs', '-j', type=int, default=4, help='Files processed concurrently in --batch mode')
     
     args = parser.parse_args()
     
+    if args.batch:
+        output_dir = args.output or os.path.join(args.batch, "visual_plans")
+        summary = create_visual_plans_batch(args.batch, output_dir, args.platform, args.jobs)
+        print(f"\nCreated {summary['succeeded']}/{summary['files']} visual plans in {summary['elapsed_s']}s, saved to {output_dir}")
+        return
+    
     if args.demo:
         # Use demo data
         script_data = {
@@ -54,7 +110,7 @@ def main():
         if "platform" not in script_data:
             script_data["platform"] = args.platform
     else:
-        print("Please provide a script file (--script) or use demo data (--demo)")
+        print("Please provide a script file (--script), a directory (--batch) or use demo data (--demo)")
         return
     
     # Create visual plan
@@ -1,12 +1,17 @@
 import json
 import argparse
-from typing import Dict, Any
+import glob
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, Optional
 
 # Import our agents
 from agents.content_strategy_agent import ContentStrategyAgent, VideoData, ContentAnalysisRequest
 from agents.content_scriptwriter_agent import ContentScriptwriterAgent, ScriptRequest
+from niche_engine import insight_values
 
-def generate_script_from_analysis(analysis_data: Dict[str, Any], platform: str = "all") -> Dict[str, Any]:
+def generate_script_from_analysis(analysis_data: Dict[str, Any], platform: str = "all", agent: Optional[ContentScriptwriterAgent] = None) -> Dict[str, Any]:
     """Generate a video script from content analysis data"""
     # Create script request from analysis data
     request = ScriptRequest(
@@ -18,8 +23,12 @@ def generate_script_from_analysis(analysis_data: Dict[str, Any], platform: str =
         platform=platform
     )
     
+    # Add niche insights if available, as the plain value lists the scriptwriter takes
+    if "niche_insights" in analysis_data:
+        request.niche_insights = insight_values(analysis_data["niche_insights"])
+    
     # Initialize scriptwriter agent and generate script
-    agent = ContentScriptwriterAgent()
+    agent = agent or ContentScriptwriterAgent()
     result = agent.generate_script(request)
     
     return result.dict()
@@ -48,17 +57,69 @@ async def analyze_and_generate(video_file: str, platform: str = "all") -> Dict[s
         "script": script_result
     }
 
+def generate_scripts_batch(input_dir: str, output_dir: str, platform: str = "all", jobs: int = 4) -> Dict[str, Any]:
+    """
+    Generate a script for every analysis JSON file in ``input_dir``.
+
+    Files are processed by ``jobs`` threads sharing one agent; each result is
+    written to ``output_dir/<name>.script.json`` as soon as it is ready. Files
+    saved by this script (``{"analysis": ..., "script": ...}``) are accepted
+    as input too.
+    """
+    files = sorted(glob.glob(os.path.join(input_dir, "*.json")))
+    os.makedirs(output_dir, exist_ok=True)
+    agent = ContentScriptwriterAgent()
+    
+    def process(path: str) -> str:
+        with open(path, 'r') as f:
+            analysis_data = json.load(f)
+        if isinstance(analysis_data, dict) and isinstance(analysis_data.get("analysis"), dict):
+            analysis_data = analysis_data["analysis"]
+        script_result = generate_script_from_analysis(analysis_data, platform, agent)
+        output_path = os.path.join(output_dir, f"{os.path.splitext(os.path.basename(path))[0]}.script.json")
+        with open(output_path, 'w') as f:
+            json.dump({"analysis": analysis_data, "script": script_result}, f, indent=2)
+        return output_path
+    
+    started = time.perf_counter()
+    errors = []
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        futures = {pool.submit(process, path): path for path in files}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                print(f"OK    {path} -> {future.result()}")
+            except Exception as e:
+                errors.append({"file": path, "error": str(e)})
+                print(f"FAIL  {path}: {str(e)}")
+    
+    return {
+        "files": len(files),
+        "succeeded": len(files) - len(errors),
+        "failed": len(errors),
+        "errors": errors,
+        "elapsed_s": round(time.perf_counter() - started, 2)
+    }
+
 def main():
     parser = argparse.ArgumentParser(description='Generate optimized short-form video scripts based on viral content analysis')
     parser.add_argument('--file', '-f', type=str, help='Path to JSON file containing video data')
     parser.add_argument('--analysis', '-a', type=str, help='Path to JSON file containing existing analysis data')
     parser.add_argument('--platform', '-p', type=str, default="all", choices=["tiktok", "youtube_shorts", "instagram_reels", "all"], help='Target platform for the script')
-    parser.add_argument('--output', '-o', type=str, help='Path to save results (optional)')
+    parser.add_argument('--output', '-o', type=str, help='Path to save results (optional; output directory with --batch)')
+    parser.add_argument('--batch', '-b', type=str, help='Directory of analysis JSON files to generate scripts for in parallel')
+    parser.add_argument('--jobs', '-j', type=int, default=4, help='Files processed concurrently in --batch mode')
     
     args = parser.parse_args()
     
+    if args.batch:
+        output_dir = args.output or os.path.join(args.batch, "scripts")
+        summary = generate_scripts_batch(args.batch, output_dir, args.platform, args.jobs)
+        print(f"\nGenerated {summary['succeeded']}/{summary['files']} scripts in {summary['elapsed_s']}s, saved to {output_dir}")
+        return
+    
     if not args.file and not args.analysis:
-        print("Please provide either a video data file (--file) or an analysis file (--analysis)")
+        print("Please provide either a video data file (--file), an analysis file (--analysis) or a directory (--batch)")
         return
     
     # If analysis file is provided, use it directly
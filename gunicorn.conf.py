@@ -0,0 +1,19 @@
+# Gunicorn loads this file automatically from the working directory.
+# Command-line flags (see Procfile / railway.toml) still take precedence.
+import os
+import shutil
+
+
+def on_starting(server):
+    # Start every deploy with an empty Prometheus multiprocess directory
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if directory:
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory, exist_ok=True)
+
+
+def child_exit(server, worker):
+    # Drop live gauges of a worker that exited so /metrics doesn't count it
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
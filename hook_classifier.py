@@ -0,0 +1,312 @@
+"""
+Rule-based hook and format classifier: an LLM-free fast path for /analyze.
+
+Many hooks can be read off a title alone ("5 Morning Habits", "You've Been
+Doing It Wrong", "Why does nobody talk about this?"). Each label is one
+compiled alternation of rules. Every distinct title and description in a
+batch is scanned once, the per-label match counts land in a NumPy matrix,
+and scoring, view weighting and example selection for all labels are done
+with a few array operations over the whole batch.
+
+``classify`` returns the same hook_patterns / format_trends /
+engagement_tactics shape the strategy agent produces. ``narrow`` uses the
+same scan as a pre-pass to pick the videos worth sending to the agent.
+"""
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import re
+import time
+
+import numpy as np
+
+_FLAGS = re.IGNORECASE | re.UNICODE
+
+# A number followed by a listicle noun, e.g. "5 Morning Habits" or "3 Exercises"
+_LIST_NOUNS = r"(?:ways|tips|things|habits|mistakes|reasons|exercises|hacks|signs|steps|foods|rules|secrets|tricks|lessons|books|apps|ideas|products)"
+
+# Hook type -> rules matched against the title (and, at lower weight, the description)
+HOOK_RULES: Dict[str, List[str]] = {
+    "question-based": [
+        r"\?",
+        r"^\s*(?:what|why|who|when|where|which|is|are|can|do|does|did|would|should|could|have you|ever wonder)\b",
+        r"^\s*how(?!\s+to\b)\b",
+    ],
+    "shock-based": [
+        r"\b(?:you(?:'ve|\s+have)?\s+been|you're|you\s+are|everyone(?:'s|\s+is)?|we've\s+been)\b[^.?!]{0,40}?\bwrong\b",
+        r"\bstop\s+(?:doing|using|buying|eating|drinking|making)\b",
+        r"\b(?:shocking|insane|unbelievable|crazy|mind[- ]?blowing|terrifying|disturbing)\b",
+        r"\b(?:never|don't)\s+(?:do|buy|eat|use|make)\b",
+    ],
+    "numbered-list": [
+        r"^\s*\d+\s+(?:\w+\s+){0,2}" + _LIST_NOUNS + r"\b",
+        r"\btop\s+\d+\b",
+        r"\b\d+\s+(?:\w+\s+)?" + _LIST_NOUNS + r"\b",
+    ],
+    "curiosity-gap": [
+        r"\bhere'?s\s+(?:what|why|how)\b",
+        r"\bwhat\s+happened\b",
+        r"\b(?:secret|hidden|nobody\s+(?:tells|talks\s+about)|no\s+one\s+tells)\b",
+        r"\bwait\s+(?:for\s+it|till|until)\b",
+        r"\b(?:the\s+)?results?\s+(?:were|was|are)\b",
+        r"(?:\.\.\.|…)\s*$",
+    ],
+    "personal-experiment": [
+        r"\bI\s+tried\b",
+        r"\bI\s+(?:did|ate|drank|used|tested)\b[^.?!]{0,40}?\bfor\s+(?:a|\d+)\s+(?:day|week|month|year)s?\b",
+        r"\bchanged\s+my\s+life\b",
+    ],
+    "how-to": [
+        r"\bhow\s+to\b",
+        r"\b(?:tutorial|step[- ]by[- ]step|beginner'?s\s+guide|explained)\b",
+    ],
+    "pov-relatable": [
+        r"^\s*pov\b",
+        r"\bwhen\s+you\b",
+        r"\bme\s+(?:when|after|trying)\b",
+        r"\bday\s+in\s+(?:the|my)\s+life\b",
+        r"\bwhat\s+I\s+eat\s+in\s+a\s+day\b",
+    ],
+}
+
+# Format trend -> rules
+FORMAT_RULES: Dict[str, List[str]] = {
+    "Numbered list / countdown": HOOK_RULES["numbered-list"],
+    "Challenge or experiment (\"I tried X for N days\")": [
+        r"\bI\s+tried\b",
+        r"\bfor\s+\d+\s+(?:day|week|month)s?\b",
+        r"\b\d+[- ]day\s+challenge\b",
+        r"\bchallenge\b",
+    ],
+    "Day-in-the-life / routine vlog": [
+        r"\bday\s+in\s+(?:the|my)\s+life\b",
+        r"\bwhat\s+I\s+eat\s+in\s+a\s+day\b",
+        r"\b(?:morning|night|evening|daily)\s+routine\b",
+    ],
+    "Tutorial / step-by-step how-to": HOOK_RULES["how-to"],
+    "Mistakes and myth-busting": [
+        r"\bwrong\b",
+        r"\bmistakes?\b",
+        r"\bmyths?\b",
+        r"\b(?:debunk\w*|lies|scam)\b",
+    ],
+    "Before and after transformation": [
+        r"\bbefore\s*(?:and|&|vs\.?|/)\s*after\b",
+        r"\btransformation\b",
+        r"\bglow[- ]?up\b",
+    ],
+    "Review / comparison": [
+        r"\breview\b",
+        r"\bhonest\s+(?:opinion|thoughts)\b",
+        r"\bvs\.?\b",
+        r"\btested\b",
+        r"\bworth\s+it\b",
+    ],
+    "Hacks and quick tips": [
+        r"\bhacks?\b",
+        r"\btricks?\b",
+        r"\btips?\b",
+        r"\bin\s+(?:under\s+|less\s+than\s+)?\d+\s+(?:seconds|minutes)\b",
+    ],
+}
+
+# Engagement tactic -> rules, mostly visible in descriptions
+ENGAGEMENT_RULES: Dict[str, List[str]] = {
+    "Open loops (e.g., 'Wait for it...')": [
+        r"\bwait\s+(?:for\s+it|till|until)\b",
+        r"\bwatch\s+(?:till|until|to)\s+the\s+end\b",
+        r"(?:\.\.\.|…)\s*$",
+    ],
+    "Direct CTAs ('Follow for more')": [
+        r"\bfollow\s+(?:me\s+)?for\b",
+        r"\b(?:like|subscribe|share)\s+(?:and|&|if|for)\b",
+        r"\bsave\s+this\b",
+    ],
+    "Comment prompts": [
+        r"\bcomment\b",
+        r"\blet\s+me\s+know\b",
+        r"\btell\s+me\b",
+    ],
+    "Series / part hooks": [
+        r"\bpart\s+\d+\b",
+        r"\bpt\.?\s*\d+\b",
+        r"\bepisode\s+\d+\b",
+    ],
+    "Concrete results and numbers": [
+        r"\b\d+\s*(?:%|percent|x)\b",
+        r"\btwice\s+as\b",
+        r"\$\d",
+    ],
+}
+
+# A rule matching only in the description counts this much of a title match
+DESCRIPTION_WEIGHT = 0.5
+
+
+class RuleSet:
+    """One compiled alternation per label, scanned once per distinct text"""
+
+    def __init__(self, rules: Dict[str, List[str]]):
+        self.labels = list(rules)
+        self.patterns = [re.compile("|".join(f"(?:{rule})" for rule in patterns), _FLAGS) for patterns in rules.values()]
+
+    def counts(self, texts: Sequence[str]) -> np.ndarray:
+        """(len(texts), labels) matrix of match counts"""
+        patterns = self.patterns
+        counts = [[len(pattern.findall(text)) for pattern in patterns] for text in texts]
+        return np.array(counts, dtype=np.int32).reshape(len(texts), len(patterns))
+
+
+HOOKS = RuleSet(HOOK_RULES)
+FORMATS = RuleSet(FORMAT_RULES)
+ENGAGEMENT = RuleSet(ENGAGEMENT_RULES)
+
+
+def _unique(values: Sequence[Optional[str]]) -> Tuple[List[str], np.ndarray]:
+    """Distinct values and, for every input, the index of its distinct value"""
+    index: Dict[str, int] = {}
+    inverse = np.fromiter((index.setdefault(value or "", len(index)) for value in values), dtype=np.int64, count=len(values))
+    return list(index), inverse
+
+
+class _Scan:
+    """Title and description match counts for a batch under one rule set"""
+
+    def __init__(self, rule_set: RuleSet, titles: Tuple[List[str], np.ndarray], descriptions: Tuple[List[str], np.ndarray]):
+        self.rule_set = rule_set
+        title_texts, title_rows = titles
+        description_texts, description_rows = descriptions
+        self.title_counts = rule_set.counts(title_texts)[title_rows]
+        self.description_counts = rule_set.counts(description_texts)[description_rows]
+        # Per video and label: 1 for a title match, DESCRIPTION_WEIGHT for a description-only match
+        self.strength = np.maximum(
+            np.minimum(self.title_counts, 1).astype(np.float64),
+            DESCRIPTION_WEIGHT * np.minimum(self.description_counts, 1)
+        )
+
+    @property
+    def hits(self) -> np.ndarray:
+        return self.strength > 0
+
+    def ranked(self, views: np.ndarray, titles: Sequence[str], top_k: Optional[int]) -> List[Dict[str, Any]]:
+        """Labels with at least one match, ranked by view-weighted score"""
+        scores = views @ self.strength
+        videos = self.hits.sum(axis=0)
+        matched_views = views @ self.hits
+        matches = self.title_counts.sum(axis=0) + self.description_counts.sum(axis=0)
+        # The example is the title of the most viewed matching video (+1 so unviewed matches still win)
+        example_rows = np.argmax(self.strength * (views[:, None] + 1), axis=0)
+        total_views = views.sum()
+
+        order = [j for j in np.argsort(-scores, kind="stable") if videos[j]]
+        if top_k:
+            order = order[:top_k]
+        return [
+            {
+                "label": self.rule_set.labels[j],
+                "example": titles[example_rows[j]] or "",
+                "videos": int(videos[j]),
+                "views": int(matched_views[j]),
+                "matches": int(matches[j]),
+                "score": round(float(scores[j]), 1),
+                "share": round(float(scores[j] / total_views), 4) if total_views else 0.0
+            }
+            for j in order
+        ]
+
+
+def _scan(videos: Sequence[Any]) -> Tuple[np.ndarray, List[str], Dict[str, _Scan]]:
+    titles = [getattr(v, "title", None) or "" for v in videos]
+    unique_titles = _unique(titles)
+    unique_descriptions = _unique([getattr(v, "description", None) for v in videos])
+    views = np.fromiter((getattr(v, "views", None) or 0 for v in videos), dtype=np.float64, count=len(videos))
+    scans = {
+        name: _Scan(rule_set, unique_titles, unique_descriptions)
+        for name, rule_set in (("hooks", HOOKS), ("formats", FORMATS), ("engagement", ENGAGEMENT))
+    }
+    return views, titles, scans
+
+
+def classify(videos: Sequence[Any], top_k: int = 10) -> Dict[str, Any]:
+    """
+    Analyze a batch without the LLM.
+
+    ``hook_patterns`` entries carry ``type`` and ``example`` like the agent's
+    output, plus ``videos``, ``views`` and ``share`` (view-weighted share of
+    the batch). ``format_trends`` and ``engagement_tactics`` are label
+    strings ranked by view-weighted score. ``content_themes`` stays empty:
+    themes need the LLM. Per-label details are under ``heuristics``.
+    """
+    started = time.perf_counter()
+    if not videos:
+        raise ValueError("No videos to analyze")
+    views, titles, scans = _scan(videos)
+    hooks = scans["hooks"].ranked(views, titles, top_k)
+    formats = scans["formats"].ranked(views, titles, top_k)
+    engagement = scans["engagement"].ranked(views, titles, top_k)
+    unmatched = int((~scans["hooks"].hits.any(axis=1)).sum())
+
+    if hooks:
+        summary = (
+            f"Rule-based scan of {len(videos)} videos: {hooks[0]['label']} hooks carry the most views "
+            f"({hooks[0]['share']:.0%} view-weighted)"
+            + (f", and the leading format is {formats[0]['label'].lower()}." if formats else ".")
+        )
+    else:
+        summary = f"Rule-based scan of {len(videos)} videos found no recognizable hook patterns."
+
+    return {
+        "hook_patterns": [
+            {"type": h["label"], "example": h["example"], "videos": h["videos"], "views": h["views"], "share": h["share"]}
+            for h in hooks
+        ],
+        "format_trends": [f["label"] for f in formats],
+        "engagement_tactics": [e["label"] for e in engagement],
+        "content_themes": [],
+        "summary": summary,
+        "heuristics": {
+            "videos": len(videos),
+            "unmatched_videos": unmatched,
+            "hooks": hooks,
+            "formats": formats,
+            "engagement": engagement,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 2)
+        }
+    }
+
+
+def narrow(videos: Sequence[Any], per_label: int = 5) -> Tuple[List[Any], Dict[str, Any]]:
+    """
+    Pre-pass choosing the videos the LLM still needs to see.
+
+    Keeps the ``per_label`` most viewed videos of every hook type and format
+    the rules recognize, as examples, and every video no hook rule explains.
+    Returns the kept videos in their original order and a summary for the
+    response.
+    """
+    started = time.perf_counter()
+    views, _, scans = _scan(videos)
+    keep = ~scans["hooks"].hits.any(axis=1)
+    for scan in (scans["hooks"], scans["formats"]):
+        hits = scan.hits
+        for j in range(hits.shape[1]):
+            rows = np.flatnonzero(hits[:, j])
+            keep[rows[np.argsort(-views[rows], kind="stable")[:per_label]]] = True
+    kept = [videos[i] for i in np.flatnonzero(keep)]
+    return kept, {
+        "videos": len(videos),
+        "sent": len(kept),
+        "per_label": per_label,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2)
+    }
+
+
+def label_videos(videos: Sequence[Any]) -> List[Dict[str, List[str]]]:
+    """Per-video ``hooks``, ``formats`` and ``engagement`` labels, title matches first"""
+    _, _, scans = _scan(videos)
+    labels: List[Dict[str, List[str]]] = [{} for _ in videos]
+    for name, scan in scans.items():
+        names = scan.rule_set.labels
+        # Title matches (strength 1) sort ahead of description-only ones
+        order = np.argsort(-scan.strength, axis=1, kind="stable")
+        for row, video_labels in enumerate(labels):
+            video_labels[name] = [names[j] for j in order[row] if scan.strength[row, j] > 0]
+    return labels
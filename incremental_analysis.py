@@ -0,0 +1,212 @@
+"""
+Incremental analysis on top of ContentMemory.
+
+Every analyzed video is stored under its ``video_id`` with its per-video
+features (rule-based hook, format and engagement labels, niche fields) and
+the ``analysis_id`` of the batch it was analyzed in; the batch's LLM
+analysis is stored once under that id. On later requests the known videos
+and their batch analyses are looked up in bulk; only videos that are new,
+whose title or description changed, that were analyzed with another model
+or prompt version, or whose batch analysis has expired go to the agent. The
+stored batch analyses and the fresh one are then merged like map-reduce
+shards, weighted by the current views of the videos each one covers.
+
+Videos are stored with the request's platform; without one they are kept
+out of the trend rollups. Each video record carries the batch's
+``content_themes`` its title or description mentions, so the theme rollups
+count videos rather than batches; emotional triggers come from the video's
+own ``emotional_triggers`` field.
+"""
+from typing import Dict, Any, List, Callable, Awaitable, Optional, Sequence, Tuple
+import asyncio
+import hashlib
+import re
+import time
+
+from chunked_analysis import merge_analyses
+from hook_classifier import label_videos
+from niche_engine import INSIGHT_FIELDS, normalize
+
+# Keys of an analysis result that describe the request, not the videos
+_META_KEYS = ("chunking", "prepass", "dedup", "heuristics", "incremental", "niche_insights")
+
+_WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+# Short words and these carry no theme on their own
+_STOPWORDS = frozenset((
+    "about", "after", "from", "have", "into", "just", "like", "make", "more", "most",
+    "that", "their", "them", "they", "this", "video", "videos", "what", "when", "will",
+    "with", "your"
+))
+
+
+def _digest(*parts: Any) -> str:
+    return hashlib.sha1("\x1f".join(str(p or "") for p in parts).encode("utf-8")).hexdigest()
+
+
+def video_key(video: Any) -> str:
+    """The video's own id when it carries one, else a hash of channel, title and publish date"""
+    for attribute in ("video_id", "id", "url"):
+        value = getattr(video, attribute, None)
+        if value:
+            return str(value)
+    return "v:" + _digest(
+        (getattr(video, "channel", None) or "").strip().casefold(),
+        (getattr(video, "title", None) or "").strip().casefold(),
+        getattr(video, "publishedAt", None)
+    )[:24]
+
+
+def fingerprint(video: Any) -> str:
+    """Hash of the text the analysis depends on; views are deliberately left out"""
+    return _digest(getattr(video, "title", None), getattr(video, "description", None))[:16]
+
+
+def is_current(record: Optional[Dict[str, Any]], video_fingerprint: str, version: str) -> bool:
+    return (
+        isinstance(record, dict)
+        and record.get("fingerprint") == video_fingerprint
+        and record.get("analysis_version") == version
+        and bool(record.get("analysis_id"))
+    )
+
+
+def batch_analysis(result: Dict[str, Any]) -> Dict[str, Any]:
+    """The part of an analysis result describing the videos, stored once per batch"""
+    return {key: value for key, value in result.items() if key not in _META_KEYS}
+
+
+def analysis_id(keys: Sequence[str], version: str) -> str:
+    return _digest(version, *keys)[:16]
+
+
+def _stems(text: Any) -> set:
+    """Crude stems of the salient words of ``text``: plural s dropped, first five letters"""
+    return {
+        word.rstrip("s")[:5]
+        for word in _WORD_PATTERN.findall(normalize(str(text or "")))
+        if len(word) >= 4 and word not in _STOPWORDS and not word.isdigit()
+    }
+
+
+def video_themes(video: Any, themes: Sequence[str]) -> List[str]:
+    """The batch ``themes`` sharing a salient word with the video's title or description"""
+    words = _stems(getattr(video, "title", None)) | _stems(getattr(video, "description", None))
+    return [theme for theme in themes if isinstance(theme, str) and _stems(theme) & words]
+
+
+def video_records(
+    videos: Sequence[Any],
+    keys: Sequence[str],
+    batch_analysis_id: str,
+    version: str,
+    themes: Sequence[str] = ()
+) -> List[Tuple[str, Dict[str, Any]]]:
+    """(video_id, analysis_data) rows storing the features of freshly analyzed videos"""
+    records = []
+    for key, video, labels in zip(keys, videos, label_videos(videos)):
+        record = {
+            "title": getattr(video, "title", None),
+            "description": getattr(video, "description", None),
+            "views": getattr(video, "views", None),
+            "publishedAt": getattr(video, "publishedAt", None),
+            "channel": getattr(video, "channel", None),
+            "fingerprint": fingerprint(video),
+            "analysis_version": version,
+            "analysis_id": batch_analysis_id,
+            "hook_type": labels["hooks"][0] if labels["hooks"] else None,
+            "hook_patterns": [{"type": label} for label in labels["hooks"]],
+            "format_trends": labels["formats"],
+            "engagement_tactics": labels["engagement"],
+            "content_themes": video_themes(video, themes)
+        }
+        for attribute in INSIGHT_FIELDS.values():
+            value = getattr(video, attribute, None)
+            if value:
+                record[attribute] = value
+        records.append((key, record))
+    return records
+
+
+async def incremental_analyze(
+    videos: Sequence[Any],
+    analyze: Callable[[List[Any]], Awaitable[Dict[str, Any]]],
+    memory: Any,
+    version: str,
+    platform: Optional[str] = None,
+    top_k: int = 10
+) -> Dict[str, Any]:
+    """
+    Analyze only the videos ``memory`` has no current features for.
+
+    ``analyze`` receives the new or changed videos and returns a regular
+    analysis dict; it is stored once with ``memory.add_analysis_batch`` and
+    the videos' features with ``memory.add_many``; known videos only get
+    their views refreshed with ``memory.refresh_views``. The result merges
+    every batch analysis covering the request, and its ``incremental``
+    section counts known, new and changed videos.
+    """
+    if not videos:
+        raise ValueError("No videos to analyze")
+    started = time.perf_counter()
+    keys = [video_key(v) for v in videos]
+    fingerprints = [fingerprint(v) for v in videos]
+    stored = await asyncio.to_thread(memory.get_many, list(dict.fromkeys(keys)))
+    batch_ids = {record.get("analysis_id") for record in stored.values() if isinstance(record, dict)}
+    batches = await asyncio.to_thread(memory.get_analysis_batches, [i for i in batch_ids if i])
+
+    fresh: List[int] = []
+    changed = 0
+    for index, (key, video_fingerprint) in enumerate(zip(keys, fingerprints)):
+        record = stored.get(key)
+        if not is_current(record, video_fingerprint, version) or record["analysis_id"] not in batches:
+            fresh.append(index)
+            changed += record is not None
+
+    # Known videos are not analyzed again, but their views move on
+    fresh_keys = {keys[i] for i in fresh}
+    views = {
+        key: getattr(video, "views", None)
+        for key, video in zip(keys, videos)
+        if key not in fresh_keys and getattr(video, "views", None) is not None
+    }
+    refreshed = await asyncio.to_thread(memory.refresh_views, views) if views else 0
+
+    # analysis id -> [analysis, summed views of this request's videos]
+    partials: Dict[str, List[Any]] = {}
+    written = 0
+    if fresh:
+        fresh_videos = [videos[i] for i in fresh]
+        fresh_keys = [keys[i] for i in fresh]
+        result = await analyze(fresh_videos)
+        fresh_id = analysis_id(fresh_keys, version)
+        batches[fresh_id] = batch_analysis(result)
+        await asyncio.to_thread(memory.add_analysis_batch, fresh_id, batches[fresh_id])
+        records = await asyncio.to_thread(
+            video_records, fresh_videos, fresh_keys, fresh_id, version, result.get("content_themes") or []
+        )
+        written = await asyncio.to_thread(memory.add_many, [(key, platform, record) for key, record in records])
+        for key, record in records:
+            stored[key] = record
+
+    for key, video in zip(keys, videos):
+        batch_id = stored[key]["analysis_id"]
+        entry = partials.setdefault(batch_id, [batches[batch_id], 0.0])
+        entry[1] += getattr(video, "views", None) or 0
+
+    analyses = list(partials.values())
+    if len(analyses) == 1:
+        result = dict(analyses[0][0])
+    else:
+        result = merge_analyses([a for a, _ in analyses], [w or 1.0 for _, w in analyses], top_k)
+    result["incremental"] = {
+        "videos": len(videos),
+        "known": len(videos) - len(fresh),
+        "new": len(fresh) - changed,
+        "changed": changed,
+        "analyzed": len(fresh),
+        "stored": written,
+        "refreshed": refreshed,
+        "merged_analyses": len(analyses),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)
+    }
+    return result
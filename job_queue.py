@@ -0,0 +1,450 @@
+"""
+Persistent job queue for long-running pipeline runs.
+
+Jobs are stored in SQLite next to the content memory database and claimed
+atomically, highest priority first, by a small pool of asyncio workers in
+every gunicorn worker. A running job holds a lease that its worker keeps
+renewing; jobs whose lease expires (the process died) are queued again, so
+queued and interrupted work survives restarts. Handlers can publish partial
+results while they run, and an optional webhook is called when a job ends.
+"""
+from typing import Dict, Any, Optional, Callable, Awaitable, List, Sequence
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+import asyncio
+import ipaddress
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+
+import httpx
+
+from memory import ConnectionPool, DEFAULT_DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+JOB_STATUSES = ("queued", "running", "succeeded", "failed", "cancelled")
+
+# Handler(payload, progress) -> result; progress(partial) persists partial results
+Progress = Callable[[Dict[str, Any]], Awaitable[None]]
+Handler = Callable[[Dict[str, Any], Progress], Awaitable[Dict[str, Any]]]
+
+_CREATE_TABLE = '''
+    CREATE TABLE IF NOT EXISTS jobs (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        id TEXT NOT NULL UNIQUE,
+        kind TEXT NOT NULL,
+        status TEXT NOT NULL,
+        priority INTEGER NOT NULL DEFAULT 0,
+        payload TEXT NOT NULL,
+        progress TEXT,
+        result TEXT,
+        error TEXT,
+        webhook_url TEXT,
+        webhook_status TEXT,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        worker TEXT,
+        heartbeat_at REAL,
+        created_at TEXT NOT NULL,
+        started_at TEXT,
+        finished_at TEXT
+    )
+'''
+_CREATE_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_jobs_queue ON jobs (status, priority DESC, seq)",
+    "CREATE INDEX IF NOT EXISTS idx_jobs_finished_at ON jobs (finished_at)"
+]
+_INSERT_JOB = '''
+    INSERT INTO jobs (id, kind, status, priority, payload, webhook_url, created_at)
+    VALUES (?, ?, 'queued', ?, ?, ?, ?)
+'''
+_SELECT_JOB = '''
+    SELECT id, kind, status, priority, progress, result, error, webhook_url, webhook_status,
+           attempts, created_at, started_at, finished_at, seq
+    FROM jobs WHERE id = ?
+'''
+_QUEUE_POSITION = '''
+    SELECT COUNT(*) FROM jobs
+    WHERE status = 'queued' AND (priority > ? OR (priority = ? AND seq < ?))
+'''
+_NEXT_JOB = '''
+    SELECT id, kind, payload, attempts FROM jobs
+    WHERE status = 'queued'
+    ORDER BY priority DESC, seq
+    LIMIT 1
+'''
+_START_JOB = '''
+    UPDATE jobs SET status = 'running', worker = ?, heartbeat_at = ?, started_at = ?, attempts = attempts + 1
+    WHERE id = ?
+'''
+_REQUEUE_EXPIRED = '''
+    UPDATE jobs SET status = 'queued', worker = NULL
+    WHERE status = 'running' AND heartbeat_at < ? AND attempts < ?
+'''
+_ABANDON_EXPIRED = '''
+    UPDATE jobs SET status = 'failed', error = 'Worker lost too many times', finished_at = ?
+    WHERE status = 'running' AND heartbeat_at < ? AND attempts >= ?
+'''
+
+
+class WebhookURLError(ValueError):
+    """A webhook URL the server must not call"""
+
+
+def check_webhook_url(url: str, allowed_hosts: Sequence[str] = ()) -> str:
+    """
+    Reject webhook URLs that would make the server call itself or its network.
+
+    With ``allowed_hosts`` only those hosts (or subdomains of entries starting
+    with ".") are accepted. Otherwise every address the host resolves to must
+    be public: loopback, private, link-local, reserved and multicast addresses
+    are refused. Returns the URL.
+    """
+    parts = urlsplit(url)
+    host = (parts.hostname or "").rstrip(".").lower()
+    if parts.scheme not in ("http", "https") or not host:
+        raise WebhookURLError("webhook_url must be an absolute http(s) URL")
+    if allowed_hosts:
+        if not any(host == entry or (entry.startswith(".") and host.endswith(entry)) for entry in allowed_hosts):
+            raise WebhookURLError(f"webhook_url host {host!r} is not in JOBS_WEBHOOK_ALLOWED_HOSTS")
+        return url
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, parts.port or 443, type=socket.SOCK_STREAM)}
+    except (socket.gaierror, UnicodeError, ValueError):
+        raise WebhookURLError(f"webhook_url host {host!r} does not resolve")
+    for address in addresses:
+        ip = ipaddress.ip_address(address.split("%", 1)[0])
+        if getattr(ip, "ipv4_mapped", None):
+            ip = ip.ipv4_mapped
+        if not ip.is_global or ip.is_multicast:
+            raise WebhookURLError(f"webhook_url host {host!r} resolves to a non-public address")
+    return url
+
+
+class JobStore:
+    """SQLite persistence for jobs"""
+
+    def __init__(self, db_path: str, pool_size: int = 2):
+        self.db_path = db_path
+        self.pool_size = pool_size
+        self._pool: Optional[ConnectionPool] = None
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        """Pooled connection; the database is created on first use"""
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+                    pool = ConnectionPool(self.db_path, self.pool_size, busy_timeout_ms=5000, cache_size_kb=2048)
+                    with pool.connection() as conn:
+                        conn.execute(_CREATE_TABLE)
+                        for statement in _CREATE_INDEXES:
+                            conn.execute(statement)
+                    self._pool = pool
+        return self._pool.connection()
+
+    def create(self, kind: str, payload: Dict[str, Any], priority: int = 0, webhook_url: Optional[str] = None) -> str:
+        job_id = uuid.uuid4().hex
+        with self._connection() as conn:
+            conn.execute(_INSERT_JOB, (job_id, kind, priority, json.dumps(payload, default=str), webhook_url, datetime.utcnow().isoformat()))
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._connection() as conn:
+            row = conn.execute(_SELECT_JOB, (job_id,)).fetchone()
+            if row is None:
+                return None
+            (job_id, kind, status, priority, progress, result, error, webhook_url, webhook_status,
+             attempts, created_at, started_at, finished_at, seq) = row
+            job = {
+                "job_id": job_id,
+                "kind": kind,
+                "status": status,
+                "priority": priority,
+                "attempts": attempts,
+                "created_at": created_at,
+                "started_at": started_at,
+                "finished_at": finished_at,
+                "progress": json.loads(progress) if progress else None,
+                "result": json.loads(result) if result else None,
+                "error": error,
+                "webhook_url": webhook_url,
+                "webhook_status": webhook_status
+            }
+            if status == "queued":
+                job["queue_position"] = conn.execute(_QUEUE_POSITION, (priority, priority, seq)).fetchone()[0]
+        return job
+
+    def claim(self, worker: str, lease: float, max_attempts: int) -> Optional[Dict[str, Any]]:
+        """Atomically take the highest-priority queued job, reclaiming expired leases first"""
+        now = time.time()
+        with self._connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(_ABANDON_EXPIRED, (datetime.utcnow().isoformat(), now - lease, max_attempts))
+                conn.execute(_REQUEUE_EXPIRED, (now - lease, max_attempts))
+                row = conn.execute(_NEXT_JOB).fetchone()
+                if row is not None:
+                    conn.execute(_START_JOB, (worker, now, datetime.utcnow().isoformat(), row[0]))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        job_id, kind, payload, attempts = row
+        return {"job_id": job_id, "kind": kind, "payload": json.loads(payload), "attempts": attempts + 1}
+
+    def heartbeat(self, job_id: str, worker: str):
+        with self._connection() as conn:
+            conn.execute("UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND worker = ?", (time.time(), job_id, worker))
+
+    def save_progress(self, job_id: str, progress: Dict[str, Any]):
+        with self._connection() as conn:
+            conn.execute(
+                "UPDATE jobs SET progress = ?, heartbeat_at = ? WHERE id = ?",
+                (json.dumps(progress, default=str), time.time(), job_id)
+            )
+
+    def finish(
+        self,
+        job_id: str,
+        worker: str,
+        status: str,
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None
+    ):
+        """Record the outcome, unless the job's lease was lost to another worker meanwhile"""
+        with self._connection() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, worker = NULL WHERE id = ? AND status = 'running' AND worker = ?",
+                (status, json.dumps(result, default=str) if result is not None else None, error, datetime.utcnow().isoformat(), job_id, worker)
+            )
+
+    def requeue(self, job_id: str, worker: str):
+        """Hand an interrupted job back to the queue without waiting for its lease to expire"""
+        with self._connection() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'queued', worker = NULL WHERE id = ? AND status = 'running' AND worker = ?",
+                (job_id, worker)
+            )
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a job that has not started yet"""
+        with self._connection() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status = 'queued'",
+                (datetime.utcnow().isoformat(), job_id)
+            )
+            return cursor.rowcount > 0
+
+    def set_webhook_status(self, job_id: str, webhook_status: str):
+        with self._connection() as conn:
+            conn.execute("UPDATE jobs SET webhook_status = ? WHERE id = ?", (webhook_status, job_id))
+
+    def counts(self) -> Dict[str, int]:
+        with self._connection() as conn:
+            counts = dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {status: counts.get(status, 0) for status in JOB_STATUSES}
+
+    def purge(self, retention_days: float) -> int:
+        """Delete finished jobs older than the retention period"""
+        cutoff = (datetime.utcnow() - timedelta(days=retention_days)).isoformat()
+        with self._connection() as conn:
+            cursor = conn.execute(
+                "DELETE FROM jobs WHERE status IN ('succeeded', 'failed', 'cancelled') AND finished_at < ?",
+                (cutoff,)
+            )
+            return cursor.rowcount
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+
+
+class JobQueue:
+    """
+    Runs stored jobs with ``workers`` concurrent asyncio workers.
+
+    ``handlers`` maps a job kind to the coroutine executing it.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        handlers: Dict[str, Handler],
+        workers: int = 2,
+        poll_interval: float = 2,
+        lease: float = 300,
+        max_attempts: int = 3,
+        retention_days: float = 7,
+        webhook_timeout: float = 10,
+        webhook_retries: int = 3,
+        webhook_allowed_hosts: Sequence[str] = ()
+    ):
+        self.store = store
+        self.handlers = handlers
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.retention_days = retention_days
+        self.webhook_timeout = webhook_timeout
+        self.webhook_retries = webhook_retries
+        self.webhook_allowed_hosts = tuple(webhook_allowed_hosts)
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._next_purge = 0.0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+
+    @classmethod
+    def from_env(cls, handlers: Dict[str, Handler]) -> "JobQueue":
+        """Build the queue from JOBS_* environment variables"""
+        data_dir = os.environ.get("MEMORY_DATA_DIR", DEFAULT_DATA_DIR)
+        store = JobStore(os.environ.get("JOBS_DB_PATH", os.path.join(data_dir, "jobs.db")))
+        return cls(
+            store,
+            handlers,
+            workers=int(os.environ.get("JOBS_WORKERS", 2)),
+            poll_interval=float(os.environ.get("JOBS_POLL_INTERVAL", 2)),
+            lease=float(os.environ.get("JOBS_LEASE", 300)),
+            max_attempts=int(os.environ.get("JOBS_MAX_ATTEMPTS", 3)),
+            retention_days=float(os.environ.get("JOBS_RETENTION_DAYS", 7)),
+            webhook_allowed_hosts=[
+                host.strip().lower() for host in os.environ.get("JOBS_WEBHOOK_ALLOWED_HOSTS", "").split(",") if host.strip()
+            ]
+        )
+
+    def start(self):
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        logger.info(f"Job queue started with {self.workers} workers")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, kind: str, payload: Dict[str, Any], priority: int = 0, webhook_url: Optional[str] = None) -> Dict[str, Any]:
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind {kind!r}")
+        if webhook_url:
+            await asyncio.to_thread(check_webhook_url, webhook_url, self.webhook_allowed_hosts)
+        job_id = await asyncio.to_thread(self.store.create, kind, payload, priority, webhook_url)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    async def cancel(self, job_id: str) -> bool:
+        return await asyncio.to_thread(self.store.cancel, job_id)
+
+    async def _worker(self):
+        while True:
+            try:
+                await self._maybe_purge()
+                job = await asyncio.to_thread(self.store.claim, self.worker_id, self.lease, self.max_attempts)
+            except Exception as e:
+                logger.error(f"Failed to claim a job: {str(e)}")
+                job = None
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._execute(job)
+
+    async def _maybe_purge(self):
+        now = time.monotonic()
+        if now >= self._next_purge:
+            self._next_purge = now + 3600
+            purged = await asyncio.to_thread(self.store.purge, self.retention_days)
+            if purged:
+                logger.info(f"Purged {purged} finished jobs")
+
+    async def _execute(self, job: Dict[str, Any]):
+        job_id = job["job_id"]
+        logger.info(f"Running job {job_id} ({job['kind']}, attempt {job['attempts']})")
+
+        async def progress(partial: Dict[str, Any]):
+            await asyncio.to_thread(self.store.save_progress, job_id, partial)
+
+        async def keep_lease():
+            while True:
+                await asyncio.sleep(self.lease / 3)
+                await asyncio.to_thread(self.store.heartbeat, job_id, self.worker_id)
+
+        self.running += 1
+        lease_task = asyncio.create_task(keep_lease())
+        try:
+            result = await self.handlers[job["kind"]](job["payload"], progress)
+            await asyncio.to_thread(self.store.finish, job_id, self.worker_id, "succeeded", result)
+            self.completed += 1
+        except asyncio.CancelledError:
+            # Shutting down: let another worker pick the job up right away.
+            # Shielded so a second cancel cannot interrupt the update
+            await asyncio.shield(asyncio.to_thread(self.store.requeue, job_id, self.worker_id))
+            raise
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {str(e)}")
+            await asyncio.to_thread(self.store.finish, job_id, self.worker_id, "failed", None, str(e))
+            self.failed += 1
+        finally:
+            lease_task.cancel()
+            self.running -= 1
+        await self._notify(job_id)
+
+    async def _notify(self, job_id: str):
+        """POST the finished job to its webhook, retrying with backoff"""
+        job = await asyncio.to_thread(self.store.get, job_id)
+        if not job or not job["webhook_url"]:
+            return
+        body = {key: job[key] for key in ("job_id", "kind", "status", "result", "error", "finished_at")}
+        status = "failed"
+        # Redirects are not followed: a public URL could bounce the POST to an internal one
+        async with httpx.AsyncClient(timeout=self.webhook_timeout, follow_redirects=False) as client:
+            for attempt in range(self.webhook_retries):
+                try:
+                    # Checked again before every attempt, the host's DNS may have changed since submit
+                    await asyncio.to_thread(check_webhook_url, job["webhook_url"], self.webhook_allowed_hosts)
+                    response = await client.post(job["webhook_url"], json=body)
+                    if response.status_code < 400:
+                        status = "delivered"
+                        break
+                    status = f"failed: HTTP {response.status_code}"
+                except WebhookURLError as e:
+                    status = f"rejected: {str(e)}"
+                    break
+                except httpx.HTTPError as e:
+                    status = f"failed: {type(e).__name__}"
+                if attempt + 1 < self.webhook_retries:
+                    await asyncio.sleep(2 ** attempt)
+        await asyncio.to_thread(self.store.set_webhook_status, job_id, status)
+
+    def stats(self) -> Dict[str, Any]:
+        try:
+            counts = self.store.counts()
+        except Exception as e:
+            counts = {"error": str(e)}
+        return {
+            "workers": len(self._tasks),
+            "running": self.running,
+            "completed": self.completed,
+            "failed": self.failed,
+            "jobs": counts
+        }
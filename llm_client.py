@@ -0,0 +1,425 @@
+"""
+Shared async HTTP client for OpenRouter.
+
+One keep-alive (HTTP/2 when ``h2`` is installed) connection pool per process,
+with a concurrency limit, per-call timeouts below gunicorn's worker timeout,
+jittered exponential backoff on 429/5xx bounded by a retry budget, a circuit
+breaker and optional hedged requests for tail latency.
+
+Blocking agents run in the agent executor's threads; they get a
+``SyncLLMClient`` that submits each call to the event loop the client was
+started on, so their calls share the same pool, breaker and metrics.
+"""
+from typing import Dict, Any, Optional
+import asyncio
+import inspect
+import logging
+import os
+import random
+import time
+
+import httpx
+
+from metrics import LLM_REQUESTS, LLM_LATENCY, LLM_RETRIES, LLM_TOKENS, LLM_IN_FLIGHT, current_agent
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling the provider while the circuit is open"""
+
+
+class LLMRequestError(Exception):
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class RetryBudget:
+    """
+    Caps retries to a fraction of regular traffic.
+
+    Every request deposits ``ratio`` tokens and every retry spends one, so
+    when the provider is struggling we stop multiplying load on it.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_tokens: float = 10, max_tokens: float = 100):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = min_tokens
+        self.exhausted = 0
+
+    def deposit(self):
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        self.exhausted += 1
+        return False
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures and lets one trial call through after a cool-down"""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_flight = False
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self.trial_in_flight:
+            self.trial_in_flight = True
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.trial_in_flight = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+    def release_trial(self):
+        """End a trial call that finished without an outcome, e.g. because it was cancelled"""
+        self.trial_in_flight = False
+
+
+class LLMClient:
+    def __init__(
+        self,
+        base_url: str = "https://openrouter.ai/api/v1",
+        api_key: Optional[str] = None,
+        timeout: float = 60,
+        connect_timeout: float = 5,
+        deadline: float = 100,
+        max_connections: int = 20,
+        max_keepalive: int = 10,
+        max_concurrency: int = 16,
+        max_retries: int = 3,
+        retry_ratio: float = 0.2,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8,
+        hedge_after: float = 0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30,
+        http2: bool = True
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.deadline = deadline
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive)
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge_after = hedge_after
+        self.http2 = http2
+        self.budget = RetryBudget(retry_ratio)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.http2_active = False
+        self.requests = 0
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.failures = 0
+        self.in_flight = 0
+
+    @classmethod
+    def from_env(cls) -> "LLMClient":
+        """Build a client from OPENROUTER_* and LLM_* environment variables"""
+        return cls(
+            base_url=os.environ.get("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1"),
+            api_key=os.environ.get("OPENROUTER_API_KEY"),
+            timeout=float(os.environ.get("LLM_TIMEOUT", 60)),
+            deadline=float(os.environ.get("LLM_DEADLINE", 100)),
+            max_connections=int(os.environ.get("LLM_MAX_CONNECTIONS", 20)),
+            max_concurrency=int(os.environ.get("LLM_MAX_CONCURRENCY", 16)),
+            max_retries=int(os.environ.get("LLM_MAX_RETRIES", 3)),
+            retry_ratio=float(os.environ.get("LLM_RETRY_BUDGET", 0.2)),
+            hedge_after=float(os.environ.get("LLM_HEDGE_AFTER", 0)),
+            failure_threshold=int(os.environ.get("LLM_CIRCUIT_FAILURES", 5)),
+            reset_timeout=float(os.environ.get("LLM_CIRCUIT_RESET", 30)),
+            http2=os.environ.get("LLM_HTTP2", "true").lower() == "true"
+        )
+
+    async def start(self):
+        """Open the connection pool; called from the app lifespan"""
+        if self._client is not None:
+            return
+        http2 = self.http2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("h2 is not installed, using HTTP/1.1 keep-alive for LLM calls")
+                http2 = False
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers=headers,
+            timeout=self.timeout,
+            limits=self.limits,
+            http2=http2
+        )
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._loop = asyncio.get_running_loop()
+        self.http2_active = http2
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._loop = None
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        # Full jitter keeps retries from many workers from synchronizing
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def _send(self, path: str, payload: Dict[str, Any]) -> httpx.Response:
+        async with self._semaphore:
+            self.in_flight += 1
+            LLM_IN_FLIGHT.inc()
+            try:
+                return await self._client.post(path, json=payload)
+            finally:
+                self.in_flight -= 1
+                LLM_IN_FLIGHT.dec()
+
+    async def _hedged_send(self, path: str, payload: Dict[str, Any]) -> httpx.Response:
+        """Send, and if no answer arrives within hedge_after, race a second copy"""
+        if not self.hedge_after:
+            return await self._send(path, payload)
+        primary = asyncio.ensure_future(self._send(path, payload))
+        pending = {primary}
+        error: Optional[BaseException] = None
+        # Pending sends are cancelled on every exit, including the caller's
+        # wait_for cancelling us during the first wait
+        try:
+            done, pending = await asyncio.wait(pending, timeout=self.hedge_after)
+            if done:
+                return primary.result()
+            self.hedges += 1
+            hedge = asyncio.ensure_future(self._send(path, payload))
+            pending = {primary, hedge}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def post_json(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """POST ``payload`` and return the decoded JSON body, retrying transient failures"""
+        if self._client is None:
+            await self.start()
+        agent = current_agent.get()
+        if not self.breaker.allow():
+            LLM_REQUESTS.labels(agent, "circuit_open").inc()
+            raise CircuitOpenError("LLM provider circuit is open; failing fast")
+        # Only the half-open trial call holds the flag; it must always be
+        # cleared, or every later call would be rejected until a restart
+        trial = self.breaker.trial_in_flight
+
+        self.requests += 1
+        self.budget.deposit()
+        started = time.monotonic()
+        try:
+            return await self._post_with_retries(path, payload, agent, started, trial)
+        except LLMRequestError:
+            raise
+        except Exception:
+            # Unexpected errors, e.g. an undecodable body, count as failures
+            self.failures += 1
+            self.breaker.record_failure()
+            self._record(agent, "error", started)
+            raise
+        except BaseException:
+            # Cancelled: no outcome, so let the next call be the trial
+            if trial:
+                self.breaker.release_trial()
+            raise
+
+    async def _post_with_retries(
+        self,
+        path: str,
+        payload: Dict[str, Any],
+        agent: str,
+        started: float,
+        trial: bool = False
+    ) -> Dict[str, Any]:
+        deadline = started + self.deadline
+        attempt = 0
+        while True:
+            retry_after = None
+            try:
+                response = await asyncio.wait_for(self._hedged_send(path, payload), timeout=max(0.1, deadline - time.monotonic()))
+                if response.status_code < 400:
+                    body = response.json()
+                    self.breaker.record_success()
+                    self._record(agent, "ok", started, body)
+                    return body
+                error = LLMRequestError(f"LLM provider returned {response.status_code}: {response.text[:200]}", response.status_code)
+                retryable = response.status_code in RETRYABLE_STATUS
+                retry_after = response.headers.get("Retry-After")
+            except (httpx.TransportError, asyncio.TimeoutError) as e:
+                error = LLMRequestError(f"LLM request failed: {type(e).__name__}: {str(e)}")
+                retryable = True
+
+            delay = self._backoff(attempt, retry_after)
+            if (
+                not retryable
+                or attempt >= self.max_retries
+                or time.monotonic() + delay >= deadline
+                or not self.budget.withdraw()
+            ):
+                self.failures += 1
+                if retryable:
+                    self.breaker.record_failure()
+                elif trial:
+                    # A rejected request says nothing about the provider's
+                    # health either way; let the next call be the trial
+                    self.breaker.release_trial()
+                self._record(agent, "error", started)
+                raise error
+            attempt += 1
+            self.retries += 1
+            LLM_RETRIES.labels(agent).inc()
+            logger.warning(f"Retrying LLM call in {delay:.2f}s (attempt {attempt}): {str(error)}")
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    def _record(agent: str, outcome: str, started: float, body: Optional[Dict[str, Any]] = None):
+        LLM_REQUESTS.labels(agent, outcome).inc()
+        LLM_LATENCY.labels(agent).observe(time.monotonic() - started)
+        usage = body.get("usage") if isinstance(body, dict) else None
+        if isinstance(usage, dict):
+            for kind in ("prompt_tokens", "completion_tokens"):
+                if isinstance(usage.get(kind), (int, float)):
+                    LLM_TOKENS.labels(agent, kind.split("_")[0]).inc(usage[kind])
+
+    async def chat_completion(self, model: str, messages: list, **options) -> Dict[str, Any]:
+        """OpenRouter /chat/completions call"""
+        return await self.post_json("/chat/completions", {"model": model, "messages": messages, **options})
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "started": self._client is not None,
+            "http2": self.http2_active,
+            "requests": self.requests,
+            "retries": self.retries,
+            "retry_budget_tokens": round(self.budget.tokens, 2),
+            "retry_budget_exhausted": self.budget.exhausted,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "failures": self.failures,
+            "in_flight": self.in_flight,
+            "circuit": self.breaker.state,
+            "circuit_rejected": self.breaker.rejected
+        }
+
+
+class SyncLLMClient:
+    """
+    Blocking view of an LLMClient for agents running in worker threads.
+
+    Each call is run on the client's event loop and waited for in the
+    calling thread; the agent name of the calling context goes along, so
+    metrics stay attributed. Must not be called from the loop's own thread.
+    """
+
+    def __init__(self, client: LLMClient):
+        self.client = client
+
+    def _run(self, coro) -> Dict[str, Any]:
+        loop = self.client._loop
+        if loop is None or loop.is_closed():
+            coro.close()
+            raise RuntimeError("LLM client is not started")
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            coro.close()
+            raise RuntimeError("SyncLLMClient called from the event loop thread; await the LLMClient instead")
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        try:
+            # post_json enforces the deadline; this only guards a stuck loop
+            return future.result(timeout=self.client.deadline + 5)
+        except BaseException:
+            future.cancel()
+            raise
+
+    def post_json(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        return self._run(self.client.post_json(path, payload))
+
+    def chat_completion(self, model: str, messages: list, **options) -> Dict[str, Any]:
+        return self._run(self.client.chat_completion(model, messages, **options))
+
+    def stats(self) -> Dict[str, Any]:
+        return self.client.stats()
+
+
+# Shared client for the process; the app lifespan opens and closes it
+llm_client = LLMClient.from_env()
+
+
+def _is_async_agent(agent: Any) -> bool:
+    return any(
+        inspect.iscoroutinefunction(getattr(type(agent), name, None))
+        for name in dir(type(agent))
+        if not name.startswith("_")
+    )
+
+
+def attach_llm_client(*agents: Any, client: Optional[LLMClient] = None):
+    """
+    Point agents at the shared client so they reuse its connection pool.
+
+    Agents with coroutine methods are awaited on the event loop and get the
+    LLMClient itself; blocking agents run in executor threads and get a
+    SyncLLMClient over it.
+    """
+    client = client or llm_client
+    for agent in agents:
+        setattr(agent, "llm_client", client if _is_async_agent(agent) else SyncLLMClient(client))
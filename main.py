@@ -1,11 +1,13 @@
 from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import RedirectResponse
+from fastapi.responses import RedirectResponse, JSONResponse
 import os
 import sys
 import importlib
 import logging
+import asyncio
+from contextlib import asynccontextmanager
 from datetime import datetime
 
 # Configure logging
@@ -21,8 +23,56 @@ if current_dir not in sys.path:
     sys.path.insert(0, current_dir)
     logger.debug(f"Added {current_dir} to Python path")
 
+# Imported after the path setup so they resolve when started from another directory
+from agent_registry import AgentRegistry  # noqa: E402
+from metrics import MetricsMiddleware, render as render_metrics  # noqa: E402
+from responses import FastJSONResponse, CompressionMiddleware  # noqa: E402
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Open the shared OpenRouter connection pool once per worker
+    from llm_client import llm_client
+    await llm_client.start()
+    app.state.llm_client = llm_client
+
+    # Start background retention/backup/VACUUM for content memory
+    app.state.memory_maintenance = None
+    if os.environ.get("MEMORY_MAINTENANCE_ENABLED", "true").lower() == "true":
+        try:
+            from memory import get_content_memory
+            from memory_maintenance import MemoryMaintenance
+            app.state.memory_maintenance = MemoryMaintenance.from_env(get_content_memory())
+            app.state.memory_maintenance.start()
+        except Exception as e:
+            logger.error(f"Failed to start memory maintenance: {str(e)}")
+    # AGENT_PRELOAD=true loads every agent before this worker takes traffic;
+    # an agent that fails to load is reported on /ready
+    if os.environ.get("AGENT_PRELOAD", "false").lower() == "true":
+        await asyncio.to_thread(agent_registry.load_all)
+    # Load agents in the background once the server is accepting traffic
+    app.state.agent_warmup = None
+    if os.environ.get("AGENT_WARMUP", "true").lower() == "true":
+        app.state.agent_warmup = asyncio.create_task(agent_registry.warm_up())
+    yield
+    if app.state.agent_warmup is not None:
+        app.state.agent_warmup.cancel()
+    if app.state.memory_maintenance is not None:
+        await app.state.memory_maintenance.stop()
+    await llm_client.aclose()
+
 # Create FastAPI app
-app = FastAPI(title="TitanFlow Content Creation API")
+app = FastAPI(title="TitanFlow Content Creation API", lifespan=lifespan, default_response_class=FastJSONResponse)
+
+# Compress large JSON responses (brotli or gzip); streams pass through
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=int(os.environ.get("RESPONSE_COMPRESSION_MIN_SIZE", 1024)),
+    gzip_level=int(os.environ.get("RESPONSE_GZIP_LEVEL", 6)),
+    brotli_quality=int(os.environ.get("RESPONSE_BROTLI_QUALITY", 4))
+)
+
+# Request latency and in-flight metrics
+app.add_middleware(MetricsMiddleware)
 
 # Add CORS middleware
 app.add_middleware(
@@ -46,8 +96,29 @@ agent_modules = {
     "/visual": "simple_visual_planner_agent"
 }
 
-# Dictionary to track loaded agents
-loaded_agents = {}
+# Agent apps are imported on first request or by the warm-up task
+agent_registry = AgentRegistry()
+
+class LazyAgentApp:
+    """ASGI app that imports its agent module on first use and forwards to it"""
+
+    def __init__(self, module_name: str):
+        self.module_name = module_name
+
+    async def __call__(self, scope, receive, send):
+        try:
+            agent_app = await agent_registry.aget(self.module_name)
+        except Exception as e:
+            if scope["type"] == "http":
+                response = JSONResponse({"detail": f"Agent {self.module_name} is unavailable: {str(e)}"}, status_code=503)
+                await response(scope, receive, send)
+            return
+        await agent_app(scope, receive, send)
+
+def _agent_loader(module_name: str):
+    def load():
+        return importlib.import_module(f"agents.{module_name}").app
+    return load
 
 # Mount agent apps
 agents_dir = os.path.join(current_dir, "agents")
@@ -56,29 +127,43 @@ if os.path.exists(agents_dir):
     for mount_path, module_name in agent_modules.items():
         module_path = os.path.join(agents_dir, f"{module_name}.py")
         if os.path.exists(module_path):
-            try:
-                logger.info(f"Loading agent module {module_name}")
-                module = importlib.import_module(f"agents.{module_name}")
-                app.mount(mount_path, module.app)
-                loaded_agents[mount_path] = module_name
-                logger.info(f"Successfully mounted {module_name} at {mount_path}")
-            except Exception as e:
-                logger.error(f"Failed to mount {module_name}: {str(e)}")
+            agent_registry.register(module_name, _agent_loader(module_name))
+            app.mount(mount_path, LazyAgentApp(module_name))
+            logger.info(f"Mounted {module_name} at {mount_path} (loaded on demand)")
         else:
             logger.warning(f"Agent module {module_name} not found at {module_path}")
 else:
     logger.warning("Agents directory not found")
 
-# Health check endpoint
+# Health check endpoint (liveness: never waits for agents)
 @app.get("/health")
 async def health_check():
     return {
         "status": "healthy",
         "timestamp": datetime.utcnow().isoformat(),
         "python_version": sys.version,
-        "loaded_agents": loaded_agents
+        "loaded_agents": agent_registry.stats()["agents"],
+        "memory_maintenance": app.state.memory_maintenance.stats() if getattr(app.state, "memory_maintenance", None) else None,
+        "llm_client": app.state.llm_client.stats() if getattr(app.state, "llm_client", None) else None
     }
 
+# Prometheus metrics, aggregated over all gunicorn workers in multiprocess mode
+@app.get("/metrics")
+async def metrics():
+    body, content_type, status_code = render_metrics()
+    return Response(body, media_type=content_type, status_code=status_code)
+
+# Readiness endpoint: 503 until every mounted agent has loaded. The platform
+# healthcheck uses /health: with AGENT_WARMUP=false or a failing agent this
+# would never turn ready
+@app.get("/ready")
+async def readiness_check():
+    stats = agent_registry.stats()
+    return JSONResponse(
+        {"status": "ready" if stats["ready"] else "not ready", "timestamp": datetime.utcnow().isoformat(), **stats},
+        status_code=200 if stats["ready"] else 503
+    )
+
 # Root endpoint
 @app.get("/")
 async def root(request: Request):
@@ -104,7 +189,7 @@ async def debug():
     return {
         "python_path": sys.path,
         "current_directory": current_dir,
-        "loaded_agents": loaded_agents,
+        "loaded_agents": agent_registry.stats()["agents"],
         "static_directory": {
             "exists": os.path.exists(static_dir),
             "contents": os.listdir(static_dir) if os.path.exists(static_dir) else None
@@ -1,71 +1,699 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Iterable, Iterator, Tuple, Union
+from contextlib import contextmanager
+from dataclasses import dataclass
+import argparse
 import sqlite3
-import json
+import queue
+import threading
+import time
 from datetime import datetime, timedelta
 import os
 
+import memory_codecs
+import memory_search
+import trend_rollups
+
+DEFAULT_DATA_DIR = "/app/data"
+
+# SQL is kept in module constants so every pooled connection reuses the same
+# compiled statements from its statement cache instead of re-preparing them.
+_CREATE_CONTENT_TABLE = '''
+    CREATE TABLE IF NOT EXISTS content_memory (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        video_id TEXT UNIQUE,
+        platform TEXT,
+        analysis_data TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+'''
+_CREATE_CONTENT_RETENTION_INDEX = '''
+    CREATE INDEX IF NOT EXISTS idx_content_memory_last_updated
+    ON content_memory (last_updated)
+'''
+_CREATE_RESULT_CACHE_TABLE = '''
+    CREATE TABLE IF NOT EXISTS result_cache (
+        cache_key TEXT PRIMARY KEY,
+        result_data TEXT,
+        expires_at REAL
+    )
+'''
+_CREATE_RESULT_CACHE_EXPIRY_INDEX = '''
+    CREATE INDEX IF NOT EXISTS idx_result_cache_expires_at
+    ON result_cache (expires_at)
+'''
+# Analyses shared by many videos (one incremental /analyze batch) are stored
+# once here; the per-video rows only reference their analysis_id
+_CREATE_ANALYSIS_BATCH_TABLE = '''
+    CREATE TABLE IF NOT EXISTS analysis_batches (
+        analysis_id TEXT PRIMARY KEY,
+        analysis_data TEXT,
+        last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+'''
+_CREATE_ANALYSIS_BATCH_RETENTION_INDEX = '''
+    CREATE INDEX IF NOT EXISTS idx_analysis_batches_last_updated
+    ON analysis_batches (last_updated)
+'''
+_UPSERT_ANALYSIS_BATCH = '''
+    INSERT INTO analysis_batches (analysis_id, analysis_data, last_updated)
+    VALUES (?, ?, CURRENT_TIMESTAMP)
+    ON CONFLICT (analysis_id) DO UPDATE SET
+        analysis_data = excluded.analysis_data,
+        last_updated = CURRENT_TIMESTAMP
+'''
+_SELECT_ANALYSIS_BATCHES = '''
+    SELECT analysis_id, analysis_data FROM analysis_batches
+    WHERE analysis_id IN ({placeholders}) AND last_updated > datetime('now', ?)
+'''
+_DELETE_OLD_ANALYSIS_BATCHES_BATCH = '''
+    DELETE FROM analysis_batches WHERE analysis_id IN (
+        SELECT analysis_id FROM analysis_batches
+        WHERE last_updated < datetime('now', ?)
+        LIMIT ?
+    )
+'''
+# ON CONFLICT keeps the row id stable and fires the search index triggers,
+# which INSERT OR REPLACE would silently skip
+_UPSERT_CONTENT = '''
+    INSERT INTO content_memory
+    (video_id, platform, analysis_data, title, description, niche, problem,
+     hook_types, views, published_at, last_updated)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+    ON CONFLICT (video_id) DO UPDATE SET
+        platform = excluded.platform,
+        analysis_data = excluded.analysis_data,
+        title = excluded.title,
+        description = excluded.description,
+        niche = excluded.niche,
+        problem = excluded.problem,
+        hook_types = excluded.hook_types,
+        views = excluded.views,
+        published_at = excluded.published_at,
+        last_updated = CURRENT_TIMESTAMP
+'''
+_SELECT_CONTENT = '''
+    SELECT analysis_data FROM content_memory
+    WHERE video_id = ? AND last_updated > datetime('now', ?)
+'''
+_DELETE_OLD_CONTENT_BATCH = '''
+    DELETE FROM content_memory WHERE id IN (
+        SELECT id FROM content_memory
+        WHERE last_updated < datetime('now', ?)
+        LIMIT ?
+    )
+'''
+_SELECT_CACHED_RESULT = '''
+    SELECT result_data FROM result_cache
+    WHERE cache_key = ? AND expires_at > ?
+'''
+_UPSERT_CACHED_RESULT = '''
+    INSERT OR REPLACE INTO result_cache
+    (cache_key, result_data, expires_at)
+    VALUES (?, ?, ?)
+'''
+_DELETE_EXPIRED_RESULTS_BATCH = '''
+    DELETE FROM result_cache WHERE cache_key IN (
+        SELECT cache_key FROM result_cache
+        WHERE expires_at < ?
+        LIMIT ?
+    )
+'''
+_SELECT_CONTENT_MANY = '''
+    SELECT video_id, analysis_data FROM content_memory
+    WHERE video_id IN ({placeholders}) AND last_updated > datetime('now', ?)
+'''
+_SELECT_CONTENT_PAGE = '''
+    SELECT id, analysis_data FROM content_memory
+    WHERE id > ?
+    ORDER BY id
+    LIMIT ?
+'''
+_SELECT_CONTENT_ROWS_MANY = '''
+    SELECT video_id, platform, analysis_data FROM content_memory
+    WHERE video_id IN ({placeholders})
+'''
+_SELECT_CREATED_DAYS = '''
+    SELECT video_id, date(created_at) FROM content_memory
+    WHERE video_id IN ({placeholders})
+'''
+_SELECT_ROLLUP_PAGE = '''
+    SELECT id, video_id, platform, analysis_data, date(created_at) FROM content_memory
+    WHERE id > ?
+    ORDER BY id
+    LIMIT ?
+'''
+_UPDATE_CONTENT_DATA = 'UPDATE content_memory SET analysis_data = ? WHERE id = ?'
+_UPDATE_SEARCH_FIELDS = '''
+    UPDATE content_memory
+    SET title = ?, description = ?, niche = ?, problem = ?, hook_types = ?, views = ?, published_at = ?
+    WHERE id = ?
+'''
+_ITER_CONTENT = '''
+    SELECT id, video_id, platform, analysis_data, last_updated FROM content_memory
+    WHERE id > ? {filters}
+    ORDER BY id
+    LIMIT ?
+'''
+
+
+@dataclass
+class MemoryConfig:
+    storage_type: str = "sqlite"
+    retention_days: int = 30
+    rollup_retention_days: int = 400
+    backup_enabled: bool = True
+    backup_interval: int = 86400
+    backup_location: str = "/app/backups"
+    backup_keep: int = 7
+    db_path: str = os.path.join(DEFAULT_DATA_DIR, "content_memory.db")
+    pool_size: int = 4
+    busy_timeout_ms: int = 5000
+    batch_size: int = 500
+    codec: str = "zlib"
+    cache_size_kb: int = 16384
+    mmap_size: int = 128 * 1024 * 1024
+
+    @classmethod
+    def from_env(cls) -> "MemoryConfig":
+        """Build a config from the MEMORY_* environment variables"""
+        data_dir = os.environ.get("MEMORY_DATA_DIR", DEFAULT_DATA_DIR)
+        return cls(
+            storage_type=os.environ.get("MEMORY_STORAGE_TYPE", "sqlite"),
+            retention_days=int(os.environ.get("MEMORY_RETENTION_DAYS", 30)),
+            rollup_retention_days=int(os.environ.get("MEMORY_ROLLUP_RETENTION_DAYS", 400)),
+            backup_enabled=os.environ.get("MEMORY_BACKUP_ENABLED", "true").lower() == "true",
+            backup_interval=int(os.environ.get("MEMORY_BACKUP_INTERVAL", 86400)),
+            backup_location=os.environ.get("MEMORY_BACKUP_LOCATION", "/app/backups"),
+            backup_keep=int(os.environ.get("MEMORY_BACKUP_KEEP", 7)),
+            db_path=os.environ.get("MEMORY_DB_PATH", os.path.join(data_dir, "content_memory.db")),
+            pool_size=int(os.environ.get("MEMORY_POOL_SIZE", 4)),
+            busy_timeout_ms=int(os.environ.get("MEMORY_BUSY_TIMEOUT_MS", 5000)),
+            batch_size=int(os.environ.get("MEMORY_BATCH_SIZE", 500)),
+            codec=os.environ.get("MEMORY_CODEC", "zlib")
+        )
+
+
+class ConnectionPool:
+    """
+    Small pool of long-lived SQLite connections shared between threads.
+
+    Connections are opened lazily up to ``size`` and run in autocommit mode;
+    callers open explicit transactions for writes.
+    """
+
+    def __init__(self, db_path: str, size: int = 4, busy_timeout_ms: int = 5000, cache_size_kb: int = 16384, mmap_size: int = 0):
+        self.db_path = db_path
+        self.size = max(1, size)
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cache_size_kb = cache_size_kb
+        self.mmap_size = mmap_size
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._all: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout_ms / 1000,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=256
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute(f"PRAGMA cache_size=-{int(self.cache_size_kb)}")
+        conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        return conn
+
+    def _acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if len(self._all) < self.size:
+                conn = self._connect()
+                self._all.append(conn)
+                return conn
+        return self._idle.get(timeout=self.busy_timeout_ms / 1000)
+
+    @contextmanager
+    def connection(self):
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put(conn)
+
+    def close(self):
+        with self._lock:
+            for conn in self._all:
+                conn.close()
+            self._all.clear()
+            self._idle = queue.LifoQueue()
+
+
+def _batched(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Yield lists of at most ``size`` items"""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _timestamp(value: Union[datetime, str]) -> str:
+    """Format a window bound the way SQLite's CURRENT_TIMESTAMP stores it"""
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    return value
+
+
 class ContentMemory:
     def __init__(self, config: MemoryConfig):
         self.config = config
-        self.db_path = "content_memory.db"
+        self.codec = memory_codecs.get_codec(config.codec)
+        self.db_path = os.path.abspath(config.db_path)
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self._pool = ConnectionPool(
+            self.db_path,
+            size=config.pool_size,
+            busy_timeout_ms=config.busy_timeout_ms,
+            cache_size_kb=config.cache_size_kb,
+            mmap_size=config.mmap_size
+        )
         self._initialize_database()
 
+    @contextmanager
+    def _transaction(self):
+        """Pooled connection inside a write transaction taken up front"""
+        with self._pool.connection() as conn:
+            # IMMEDIATE grabs the write lock at BEGIN so two workers never
+            # deadlock trying to upgrade read locks.
+            conn.execute("BEGIN IMMEDIATE")
+            yield conn
+            conn.execute("COMMIT")
+
+    def _retention_modifier(self) -> str:
+        return f"-{int(self.config.retention_days)} days"
+
     def _initialize_database(self):
         """Create the database and tables if they don't exist"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS content_memory (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    video_id TEXT UNIQUE,
-                    platform TEXT,
-                    analysis_data TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            conn.commit()
+        with self._transaction() as conn:
+            conn.execute(_CREATE_CONTENT_TABLE)
+            conn.execute(_CREATE_CONTENT_RETENTION_INDEX)
+            conn.execute(_CREATE_RESULT_CACHE_TABLE)
+            conn.execute(_CREATE_RESULT_CACHE_EXPIRY_INDEX)
+            conn.execute(_CREATE_ANALYSIS_BATCH_TABLE)
+            conn.execute(_CREATE_ANALYSIS_BATCH_RETENTION_INDEX)
+            self.fts_enabled, search_created = memory_search.ensure_search_schema(conn)
+            if not trend_rollups.ensure_rollup_schema(conn):
+                # First start with the rollup ledger: backfill from stored analyses
+                trend_rollups.clear(conn)
+                self._fill_rollups(conn)
+        if search_created:
+            # Search columns or index added to an existing database: fill them
+            # in batches, each in its own transaction, then rebuild the index
+            self.reindex_search()
+
+    def _content_row(self, video_id: str, platform: str, analysis_data: Dict[str, Any]) -> Tuple[Any, ...]:
+        return (video_id, platform, self.codec.encode(analysis_data), *memory_search.search_fields(analysis_data))
+
+    def _write_content(self, conn: sqlite3.Connection, items: List[Tuple[str, str, Dict[str, Any]]], rows: List[Tuple[Any, ...]]):
+        """
+        Upsert encoded ``rows`` for ``items`` and apply their rollup deltas.
+
+        A video's previous contribution is taken from the rollup ledger, so
+        it is replaced even when the content row itself has expired meanwhile;
+        analyses without a publish date count on the day the row was created.
+        """
+        video_ids = list(dict.fromkeys(video_id for video_id, _, _ in items))
+        sql = _SELECT_CREATED_DAYS.format(placeholders=",".join("?" * len(video_ids)))
+        created = dict(conn.execute(sql, video_ids).fetchall())
+        ledger = trend_rollups.load_ledger(conn, video_ids)
+        today = datetime.utcnow().strftime("%Y-%m-%d")
+        delta = trend_rollups.RollupDelta()
+        for video_id, platform, analysis_data in items:
+            day = created.setdefault(video_id, today)
+            ledger[video_id] = delta.replace(video_id, ledger.get(video_id), platform, analysis_data, day)
+        conn.executemany(_UPSERT_CONTENT, rows)
+        delta.apply(conn)
 
     def add_content(self, video_id: str, platform: str, analysis_data: Dict[str, Any]):
         """Add or update content analysis data"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT OR REPLACE INTO content_memory 
-                (video_id, platform, analysis_data, last_updated)
-                VALUES (?, ?, ?, CURRENT_TIMESTAMP)
-            ''', (video_id, platform, json.dumps(analysis_data)))
-            conn.commit()
+        row = self._content_row(video_id, platform, analysis_data)
+        with self._transaction() as conn:
+            self._write_content(conn, [(video_id, platform, analysis_data)], [row])
 
     def get_content(self, video_id: str) -> Dict[str, Any]:
         """Retrieve content analysis data"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT analysis_data FROM content_memory 
-                WHERE video_id = ? AND 
-                last_updated > datetime('now', '-? days')
-            ''', (video_id, self.config.retention_days))
-            result = cursor.fetchone()
+        with self._pool.connection() as conn:
+            result = conn.execute(_SELECT_CONTENT, (video_id, self._retention_modifier())).fetchone()
             if result:
-                return json.loads(result[0])
+                return memory_codecs.decode(result[0])
             return None
 
-    def cleanup_old_entries(self):
-        """Remove entries older than retention period"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                DELETE FROM content_memory 
-                WHERE last_updated < datetime('now', '-? days')
-            ''', (self.config.retention_days,))
-            conn.commit()
-
-    def backup_database(self):
-        """Create a backup of the database"""
+    def add_many(self, items: Iterable[Tuple[str, str, Dict[str, Any]]], batch_size: Optional[int] = None) -> int:
+        """
+        Add or update many (video_id, platform, analysis_data) rows.
+
+        Rows are written with executemany, one transaction per batch so a large
+        import never holds the write lock for long; trend rollups are updated in
+        the same transaction. Returns the number of rows.
+        """
+        batch_size = batch_size or self.config.batch_size
+        total = 0
+        for batch in _batched(items, batch_size):
+            rows = [self._content_row(video_id, platform, analysis_data) for video_id, platform, analysis_data in batch]
+            with self._transaction() as conn:
+                self._write_content(conn, batch, rows)
+            total += len(rows)
+        return total
+
+    def refresh_views(self, views: Dict[str, Any], batch_size: Optional[int] = None) -> int:
+        """
+        Store current view counts of known videos, keeping the rest of their analyses.
+
+        Refreshes ``last_updated`` like any write, so videos that keep being
+        seen do not expire, and moves their views in the trend rollups.
+        Returns the number of rows updated.
+        """
+        batch_size = batch_size or self.config.batch_size
+        total = 0
+        for batch in _batched(views, batch_size):
+            with self._transaction() as conn:
+                sql = _SELECT_CONTENT_ROWS_MANY.format(placeholders=",".join("?" * len(batch)))
+                items = []
+                for video_id, platform, data in conn.execute(sql, batch).fetchall():
+                    analysis_data = memory_codecs.decode(data)
+                    if isinstance(analysis_data, dict):
+                        items.append((video_id, platform, {**analysis_data, "views": views[video_id]}))
+                if items:
+                    rows = [self._content_row(video_id, platform, analysis_data) for video_id, platform, analysis_data in items]
+                    self._write_content(conn, items, rows)
+            total += len(items)
+        return total
+
+    def get_many(self, video_ids: Iterable[str], batch_size: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+        """Retrieve content analysis data for many videos, keyed by video_id"""
+        batch_size = batch_size or self.config.batch_size
+        results = {}
+        with self._pool.connection() as conn:
+            for batch in _batched(video_ids, batch_size):
+                sql = _SELECT_CONTENT_MANY.format(placeholders=",".join("?" * len(batch)))
+                for video_id, analysis_data in conn.execute(sql, (*batch, self._retention_modifier())):
+                    results[video_id] = memory_codecs.decode(analysis_data)
+        return results
+
+    def add_analysis_batch(self, analysis_id: str, analysis_data: Dict[str, Any]):
+        """Store an analysis shared by the videos whose rows reference ``analysis_id``"""
+        with self._transaction() as conn:
+            conn.execute(_UPSERT_ANALYSIS_BATCH, (analysis_id, self.codec.encode(analysis_data)))
+
+    def get_analysis_batches(self, analysis_ids: Iterable[str], batch_size: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+        """Retrieve shared analyses within the retention period, keyed by analysis_id"""
+        batch_size = batch_size or self.config.batch_size
+        results = {}
+        with self._pool.connection() as conn:
+            for batch in _batched(analysis_ids, batch_size):
+                sql = _SELECT_ANALYSIS_BATCHES.format(placeholders=",".join("?" * len(batch)))
+                for analysis_id, analysis_data in conn.execute(sql, (*batch, self._retention_modifier())):
+                    results[analysis_id] = memory_codecs.decode(analysis_data)
+        return results
+
+    def iter_content(
+        self,
+        platform: Optional[str] = None,
+        since: Optional[Union[datetime, str]] = None,
+        until: Optional[Union[datetime, str]] = None,
+        batch_size: Optional[int] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Stream stored analyses for a platform and/or last_updated window.
+
+        Rows are fetched in keyset-paginated batches, so no connection or read
+        transaction is held while the caller consumes them.
+        """
+        batch_size = batch_size or self.config.batch_size
+        filters, params = [], []
+        if platform:
+            filters.append("AND platform = ?")
+            params.append(platform)
+        if since:
+            filters.append("AND last_updated >= ?")
+            params.append(_timestamp(since))
+        if until:
+            filters.append("AND last_updated < ?")
+            params.append(_timestamp(until))
+        sql = _ITER_CONTENT.format(filters=" ".join(filters))
+
+        last_id = 0
+        while True:
+            with self._pool.connection() as conn:
+                rows = conn.execute(sql, (last_id, *params, batch_size)).fetchall()
+            for row_id, video_id, row_platform, analysis_data, last_updated in rows:
+                yield {
+                    "video_id": video_id,
+                    "platform": row_platform,
+                    "analysis_data": memory_codecs.decode(analysis_data),
+                    "last_updated": last_updated
+                }
+            if len(rows) < batch_size:
+                return
+            last_id = rows[-1][0]
+
+    def migrate_codec(self, codec: Optional[str] = None, batch_size: Optional[int] = None) -> Dict[str, int]:
+        """
+        Re-encode stored analyses with ``codec`` (the configured one by default).
+
+        Rows already in the target format are left alone and ``last_updated`` is
+        not touched, so the migration is safe to re-run or interrupt.
+        """
+        target = memory_codecs.get_codec(codec or self.config.codec)
+        batch_size = batch_size or self.config.batch_size
+        stats = {"scanned": 0, "migrated": 0}
+        last_id = 0
+        while True:
+            with self._pool.connection() as conn:
+                rows = conn.execute(_SELECT_CONTENT_PAGE, (last_id, batch_size)).fetchall()
+            if not rows:
+                return stats
+            updates = [
+                (target.encode(memory_codecs.decode(data)), row_id)
+                for row_id, data in rows
+                if memory_codecs.format_version(data) != target.version
+            ]
+            if updates:
+                with self._transaction() as conn:
+                    conn.executemany(_UPDATE_CONTENT_DATA, updates)
+            stats["scanned"] += len(rows)
+            stats["migrated"] += len(updates)
+            last_id = rows[-1][0]
+
+    def reindex_search(self, batch_size: Optional[int] = None) -> int:
+        """Re-extract search columns from every stored analysis and rebuild the FTS index"""
+        batch_size = batch_size or self.config.batch_size
+        total = 0
+        last_id = 0
+        while True:
+            with self._pool.connection() as conn:
+                rows = conn.execute(_SELECT_CONTENT_PAGE, (last_id, batch_size)).fetchall()
+            if not rows:
+                break
+            updates = [(*memory_search.search_fields(memory_codecs.decode(data)), row_id) for row_id, data in rows]
+            with self._transaction() as conn:
+                conn.executemany(_UPDATE_SEARCH_FIELDS, updates)
+            total += len(rows)
+            last_id = rows[-1][0]
+        if self.fts_enabled:
+            with self._transaction() as conn:
+                memory_search.rebuild_fts(conn)
+        return total
+
+    def search(self, **filters) -> Dict[str, Any]:
+        """
+        Paginated search with facet counts.
+
+        Accepts the keyword filters of ``memory_search.search``: query, platform,
+        niche, hook_type, min_views, max_views, published_after,
+        published_before, sort, limit, offset and facets.
+        """
+        with self._pool.connection() as conn:
+            return memory_search.search(conn, fts_enabled=self.fts_enabled, **filters)
+
+    def trends(self, **filters) -> Dict[str, Any]:
+        """
+        Top hook types, themes and emotional triggers from the trend rollups.
+
+        Accepts the keyword filters of ``trend_rollups.trends``: days, since,
+        until, platform, niche, group_by, dimensions and top_k.
+        """
+        with self._pool.connection() as conn:
+            return trend_rollups.trends(conn, **filters)
+
+    def _fill_rollups(self, conn: sqlite3.Connection, batch_size: Optional[int] = None) -> int:
+        batch_size = batch_size or self.config.batch_size
+        total = 0
+        last_id = 0
+        while True:
+            rows = conn.execute(_SELECT_ROLLUP_PAGE, (last_id, batch_size)).fetchall()
+            if not rows:
+                return total
+            delta = trend_rollups.RollupDelta()
+            for _, video_id, platform, data, day in rows:
+                delta.replace(video_id, None, platform, memory_codecs.decode(data), day)
+            delta.apply(conn)
+            total += len(rows)
+            last_id = rows[-1][0]
+
+    def rebuild_rollups(self, batch_size: Optional[int] = None) -> int:
+        """
+        Recompute the trend rollups from every stored analysis. Returns the rows scanned.
+
+        Only analyses still in content memory are counted again, so history
+        kept past the content retention window is lost.
+        """
+        with self._transaction() as conn:
+            trend_rollups.clear(conn)
+            return self._fill_rollups(conn, batch_size)
+
+    def vacuum(self):
+        """Rebuild the database file to reclaim space freed by deletes or migrations"""
+        with self._pool.connection() as conn:
+            conn.execute("VACUUM")
+
+    def get_cached_result(self, cache_key: str) -> Optional[str]:
+        """Retrieve a serialized API result if it has not expired"""
+        with self._pool.connection() as conn:
+            result = conn.execute(_SELECT_CACHED_RESULT, (cache_key, time.time())).fetchone()
+            if result:
+                return result[0]
+            return None
+
+    def put_cached_result(self, cache_key: str, result_data: str, ttl: float):
+        """Store a serialized API result shared by all workers"""
+        with self._transaction() as conn:
+            conn.execute(_UPSERT_CACHED_RESULT, (cache_key, result_data, time.time() + ttl))
+
+    def _delete_in_batches(self, sql: str, bound: Any, batch_size: int, pause: float) -> int:
+        deleted = 0
+        while True:
+            with self._transaction() as conn:
+                count = conn.execute(sql, (bound, batch_size)).rowcount
+            deleted += count
+            if count < batch_size:
+                return deleted
+            # Let other writers take the lock between batches
+            if pause:
+                time.sleep(pause)
+
+    def cleanup_old_entries(self, batch_size: Optional[int] = None, pause: float = 0.0) -> int:
+        """
+        Remove entries older than retention period.
+
+        Rows are deleted in short batches, each in its own transaction, so the
+        write lock is never held for long. Trend rollups outlive the analyses and
+        are pruned on their own retention window. Returns the number of analyses removed.
+        """
+        batch_size = batch_size or self.config.batch_size
+        deleted = self._delete_in_batches(_DELETE_OLD_CONTENT_BATCH, self._retention_modifier(), batch_size, pause)
+        self._delete_in_batches(_DELETE_OLD_ANALYSIS_BATCHES_BATCH, self._retention_modifier(), batch_size, pause)
+        self._delete_in_batches(_DELETE_EXPIRED_RESULTS_BATCH, time.time(), batch_size, pause)
+        with self._transaction() as conn:
+            trend_rollups.prune(conn, self.config.rollup_retention_days)
+        return deleted
+
+    def backup_database(self) -> str:
+        """
+        Create an online backup of the database.
+
+        Uses SQLite's backup API in a single step. In WAL mode that copies a
+        consistent snapshot under a read lock, so writers are never blocked and
+        the copy can't be torn. Backups beyond ``backup_keep`` are removed,
+        oldest first. Returns the backup path.
+        """
         backup_path = os.path.join(
             self.config.backup_location,
             f"content_memory_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
         )
         os.makedirs(os.path.dirname(backup_path), exist_ok=True)
-        os.system(f'cp {self.db_path} {backup_path}')
\ No newline at end of file
+        target = sqlite3.connect(backup_path)
+        try:
+            with self._pool.connection() as conn:
+                conn.backup(target)
+        finally:
+            target.close()
+        self._prune_backups()
+        return backup_path
+
+    def _prune_backups(self):
+        if self.config.backup_keep <= 0:
+            return
+        backups = sorted(
+            name for name in os.listdir(self.config.backup_location)
+            if name.startswith("content_memory_") and name.endswith(".db")
+        )
+        for name in backups[:-self.config.backup_keep]:
+            os.remove(os.path.join(self.config.backup_location, name))
+
+    def analyze(self):
+        """Refresh the query planner statistics"""
+        with self._pool.connection() as conn:
+            conn.execute("ANALYZE")
+
+    def close(self):
+        """Close all pooled connections"""
+        self._pool.close()
+
+
+_shared_memory: Optional[ContentMemory] = None
+_shared_memory_lock = threading.Lock()
+
+
+def get_content_memory() -> ContentMemory:
+    """Process-wide ContentMemory built from the environment on first use"""
+    global _shared_memory
+    with _shared_memory_lock:
+        if _shared_memory is None:
+            _shared_memory = ContentMemory(MemoryConfig.from_env())
+        return _shared_memory
+
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Content memory maintenance')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    migrate = subparsers.add_parser('migrate', help='Re-encode stored analyses with a storage codec')
+    migrate.add_argument('--codec', '-c', type=str, default=None, choices=sorted(memory_codecs.available_codecs()), help='Target codec (defaults to MEMORY_CODEC)')
+    migrate.add_argument('--batch-size', type=int, default=None, help='Rows per transaction')
+    migrate.add_argument('--vacuum', action='store_true', help='VACUUM afterwards to shrink the database file')
+    subparsers.add_parser('reindex', help='Rebuild search columns and the full-text index')
+    subparsers.add_parser('rollups', help='Recompute the trend rollups from stored analyses')
+
+    args = parser.parse_args()
+    memory = ContentMemory(MemoryConfig.from_env())
+
+    if args.command == 'migrate':
+        size_before = os.path.getsize(memory.db_path)
+        stats = memory.migrate_codec(args.codec, args.batch_size)
+        if args.vacuum:
+            memory.vacuum()
+        size_after = os.path.getsize(memory.db_path)
+        print(f"Scanned {stats['scanned']} rows, migrated {stats['migrated']}")
+        print(f"Database size: {size_before} -> {size_after} bytes")
+    elif args.command == 'reindex':
+        print(f"Reindexed {memory.reindex_search()} rows")
+    elif args.command == 'rollups':
+        print(f"Rolled up {memory.rebuild_rollups()} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Storage codecs for ContentMemory.analysis_data.
+
+Encoded values are BLOBs whose first byte is the format version, so rows
+written by any codec (and the original plain JSON TEXT rows) stay readable
+whatever codec is configured for new writes.
+"""
+from typing import Dict, Any, Callable, Optional, Union
+import json
+import logging
+import threading
+import zlib
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional codec
+    zstandard = None
+
+# Keys and values that repeat in almost every analysis. zlib and zstd use
+# them as a preset dictionary so even small rows compress well; the most
+# frequent strings go last because zlib favours the end of the dictionary.
+PRESET_DICTIONARY = (
+    '{"problems":[],"audiences":[],"solutions":[],"emotional_triggers":[],"niches":[],'
+    '"sub_niches":[],"pain_points":[],"value_propositions":[]},"niche_insights":{'
+    '"Fast-paced cuts with meme overlays and subtitles","Hook → Insight → Visual Demo → CTA",'
+    '"Direct CTAs","Open loops","question-based","shock-based","curiosity","listicle",'
+    '"summary":"The most effective viral videos use ","content_themes":["'
+    '"engagement_tactics":["","format_trends":["'
+    '{"hook_patterns":[{"type":"","example":""},{"type":"'
+).encode("utf-8")
+
+
+def dumps(value: Any) -> bytes:
+    """Compact JSON bytes, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class Codec:
+    """A named encoding identified on disk by its format-version byte"""
+
+    def __init__(self, name: str, version: int, encode: Callable[[bytes], bytes], decode: Callable[[bytes], bytes]):
+        self.name = name
+        self.version = version
+        self._encode = encode
+        self._decode = decode
+
+    def encode(self, value: Any) -> bytes:
+        return bytes((self.version,)) + self._encode(dumps(value))
+
+    def decode(self, data: bytes) -> Any:
+        return loads(self._decode(data[1:]))
+
+
+_codecs_by_name: Dict[str, Codec] = {}
+_codecs_by_version: Dict[int, Codec] = {}
+
+
+def register_codec(codec: Codec):
+    """Make a codec available for writing by name and for reading by version byte"""
+    if codec.version in _codecs_by_version and _codecs_by_version[codec.version].name != codec.name:
+        raise ValueError(f"Format version {codec.version} already used by {_codecs_by_version[codec.version].name}")
+    _codecs_by_name[codec.name] = codec
+    _codecs_by_version[codec.version] = codec
+
+
+def get_codec(name: str) -> Codec:
+    if name not in _codecs_by_name:
+        raise ValueError(f"Unknown memory codec {name!r}; available: {', '.join(sorted(_codecs_by_name))}")
+    return _codecs_by_name[name]
+
+
+def available_codecs() -> Dict[str, int]:
+    return {name: codec.version for name, codec in _codecs_by_name.items()}
+
+
+def _zlib_compress(data: bytes) -> bytes:
+    compressor = zlib.compressobj(level=6, wbits=-15, zdict=PRESET_DICTIONARY)
+    return compressor.compress(data) + compressor.flush()
+
+
+def _zlib_decompress(data: bytes) -> bytes:
+    decompressor = zlib.decompressobj(wbits=-15, zdict=PRESET_DICTIONARY)
+    return decompressor.decompress(data) + decompressor.flush()
+
+
+register_codec(Codec("json", 1, lambda data: data, lambda data: data))
+register_codec(Codec("zlib", 2, _zlib_compress, _zlib_decompress))
+
+if zstandard is not None:
+    _zstd_dictionary = zstandard.ZstdCompressionDict(PRESET_DICTIONARY, dict_type=zstandard.DICT_TYPE_RAWCONTENT)
+    # zstandard (de)compressors must not be shared between threads
+    _zstd_local = threading.local()
+
+    def _zstd_compress(data: bytes) -> bytes:
+        if not hasattr(_zstd_local, "compressor"):
+            _zstd_local.compressor = zstandard.ZstdCompressor(level=3, dict_data=_zstd_dictionary)
+        return _zstd_local.compressor.compress(data)
+
+    def _zstd_decompress(data: bytes) -> bytes:
+        if not hasattr(_zstd_local, "decompressor"):
+            _zstd_local.decompressor = zstandard.ZstdDecompressor(dict_data=_zstd_dictionary)
+        return _zstd_local.decompressor.decompress(data)
+
+    register_codec(Codec("zstd", 3, _zstd_compress, _zstd_decompress))
+
+
+def encode(value: Any, codec: str = "zlib") -> bytes:
+    """Encode an analysis for storage with the named codec"""
+    return get_codec(codec).encode(value)
+
+
+def decode(data: Union[bytes, str, None]) -> Optional[Any]:
+    """Decode a stored analysis written by any codec, or a legacy JSON TEXT row"""
+    if data is None:
+        return None
+    if isinstance(data, str):
+        return loads(data)
+    version = data[0]
+    if version not in _codecs_by_version:
+        raise ValueError(f"Unsupported analysis_data format version {version}")
+    return _codecs_by_version[version].decode(data)
+
+
+def format_version(data: Union[bytes, str]) -> int:
+    """Format version of a stored value; 0 for legacy JSON TEXT rows"""
+    if isinstance(data, str):
+        return 0
+    return data[0]
@@ -0,0 +1,193 @@
+from typing import Dict, Any, Optional, Callable
+from datetime import datetime
+import asyncio
+import json
+import logging
+import os
+import time
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+from memory import ContentMemory
+
+logger = logging.getLogger(__name__)
+
+
+class MaintenanceTask:
+    """One periodic job and the timings of its runs"""
+
+    def __init__(self, name: str, interval: float, action: Callable[[], Any]):
+        self.name = name
+        self.interval = interval
+        self.action = action
+        self.next_run = time.monotonic() + min(interval, 60)
+        self.runs = 0
+        self.failures = 0
+        self.last_run: Optional[str] = None
+        self.last_duration_ms: Optional[float] = None
+        self.last_result: Any = None
+        self.last_error: Optional[str] = None
+
+    def due(self, now: float) -> bool:
+        return self.interval > 0 and now >= self.next_run
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "interval": self.interval,
+            "runs": self.runs,
+            "failures": self.failures,
+            "last_run": self.last_run,
+            "last_duration_ms": self.last_duration_ms,
+            "last_result": self.last_result,
+            "last_error": self.last_error
+        }
+
+
+class MemoryMaintenance:
+    """
+    Background retention, backup, VACUUM and ANALYZE for ContentMemory.
+
+    Runs inside the app's event loop and executes each job in a worker thread.
+    With several gunicorn workers an advisory file lock next to the database
+    makes sure only one of them runs a given round, and the wall-clock time
+    each task last ran is kept in a state file next to it, so a round one
+    worker has finished is not repeated by the others (or after a restart).
+    """
+
+    def __init__(
+        self,
+        memory: ContentMemory,
+        cleanup_interval: float = 3600,
+        backup_interval: float = 86400,
+        vacuum_interval: float = 7 * 86400,
+        analyze_interval: float = 86400,
+        tick: float = 30,
+        delete_pause: float = 0.05
+    ):
+        self.memory = memory
+        self.tick = tick
+        self.delete_pause = delete_pause
+        self.tasks = [
+            MaintenanceTask("cleanup", cleanup_interval, self._cleanup),
+            MaintenanceTask("backup", backup_interval if memory.config.backup_enabled else 0, memory.backup_database),
+            MaintenanceTask("vacuum", vacuum_interval, memory.vacuum),
+            MaintenanceTask("analyze", analyze_interval, memory.analyze)
+        ]
+        self.lock_path = f"{memory.db_path}.maintenance.lock"
+        self.state_path = f"{memory.db_path}.maintenance.json"
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_env(cls, memory: ContentMemory) -> "MemoryMaintenance":
+        """Build the scheduler from MEMORY_* environment variables"""
+        return cls(
+            memory,
+            cleanup_interval=float(os.environ.get("MEMORY_CLEANUP_INTERVAL", 3600)),
+            backup_interval=float(memory.config.backup_interval),
+            vacuum_interval=float(os.environ.get("MEMORY_VACUUM_INTERVAL", 7 * 86400)),
+            analyze_interval=float(os.environ.get("MEMORY_ANALYZE_INTERVAL", 86400)),
+            tick=float(os.environ.get("MEMORY_MAINTENANCE_TICK", 30))
+        )
+
+    def _cleanup(self) -> int:
+        return self.memory.cleanup_old_entries(pause=self.delete_pause)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+            logger.info("Memory maintenance started")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.tick)
+            try:
+                await self.run_due()
+            except Exception as e:
+                logger.error(f"Memory maintenance round failed: {str(e)}")
+
+    async def run_due(self):
+        """Run every task whose interval has elapsed"""
+        now = time.monotonic()
+        due = [task for task in self.tasks if task.due(now)]
+        if not due:
+            return
+        lock = self._try_lock()
+        if lock is False:
+            # Another worker is running a round; the shared state decides next tick
+            return
+        try:
+            state = await asyncio.to_thread(self._load_state)
+            for task in due:
+                elapsed = time.time() - state.get(task.name, 0)
+                if elapsed < task.interval:
+                    # Another worker ran it within the interval
+                    task.next_run = time.monotonic() + task.interval - elapsed
+                    continue
+                await self._run(task)
+                state[task.name] = time.time()
+                await asyncio.to_thread(self._save_state, state)
+        finally:
+            if lock is not None:
+                lock.close()
+
+    def _load_state(self) -> Dict[str, float]:
+        """Wall-clock time each task last ran in any worker"""
+        try:
+            with open(self.state_path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return {name: float(value) for name, value in state.items()} if isinstance(state, dict) else {}
+
+    def _save_state(self, state: Dict[str, float]):
+        # Written aside and renamed so a crash never leaves a torn file
+        temporary = f"{self.state_path}.{os.getpid()}.tmp"
+        with open(temporary, "w") as f:
+            json.dump(state, f)
+        os.replace(temporary, self.state_path)
+
+    async def _run(self, task: MaintenanceTask):
+        started = time.perf_counter()
+        task.last_run = datetime.utcnow().isoformat()
+        try:
+            task.last_result = await asyncio.to_thread(task.action)
+            task.last_error = None
+        except Exception as e:
+            task.failures += 1
+            task.last_error = str(e)
+            logger.error(f"Memory maintenance task {task.name} failed: {str(e)}")
+        task.runs += 1
+        task.last_duration_ms = round((time.perf_counter() - started) * 1000, 1)
+        task.next_run = time.monotonic() + task.interval
+        logger.info(f"Memory maintenance task {task.name} finished in {task.last_duration_ms}ms")
+
+    def _try_lock(self):
+        """Open file holding the maintenance lock, None without fcntl, False if busy"""
+        if fcntl is None:
+            return None
+        handle = open(self.lock_path, "w")
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return False
+        return handle
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-task timings for /health"""
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "tasks": {task.name: task.stats() for task in self.tasks}
+        }
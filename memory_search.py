@@ -0,0 +1,292 @@
+"""
+Full-text and faceted search over ContentMemory.
+
+Searchable metadata is copied out of each stored analysis into indexed
+columns of ``content_memory`` (platform, views, published date, niche) and
+into an FTS5 index over titles, descriptions, niches, problems and hook
+types that triggers keep in sync with the table.
+"""
+from typing import Dict, Any, List, Optional, Tuple
+import json
+import logging
+import re
+import sqlite3
+
+logger = logging.getLogger(__name__)
+
+# Columns added to content_memory; ALTER TABLE upgrades older databases
+SEARCH_COLUMNS = {
+    "title": "TEXT",
+    "description": "TEXT",
+    "niche": "TEXT",
+    "problem": "TEXT",
+    "hook_types": "TEXT",
+    "views": "INTEGER",
+    "published_at": "TEXT"
+}
+
+FACETS = ("platform", "niche", "hook_type")
+
+_SEARCH_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_content_memory_platform ON content_memory (platform, published_at)",
+    "CREATE INDEX IF NOT EXISTS idx_content_memory_views ON content_memory (views)",
+    "CREATE INDEX IF NOT EXISTS idx_content_memory_published_at ON content_memory (published_at)",
+    "CREATE INDEX IF NOT EXISTS idx_content_memory_niche ON content_memory (niche COLLATE NOCASE)"
+]
+
+_CREATE_FTS_TABLE = '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS content_search USING fts5(
+        title, description, niche, problem, hook_types,
+        content='content_memory', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+'''
+_FTS_TRIGGERS = [
+    '''
+    CREATE TRIGGER IF NOT EXISTS content_search_insert AFTER INSERT ON content_memory BEGIN
+        INSERT INTO content_search (rowid, title, description, niche, problem, hook_types)
+        VALUES (new.id, new.title, new.description, new.niche, new.problem, new.hook_types);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS content_search_delete AFTER DELETE ON content_memory BEGIN
+        INSERT INTO content_search (content_search, rowid, title, description, niche, problem, hook_types)
+        VALUES ('delete', old.id, old.title, old.description, old.niche, old.problem, old.hook_types);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS content_search_update
+    AFTER UPDATE OF title, description, niche, problem, hook_types ON content_memory BEGIN
+        INSERT INTO content_search (content_search, rowid, title, description, niche, problem, hook_types)
+        VALUES ('delete', old.id, old.title, old.description, old.niche, old.problem, old.hook_types);
+        INSERT INTO content_search (rowid, title, description, niche, problem, hook_types)
+        VALUES (new.id, new.title, new.description, new.niche, new.problem, new.hook_types);
+    END
+    '''
+]
+
+_DATE_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}")
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def ensure_search_schema(conn: sqlite3.Connection) -> Tuple[bool, bool]:
+    """
+    Add search columns, indexes and the FTS index.
+
+    Returns whether FTS5 is available and whether columns or the FTS index
+    were just created, in which case existing rows still have to be
+    backfilled (ContentMemory.reindex_search).
+    """
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(content_memory)")}
+    created = False
+    for name, column_type in SEARCH_COLUMNS.items():
+        if name not in existing:
+            conn.execute(f"ALTER TABLE content_memory ADD COLUMN {name} {column_type}")
+            created = True
+    for statement in _SEARCH_INDEXES:
+        conn.execute(statement)
+    fts_exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'content_search'"
+    ).fetchone()
+    try:
+        conn.execute(_CREATE_FTS_TABLE)
+    except sqlite3.OperationalError as e:
+        logger.warning(f"FTS5 unavailable, text search falls back to LIKE: {str(e)}")
+        return False, created
+    for statement in _FTS_TRIGGERS:
+        conn.execute(statement)
+    if fts_exists is None:
+        # Index the existing rows as they are, so the update triggers of the
+        # backfill find the entries they replace
+        rebuild_fts(conn)
+    return True, created or fts_exists is None
+
+
+def rebuild_fts(conn: sqlite3.Connection):
+    conn.execute("INSERT INTO content_search (content_search) VALUES ('rebuild')")
+
+
+def _text(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, (list, tuple)):
+        return ", ".join(str(v) for v in value if v)
+    return str(value)
+
+
+def hook_types(analysis_data: Dict[str, Any]) -> List[str]:
+    """Distinct lower-cased hook types from ``hook_type`` and ``hook_patterns[].type``"""
+    types = []
+    if analysis_data.get("hook_type"):
+        types.append(str(analysis_data["hook_type"]))
+    for pattern in analysis_data.get("hook_patterns") or []:
+        if isinstance(pattern, dict) and pattern.get("type"):
+            types.append(str(pattern["type"]))
+    return list(dict.fromkeys(h.strip().lower() for h in types if h.strip()))
+
+
+def published_day(analysis_data: Dict[str, Any]) -> Optional[str]:
+    """``YYYY-MM-DD`` from ``publishedAt`` or ``published_at``, if it starts with a date"""
+    published = analysis_data.get("publishedAt") or analysis_data.get("published_at")
+    return str(published)[:10] if published and _DATE_PATTERN.match(str(published)) else None
+
+
+def search_fields(analysis_data: Dict[str, Any]) -> Tuple[Any, ...]:
+    """
+    Values for the SEARCH_COLUMNS of one stored analysis.
+
+    Reads the per-video keys ``title``, ``description``, ``niche``,
+    ``problem``, ``views`` and ``publishedAt`` plus hook types from
+    ``hook_type`` or ``hook_patterns[].type``. Missing keys stay NULL.
+    """
+    if not isinstance(analysis_data, dict):
+        return (None,) * len(SEARCH_COLUMNS)
+
+    types = hook_types(analysis_data)
+
+    views = analysis_data.get("views")
+    try:
+        views = int(views) if views is not None else None
+    except (TypeError, ValueError):
+        views = None
+
+    return (
+        _text(analysis_data.get("title")),
+        _text(analysis_data.get("description")),
+        _text(analysis_data.get("niche")),
+        _text(analysis_data.get("problem")),
+        json.dumps(types) if types else None,
+        views,
+        published_day(analysis_data)
+    )
+
+
+def fts_query(text: str, prefix: bool = True) -> Optional[str]:
+    """Turn free text into a safe FTS5 query: every word must match"""
+    tokens = _TOKEN_PATTERN.findall(text or "")
+    if not tokens:
+        return None
+    terms = [f'"{token}"' for token in tokens]
+    if prefix:
+        terms[-1] += "*"
+    return " ".join(terms)
+
+
+def _where(
+    fts_enabled: bool,
+    query: Optional[str],
+    platform: Optional[str],
+    niche: Optional[str],
+    hook_type: Optional[str],
+    min_views: Optional[int],
+    max_views: Optional[int],
+    published_after: Optional[str],
+    published_before: Optional[str]
+) -> Tuple[str, List[Any]]:
+    clauses, params = [], []
+    match = fts_query(query) if query else None
+    if query and match is None:
+        clauses.append("0")
+    elif match and fts_enabled:
+        clauses.append("c.id IN (SELECT rowid FROM content_search WHERE content_search MATCH ?)")
+        params.append(match)
+    elif match:
+        like = f"%{query}%"
+        clauses.append("(c.title LIKE ? OR c.description LIKE ? OR c.niche LIKE ? OR c.problem LIKE ? OR c.hook_types LIKE ?)")
+        params.extend([like] * 5)
+    if platform:
+        clauses.append("c.platform = ?")
+        params.append(platform)
+    if niche:
+        clauses.append("c.niche = ? COLLATE NOCASE")
+        params.append(niche)
+    if hook_type:
+        clauses.append("EXISTS (SELECT 1 FROM json_each(c.hook_types) WHERE value = ?)")
+        params.append(hook_type.strip().lower())
+    if min_views is not None:
+        clauses.append("c.views >= ?")
+        params.append(min_views)
+    if max_views is not None:
+        clauses.append("c.views <= ?")
+        params.append(max_views)
+    if published_after:
+        clauses.append("c.published_at >= ?")
+        params.append(published_after)
+    if published_before:
+        clauses.append("c.published_at < ?")
+        params.append(published_before)
+    return (" AND ".join(clauses) if clauses else "1"), params
+
+
+_FACET_SQL = {
+    "platform": "SELECT c.platform, COUNT(*) AS n FROM content_memory c WHERE {where} AND c.platform IS NOT NULL GROUP BY c.platform ORDER BY n DESC LIMIT ?",
+    "niche": "SELECT c.niche, COUNT(*) AS n FROM content_memory c WHERE {where} AND c.niche IS NOT NULL GROUP BY c.niche COLLATE NOCASE ORDER BY n DESC LIMIT ?",
+    "hook_type": "SELECT h.value, COUNT(*) AS n FROM content_memory c, json_each(c.hook_types) h WHERE {where} GROUP BY h.value ORDER BY n DESC LIMIT ?"
+}
+
+
+def search(
+    conn: sqlite3.Connection,
+    fts_enabled: bool = True,
+    query: Optional[str] = None,
+    platform: Optional[str] = None,
+    niche: Optional[str] = None,
+    hook_type: Optional[str] = None,
+    min_views: Optional[int] = None,
+    max_views: Optional[int] = None,
+    published_after: Optional[str] = None,
+    published_before: Optional[str] = None,
+    sort: str = "views",
+    limit: int = 20,
+    offset: int = 0,
+    facets: Optional[List[str]] = None,
+    facet_limit: int = 20
+) -> Dict[str, Any]:
+    """Run one paginated, filtered search with facet counts, all inside SQLite"""
+    where, params = _where(fts_enabled, query, platform, niche, hook_type, min_views, max_views, published_after, published_before)
+
+    order_by = {
+        "views": "c.views DESC",
+        "published_at": "c.published_at DESC",
+        "last_updated": "c.last_updated DESC"
+    }.get(sort, "c.views DESC")
+
+    total = conn.execute(f"SELECT COUNT(*) FROM content_memory c WHERE {where}", params).fetchone()[0]
+    rows = conn.execute(
+        f'''
+        SELECT c.video_id, c.platform, c.title, c.description, c.niche, c.problem,
+               c.hook_types, c.views, c.published_at, c.last_updated
+        FROM content_memory c
+        WHERE {where}
+        ORDER BY {order_by}, c.id
+        LIMIT ? OFFSET ?
+        ''',
+        (*params, limit, offset)
+    ).fetchall()
+
+    results = [
+        {
+            "video_id": video_id,
+            "platform": row_platform,
+            "title": title,
+            "description": description,
+            "niche": row_niche,
+            "problem": problem,
+            "hook_types": json.loads(hook_types) if hook_types else [],
+            "views": views,
+            "published_at": published_at,
+            "last_updated": last_updated
+        }
+        for video_id, row_platform, title, description, row_niche, problem, hook_types, views, published_at, last_updated in rows
+    ]
+
+    facet_counts = {}
+    for facet in facets if facets is not None else FACETS:
+        if facet not in _FACET_SQL:
+            continue
+        facet_counts[facet] = [
+            {"value": value, "count": count}
+            for value, count in conn.execute(_FACET_SQL[facet].format(where=where), (*params, facet_limit))
+        ]
+
+    return {"total": total, "limit": limit, "offset": offset, "results": results, "facets": facet_counts}
@@ -0,0 +1,129 @@
+"""
+Prometheus metrics for the API.
+
+Request latency per route, in-flight requests, pipeline stage timings,
+agent and LLM call latency, LLM token usage and result cache lookups.
+LLM metrics are recorded by llm_client for every provider call. Agents
+reach the provider through the client attach_llm_client gives them (a
+SyncLLMClient for blocking agents in executor threads), and AgentExecutor
+sets ``current_agent`` so each call is labelled with its agent.
+With PROMETHEUS_MULTIPROC_DIR set (see gunicorn.conf.py) every gunicorn
+worker writes its samples there and /metrics aggregates all of them.
+
+prometheus_client is optional: without it every metric is a no-op and
+/metrics answers 503.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Optional, Tuple
+import os
+import time
+
+try:
+    import prometheus_client
+    from prometheus_client import Counter, Gauge, Histogram
+except ImportError:  # pragma: no cover - optional dependency
+    prometheus_client = None
+
+# Agent making the current LLM call; set by AgentExecutor.run and carried
+# over to the event loop by SyncLLMClient
+current_agent: ContextVar[str] = ContextVar("current_agent", default="none")
+
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 180)
+
+
+class _NoopMetric:
+    def labels(self, *args, **kwargs) -> "_NoopMetric":
+        return self
+
+    def inc(self, amount: float = 1):
+        pass
+
+    def dec(self, amount: float = 1):
+        pass
+
+    def observe(self, amount: float):
+        pass
+
+
+if prometheus_client is not None:
+    HTTP_REQUESTS = Counter("http_requests_total", "HTTP requests", ["method", "route", "status"])
+    HTTP_LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency until the response is complete", ["method", "route"], buckets=LATENCY_BUCKETS)
+    HTTP_IN_PROGRESS = Gauge("http_requests_in_progress", "HTTP requests being handled", ["method"], multiprocess_mode="livesum")
+    PIPELINE_STAGE_LATENCY = Histogram("pipeline_stage_duration_seconds", "Duration of pipeline stages", ["stage"], buckets=LATENCY_BUCKETS)
+    AGENT_CALLS = Counter("agent_calls_total", "Agent method calls", ["agent", "status"])
+    AGENT_LATENCY = Histogram("agent_call_duration_seconds", "Agent method run time", ["agent"], buckets=LATENCY_BUCKETS)
+    AGENT_QUEUE_WAIT = Histogram("agent_queue_wait_seconds", "Time spent waiting for an agent concurrency slot", ["agent"], buckets=LATENCY_BUCKETS)
+    LLM_REQUESTS = Counter("llm_requests_total", "LLM provider calls", ["agent", "outcome"])
+    LLM_LATENCY = Histogram("llm_request_duration_seconds", "LLM provider call latency including retries", ["agent"], buckets=LATENCY_BUCKETS)
+    LLM_RETRIES = Counter("llm_retries_total", "LLM provider call retries", ["agent"])
+    LLM_TOKENS = Counter("llm_tokens_total", "LLM tokens reported by the provider", ["agent", "kind"])
+    LLM_IN_FLIGHT = Gauge("llm_requests_in_flight", "LLM provider calls in flight", multiprocess_mode="livesum")
+    CACHE_LOOKUPS = Counter("result_cache_lookups_total", "Result cache lookups", ["outcome"])
+else:
+    HTTP_REQUESTS = HTTP_LATENCY = HTTP_IN_PROGRESS = PIPELINE_STAGE_LATENCY = _NoopMetric()
+    AGENT_CALLS = AGENT_LATENCY = AGENT_QUEUE_WAIT = _NoopMetric()
+    LLM_REQUESTS = LLM_LATENCY = LLM_RETRIES = LLM_TOKENS = LLM_IN_FLIGHT = CACHE_LOOKUPS = _NoopMetric()
+
+
+@contextmanager
+def stage_timer(stage: str):
+    """Record the duration of a pipeline stage, failed or not"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        PIPELINE_STAGE_LATENCY.labels(stage).observe(time.perf_counter() - started)
+
+
+def render() -> Tuple[bytes, str, int]:
+    """Body, content type and status of the /metrics response"""
+    if prometheus_client is None:
+        return b"prometheus_client is not installed\n", "text/plain", 503
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import CollectorRegistry, multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    return prometheus_client.generate_latest(registry), prometheus_client.CONTENT_TYPE_LATEST, 200
+
+
+def _route(scope: dict) -> str:
+    """Route template rather than the raw path, to keep label cardinality bounded"""
+    route = scope.get("route")
+    path: Optional[str] = getattr(route, "path", None)
+    if path is None:
+        return "unmatched"
+    return scope.get("root_path", "") + path
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request until its last body chunk is sent"""
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = "500"
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        started = time.perf_counter()
+        HTTP_IN_PROGRESS.labels(method).inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_PROGRESS.labels(method).dec()
+            route = _route(scope)
+            HTTP_REQUESTS.labels(method, route, status).inc()
+            HTTP_LATENCY.labels(method, route).observe(time.perf_counter() - started)
@@ -0,0 +1,196 @@
+"""
+Near-duplicate collapsing for scraped video batches.
+
+Reuploads and lightly edited titles add prompt tokens without adding
+signal. Title and description are normalized, identical texts are merged
+with a dict, and the remaining distinct texts are compared with MinHash
+over 4-byte shingles. Shingling and hashing are vectorized with NumPy over
+the whole batch. LSH banding turns the signatures into candidate pairs,
+whose estimated Jaccard similarity is checked against the threshold before
+they are merged. The whole pass is roughly linear in the batch size.
+
+Each cluster is replaced by its most viewed video carrying the cluster's
+summed ``views``.
+"""
+from typing import Any, Dict, List, Sequence, Tuple
+import copy
+import re
+import time
+
+import numpy as np
+
+from niche_engine import normalize
+
+# Re-cased, re-punctuated or re-tagged reuploads normalize to (almost) the
+# same text, while template titles differing in one word ("5 Morning/Evening
+# Habits ...") score ~0.81 and should stay apart
+DEFAULT_THRESHOLD = 0.85
+
+NUM_PERM = 64
+# bands x rows = NUM_PERM. 16 bands of 4 rows make pairs at 0.85 similarity
+# candidates with probability ~0.99998 and at 0.5 with ~0.64; candidates are
+# then verified against the threshold.
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+
+# Multiply-shift hashing: the top 32 bits of a * x + b (mod 2**64) for odd a
+_rng = np.random.default_rng(0x5EED)
+_A = _rng.integers(1, 1 << 63, size=NUM_PERM, dtype=np.uint64) | np.uint64(1)
+_B = _rng.integers(0, 1 << 63, size=NUM_PERM, dtype=np.uint64)
+_SHIFT = np.uint64(32)
+_BAND_MIX = _rng.integers(1, 1 << 63, size=ROWS, dtype=np.uint64) | np.uint64(1)
+
+_SHINGLE = 4
+# Texts hashed together; keeps the per-permutation arrays cache-sized
+_BLOCK = 1024
+# Texts with fewer characters than this are never merged
+_MIN_LENGTH = 8
+MAX_REPORTED_CLUSTERS = 50
+
+_NON_WORD = re.compile(r"[^\w]+", re.UNICODE)
+_APOSTROPHES = re.compile(r"['’`]")
+_TITLE_NOISE = re.compile(r"\([^)]*\)|\[[^\]]*\]|#\w+|\s\|.*$", re.UNICODE)
+
+
+def _text(video: Any) -> str:
+    # Reupload markers such as "(reupload)", "[HD]", "#shorts" or "| Full Video" are dropped
+    title = _TITLE_NOISE.sub("", getattr(video, "title", None) or "")
+    description = getattr(video, "description", None) or ""
+    # "You're" and "youre" should shingle the same
+    text = f"{title} {description}"
+    # normalize() walks every character; ASCII text only needs casefolding
+    text = _APOSTROPHES.sub("", text.casefold() if text.isascii() else normalize(text))
+    return _NON_WORD.sub(" ", text).strip()
+
+
+def _signatures(texts: Sequence[bytes]) -> np.ndarray:
+    """(len(texts), NUM_PERM) MinHash signatures over 4-byte shingles"""
+    return np.concatenate([_block_signatures(texts[i:i + _BLOCK]) for i in range(0, len(texts), _BLOCK)])
+
+
+def _block_signatures(texts: Sequence[bytes]) -> np.ndarray:
+    data = np.frombuffer(b"".join(texts), dtype=np.uint8).astype(np.uint32)
+    lengths = np.fromiter((len(t) for t in texts), dtype=np.int64, count=len(texts))
+    counts = lengths - _SHINGLE + 1
+    text_starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    shingle_starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    # Every 4-byte window as one uint32, keeping only windows inside a text
+    windows = data[:-3] | (data[1:-2] << 8) | (data[2:-1] << 16) | (data[3:] << 24)
+    shingles = windows[np.repeat(text_starts - shingle_starts, counts) + np.arange(counts.sum())].astype(np.uint64)
+
+    # One flat pass per permutation beats a (shingles x NUM_PERM) matrix:
+    # memory stays linear and reduceat runs over contiguous segments
+    signatures = np.empty((len(texts), NUM_PERM), dtype=np.uint32)
+    for k in range(NUM_PERM):
+        hashed = ((shingles * _A[k] + _B[k]) >> _SHIFT).astype(np.uint32)
+        signatures[:, k] = np.minimum.reduceat(hashed, shingle_starts)
+    return signatures
+
+
+class _UnionFind:
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+
+    def find(self, item: int) -> int:
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, a: int, b: int):
+        a, b = self.find(a), self.find(b)
+        if a != b:
+            self.parent[max(a, b)] = min(a, b)
+
+
+def cluster_texts(texts: Sequence[str], threshold: float = DEFAULT_THRESHOLD) -> List[int]:
+    """
+    Cluster id (index of the first member) for every text.
+
+    Identical texts share a cluster; others are merged when their estimated
+    Jaccard similarity over 4-byte shingles reaches ``threshold``. Texts
+    shorter than 8 characters are never merged.
+    """
+    # Exact duplicates first: only distinct texts are hashed. Texts too short
+    # to compare (-1) stay on their own.
+    distinct: Dict[str, int] = {}
+    inverse = [distinct.setdefault(text, len(distinct)) if len(text) >= _MIN_LENGTH else -1 for text in texts]
+    union = _UnionFind(len(distinct))
+
+    if len(distinct) > 1:
+        signatures = _signatures([text.encode("utf-8") for text in distinct])
+        for band in range(BANDS):
+            columns = signatures[:, band * ROWS:(band + 1) * ROWS].astype(np.uint64)
+            keys = (columns * _BAND_MIX).sum(axis=1)
+            _, first, group = np.unique(keys, return_index=True, return_inverse=True)
+            partner = first[group]
+            rows = np.flatnonzero(partner != np.arange(len(keys)))
+            if not len(rows):
+                continue
+            # Verify every candidate against the first text of its bucket
+            similarity = (signatures[rows] == signatures[partner[rows]]).mean(axis=1)
+            for row in rows[similarity >= threshold]:
+                union.union(int(row), int(partner[row]))
+
+    roots = [union.find(i) for i in range(len(distinct))]
+    # Cluster id: first video whose distinct text belongs to the root
+    first_video: Dict[int, int] = {}
+    return [i if d < 0 else first_video.setdefault(roots[d], i) for i, d in enumerate(inverse)]
+
+
+def _with_views(video: Any, views: int) -> Any:
+    if hasattr(video, "model_copy"):
+        return video.model_copy(update={"views": views})
+    clone = copy.copy(video)
+    clone.views = views
+    return clone
+
+
+def collapse_near_duplicates(
+    videos: Sequence[Any],
+    threshold: float = DEFAULT_THRESHOLD,
+    max_reported: int = MAX_REPORTED_CLUSTERS
+) -> Tuple[List[Any], Dict[str, Any]]:
+    """
+    Keep one video per near-duplicate cluster.
+
+    The representative is the cluster's most viewed video with ``views`` set
+    to the cluster total; representatives keep the order of their clusters'
+    first videos. The report lists the ``max_reported`` largest clusters
+    with their sizes.
+    """
+    if not 0 < threshold <= 1:
+        raise ValueError("threshold must be in (0, 1]")
+    started = time.perf_counter()
+    clusters = cluster_texts([_text(v) for v in videos], threshold)
+
+    # cluster id -> [member indexes]
+    members: Dict[int, List[int]] = {}
+    for index, cluster in enumerate(clusters):
+        members.setdefault(cluster, []).append(index)
+
+    representatives = []
+    sizes = []
+    for indexes in members.values():
+        if len(indexes) == 1:
+            representatives.append(videos[indexes[0]])
+            continue
+        views = [getattr(videos[i], "views", None) or 0 for i in indexes]
+        best = indexes[max(range(len(indexes)), key=views.__getitem__)]
+        representatives.append(_with_views(videos[best], sum(views)))
+        sizes.append((len(indexes), sum(views), best))
+
+    sizes.sort(key=lambda s: (-s[0], -s[1]))
+    return representatives, {
+        "videos": len(videos),
+        "clusters": len(representatives),
+        "duplicates": len(videos) - len(representatives),
+        "threshold": threshold,
+        "collapsed_clusters": len(sizes),
+        "largest_clusters": [
+            {"title": getattr(videos[best], "title", None), "size": size, "views": views}
+            for size, views, best in sizes[:max_reported]
+        ],
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)
+    }
@@ -0,0 +1,179 @@
+"""
+Filter and aggregate engine for /niche-analysis.
+
+Field values repeat heavily across a batch (a few dozen niches for thousands
+of videos), so each distinct string is normalized and matched once and
+memoized. One pass over the videos applies every target filter at once, and
+one pass over the survivors accumulates counts and view totals for all
+insight fields.
+"""
+from operator import attrgetter
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+import re
+import unicodedata
+
+# Insight name -> video attribute
+INSIGHT_FIELDS = {
+    "problems": "problem",
+    "audiences": "audience",
+    "solutions": "solution",
+    "emotional_triggers": "emotional_triggers",
+    "niches": "niche",
+    "sub_niches": "sub_niche",
+    "pain_points": "pain_points",
+    "value_propositions": "value_proposition"
+}
+
+MATCH_MODES = ("substring", "token", "prefix")
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def normalize(text: str) -> str:
+    """Casefold and strip accents so "Café" and "cafe" compare equal"""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold().strip()
+
+
+class _Normalizer:
+    """Memoizes normalized strings and their token sets"""
+
+    def __init__(self):
+        self._text: Dict[str, str] = {}
+        self._tokens: Dict[str, Tuple[str, ...]] = {}
+
+    def text(self, value: str) -> str:
+        normalized = self._text.get(value)
+        if normalized is None:
+            normalized = self._text[value] = normalize(value)
+        return normalized
+
+    def tokens(self, value: str) -> Tuple[str, ...]:
+        tokens = self._tokens.get(value)
+        if tokens is None:
+            tokens = self._tokens[value] = tuple(_TOKEN_PATTERN.findall(self.text(value)))
+        return tokens
+
+
+class _Target:
+    """One normalized filter such as target_niche"""
+
+    def __init__(self, attribute: str, query: str, mode: str, normalizer: _Normalizer):
+        if mode not in MATCH_MODES:
+            raise ValueError(f"Unknown match mode {mode!r}; expected one of {', '.join(MATCH_MODES)}")
+        self.attribute = attribute
+        self.mode = mode
+        self.query = normalize(query)
+        self.query_tokens = tuple(_TOKEN_PATTERN.findall(self.query))
+        self._normalizer = normalizer
+        # Raw field value -> match result
+        self.cache: Dict[Optional[str], bool] = {None: False, "": False}
+
+    def matches(self, value: Optional[str]) -> bool:
+        result = self.cache.get(value)
+        if result is None:
+            result = self.cache[value] = bool(value) and self._match(value)
+        return result
+
+    def _match(self, value: str) -> bool:
+        if self.mode == "substring":
+            return self.query in self._normalizer.text(value)
+        tokens = self._normalizer.tokens(value)
+        if self.mode == "token":
+            return all(q in tokens for q in self.query_tokens)
+        return all(any(t.startswith(q) for t in tokens) for q in self.query_tokens)
+
+
+class _MatchTable(dict):
+    """
+    Combined verdict of all targets keyed by the tuple of field values.
+
+    Only the first occurrence of each combination runs the matchers; every
+    other video is a single dict lookup.
+    """
+
+    def __init__(self, targets: List[_Target]):
+        super().__init__()
+        self.targets = targets
+
+    def __missing__(self, key: Any) -> bool:
+        # attrgetter returns a bare value, not a tuple, for a single target
+        values = key if len(self.targets) > 1 else (key,)
+        result = self[key] = all(target.matches(value) for target, value in zip(self.targets, values))
+        return result
+
+
+def filter_and_aggregate(
+    videos: Sequence[Any],
+    target_niche: Optional[str] = None,
+    target_problem: Optional[str] = None,
+    target_audience: Optional[str] = None,
+    match_mode: str = "substring",
+    top_k: Optional[int] = None
+) -> Tuple[List[Any], Dict[str, List[Dict[str, Any]]]]:
+    """
+    Filter videos by the niche targets and build ``niche_insights`` in one pass.
+
+    Every insight lists distinct values (accent/case-insensitive, shown with
+    one of their spellings) with ``count`` and total ``views``, ranked by views
+    and then count.
+    """
+    normalizer = _Normalizer()
+    targets = [
+        _Target(attribute, query, match_mode, normalizer)
+        for attribute, query in (("niche", target_niche), ("problem", target_problem), ("audience", target_audience))
+        if query
+    ]
+    if targets:
+        target_values = attrgetter(*[t.attribute for t in targets])
+        matches = _MatchTable(targets)
+        candidates = [video for video in videos if matches[target_values(video)]]
+    else:
+        candidates = videos
+    field_values = attrgetter(*INSIGHT_FIELDS.values())
+    # Per insight: raw value -> [count, views]. Accent/case variants are
+    # merged afterwards, once per distinct value rather than once per video.
+    buckets: List[Dict[str, List[int]]] = [{} for _ in INSIGHT_FIELDS]
+
+    filtered = candidates if isinstance(candidates, list) else list(candidates)
+    for video in filtered:
+        views = video.views or 0
+        for bucket, value in zip(buckets, field_values(video)):
+            if value:
+                entry = bucket.get(value)
+                if entry is None:
+                    bucket[value] = [1, views]
+                else:
+                    entry[0] += 1
+                    entry[1] += views
+
+    insights = {}
+    for name, bucket in zip(INSIGHT_FIELDS, buckets):
+        # normalized value -> [display value, count, views]
+        merged: Dict[str, List[Any]] = {}
+        for value, (count, views) in bucket.items():
+            key = normalizer.text(value)
+            entry = merged.get(key)
+            if entry is None:
+                merged[key] = [value, count, views]
+            else:
+                entry[1] += count
+                entry[2] += views
+        ranked = sorted(merged.values(), key=lambda b: (-b[2], -b[1], b[0]))
+        if top_k:
+            ranked = ranked[:top_k]
+        insights[name] = [{"value": value, "count": count, "views": views} for value, count, views in ranked]
+    return filtered, insights
+
+
+def insight_values(insights: Dict[str, Any]) -> Dict[str, List[str]]:
+    """
+    ``niche_insights`` as plain value lists, the shape ScriptRequest takes.
+
+    Accepts the ranked ``{value, count, views}`` entries built by
+    filter_and_aggregate as well as plain values, keeping their order.
+    """
+    return {
+        name: [entry["value"] if isinstance(entry, dict) else entry for entry in entries or []]
+        for name, entries in insights.items()
+    }
@@ -0,0 +1,194 @@
+"""
+Fast JSON responses and slimmer payloads.
+
+``FastJSONResponse`` renders with orjson when it is installed. Handlers that
+return one directly skip FastAPI's ``jsonable_encoder`` pass as well, which
+on large nested analysis results costs more than the serialization itself.
+``select_fields`` trims a result to the dotted paths a client asked for, and
+``CompressionMiddleware`` compresses large complete responses with brotli
+(when installed) or gzip. Streaming responses are left untouched, so SSE and
+NDJSON events are never held back in a compressor buffer.
+"""
+from typing import Any, Dict, Iterable, Optional
+import asyncio
+import gzip
+import json
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional encoding
+    brotli = None
+
+# Bodies larger than this are compressed in a worker thread
+_THREAD_COMPRESS_SIZE = 64 * 1024
+_COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+
+def _default(value: Any) -> Any:
+    """Fallback for values neither serializer handles natively"""
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    if hasattr(value, "dict"):
+        return value.dict()
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def dumps(content: Any) -> bytes:
+    """Compact UTF-8 JSON bytes, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson, falling back to the stdlib encoder"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def _field_tree(fields: Iterable[str]) -> Dict[str, Any]:
+    """``["a.b", "a.c", "d"]`` -> ``{"a": {"b": {}, "c": {}}, "d": {}}``; ``{}`` keeps the whole value"""
+    tree: Dict[str, Any] = {}
+    for field in fields:
+        parts = [part for part in field.strip().split(".") if part]
+        if not parts:
+            continue
+        node = tree
+        for part in parts[:-1]:
+            if part in node and not node[part]:
+                # A shorter path already selects the whole value
+                break
+            node = node.setdefault(part, {})
+        else:
+            node[parts[-1]] = {}
+    return tree
+
+
+def _select(value: Any, tree: Dict[str, Any]) -> Any:
+    if not tree:
+        return value
+    if isinstance(value, dict):
+        return {key: _select(value[key], subtree) for key, subtree in tree.items() if key in value}
+    if isinstance(value, list):
+        return [_select(item, tree) for item in value]
+    return value
+
+
+def select_fields(content: Any, fields: Optional[str]) -> Any:
+    """
+    Keep only the comma-separated dotted paths in ``fields``, e.g.
+    ``visual_plan.scenes,script.title``. Lists are traversed element-wise, so
+    ``variants.script.title`` keeps the title of every variant. Unknown paths
+    are ignored and ``content`` itself is never modified.
+    """
+    if not fields:
+        return content
+    return _select(content, _field_tree(fields.split(",")))
+
+
+def json_response(content: Any, fields: Optional[str] = None, status_code: int = 200) -> FastJSONResponse:
+    """Serialize a handler result directly, trimmed to ``fields`` when given"""
+    return FastJSONResponse(select_fields(content, fields), status_code=status_code)
+
+
+def _accepted_encodings(accept_encoding: str) -> Dict[str, float]:
+    encodings = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            encodings[name.strip().lower()] = quality
+    return encodings
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing complete responses of at least ``minimum_size``
+    bytes with brotli or gzip, whichever the client prefers (brotli on a tie).
+    """
+
+    def __init__(self, app: Any, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def _encoding(self, headers: Headers) -> Optional[str]:
+        accepted = _accepted_encodings(headers.get("accept-encoding", ""))
+        candidates = [("br", accepted.get("br", 0.0))] if brotli is not None else []
+        candidates.append(("gzip", accepted.get("gzip", 0.0)))
+        name, quality = max(candidates, key=lambda candidate: candidate[1])
+        return name if quality > 0 else None
+
+    def _compress(self, encoding: str, body: bytes) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = self._encoding(Headers(scope=scope))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[dict] = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if passthrough or message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+
+            headers = MutableHeaders(scope=start)
+            body = message.get("body", b"")
+            if (
+                message.get("more_body", False)
+                or len(body) < self.minimum_size
+                or "content-encoding" in headers
+                or not headers.get("content-type", "").startswith(_COMPRESSIBLE_TYPES)
+            ):
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            if len(body) >= _THREAD_COMPRESS_SIZE:
+                compressed = await asyncio.to_thread(self._compress, encoding, body)
+            else:
+                compressed = self._compress(encoding, body)
+            headers.add_vary_header("Accept-Encoding")
+            if len(compressed) < len(body):
+                body = compressed
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(body))
+            passthrough = True
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,218 @@
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Callable, Awaitable, Tuple
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import os
+import time
+
+from metrics import CACHE_LOOKUPS
+
+logger = logging.getLogger(__name__)
+
+
+class ComputationAbandoned(Exception):
+    """The request computing a result was cancelled; coalesced waiters take over"""
+
+
+def _canonical_payload(request: Any) -> Any:
+    """Turn a validated Pydantic request into plain JSON-compatible data"""
+    if hasattr(request, "model_dump"):
+        return request.model_dump(mode="json")
+    if hasattr(request, "dict"):
+        return request.dict()
+    return request
+
+
+def request_key(kind: str, request: Any, version: str = "") -> str:
+    """
+    Canonical content hash for a request.
+
+    Keys are sorted and whitespace removed so that two bodies with the same
+    content always hash to the same key regardless of field order.
+    """
+    payload = json.dumps(
+        {"kind": kind, "version": version, "request": _canonical_payload(request)},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return f"{kind}:{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+
+
+class ResultCache:
+    """
+    Two-tier response cache with single-flight deduplication.
+
+    The first tier is an in-process LRU with a TTL. The optional second tier is
+    the ``result_cache`` table of ``ContentMemory`` so every gunicorn worker
+    sees results computed by the others. Concurrent misses for the same key
+    share a single computation.
+
+    With ``shared_factory`` the second tier is opened on first use (or by
+    ``open`` from the app lifespan), inside the worker: a SQLite connection
+    opened at import would be inherited by every worker forked by
+    ``gunicorn --preload``.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        ttl: float = 3600,
+        shared: Optional[Any] = None,
+        shared_factory: Optional[Callable[[], Any]] = None
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.shared = shared
+        self._shared_factory = shared_factory
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.shared_errors = 0
+
+    @classmethod
+    def from_env(cls) -> "ResultCache":
+        """Build a cache from the RESULT_CACHE_* environment variables"""
+        shared_factory = None
+        if os.environ.get("RESULT_CACHE_SHARED", "false").lower() == "true":
+            from memory import get_content_memory
+            shared_factory = get_content_memory
+        return cls(
+            max_entries=int(os.environ.get("RESULT_CACHE_MAX_ENTRIES", 512)),
+            ttl=float(os.environ.get("RESULT_CACHE_TTL", 3600)),
+            shared_factory=shared_factory,
+        )
+
+    def open(self):
+        """Open the shared tier; blocking, so call it from a thread"""
+        factory, self._shared_factory = self._shared_factory, None
+        if self.shared is None and factory is not None:
+            try:
+                self.shared = factory()
+            except Exception as e:
+                logger.error(f"Shared result cache disabled: {str(e)}")
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl > 0
+
+    def _get_local(self, key: str) -> Tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def _put_local(self, key: str, value: Any):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _get_shared(self, key: str) -> Tuple[bool, Any]:
+        if self._shared_factory is not None:
+            await asyncio.to_thread(self.open)
+        if self.shared is None:
+            return False, None
+        try:
+            data = await asyncio.to_thread(self.shared.get_cached_result, key)
+        except Exception as e:
+            self.shared_errors += 1
+            logger.warning(f"Shared result cache read failed: {str(e)}")
+            return False, None
+        if data is None:
+            return False, None
+        return True, json.loads(data)
+
+    async def _put_shared(self, key: str, value: Any):
+        if self.shared is None:
+            return
+        try:
+            await asyncio.to_thread(self.shared.put_cached_result, key, json.dumps(value, default=str), self.ttl)
+        except Exception as e:
+            self.shared_errors += 1
+            logger.warning(f"Shared result cache write failed: {str(e)}")
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached result for ``key`` or compute it exactly once"""
+        if not self.enabled:
+            return await compute()
+
+        found, value = self._get_local(key)
+        if found:
+            self.hits += 1
+            CACHE_LOOKUPS.labels("hit").inc()
+            return copy.deepcopy(value)
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            CACHE_LOOKUPS.labels("coalesced").inc()
+            try:
+                return copy.deepcopy(await asyncio.shield(pending))
+            except ComputationAbandoned:
+                # The first waiter to get here computes, the others wait on it
+                return await self.get_or_compute(key, compute)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            found, value = await self._get_shared(key)
+            if found:
+                self.shared_hits += 1
+                CACHE_LOOKUPS.labels("shared_hit").inc()
+            else:
+                self.misses += 1
+                CACHE_LOOKUPS.labels("miss").inc()
+                value = await compute()
+                await self._put_shared(key, value)
+            self._put_local(key, value)
+            future.set_result(value)
+        except asyncio.CancelledError:
+            # Only this request was cancelled (e.g. its client disconnected);
+            # cancelling the future would cancel every coalesced request too
+            future.set_exception(ComputationAbandoned(key))
+            future.exception()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+        return copy.deepcopy(value)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for /health"""
+        lookups = self.hits + self.shared_hits + self.misses + self.coalesced
+        return {
+            "enabled": self.enabled,
+            "shared_tier": self.shared is not None,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "coalesced": self.coalesced,
+            "misses": self.misses,
+            "shared_errors": self.shared_errors,
+            "hit_rate": round((lookups - self.misses) / lookups, 4) if lookups else 0.0,
+        }
+
+
+# Shared cache for the API process
+result_cache = ResultCache.from_env()
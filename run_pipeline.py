@@ -0,0 +1,183 @@
+import json
+import os
+import sys
+import time
+import asyncio
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Callable, Awaitable
+
+# Import our agents and the single-stage CLIs they power
+from agents.content_strategy_agent import ContentStrategyAgent
+from agents.content_scriptwriter_agent import ContentScriptwriterAgent
+from agents.visual_content_planner_agent import VisualContentPlannerAgent
+from analyze_viral_videos import analyze_videos_from_file
+from generate_video_script import generate_script_from_analysis
+from create_visual_plan import create_visual_plan
+
+INPUT_EXTENSIONS = (".ndjson.gz", ".json.gz", ".ndjson", ".json")
+STAGES = ("analysis", "script", "visual_plan")
+
+# Script platform -> visual planner platform
+VISUAL_PLATFORMS = {
+    "tiktok": "TikTok",
+    "youtube_shorts": "YouTube",
+    "instagram_reels": "Instagram",
+    "all": "TikTok"
+}
+
+def _stem(path: str) -> Optional[str]:
+    name = os.path.basename(path)
+    for extension in INPUT_EXTENSIONS:
+        if name.endswith(extension):
+            return name[:-len(extension)]
+    return None
+
+def _up_to_date(output_path: str, source_path: str) -> bool:
+    """Make-style check: the output exists and is not older than its source"""
+    return os.path.exists(output_path) and os.path.getmtime(output_path) >= os.path.getmtime(source_path)
+
+def _write_json(path: str, data: Dict[str, Any]):
+    # Write then rename, so an interrupted run never leaves a checkpoint that looks complete
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(temp_path, path)
+
+def _read_json(path: str) -> Dict[str, Any]:
+    with open(path, 'r') as f:
+        return json.load(f)
+
+class PipelineRunner:
+    """Runs analyze -> script -> visual plan for many files with one set of agents"""
+
+    def __init__(self, output_dir: str, platform: str = "all", jobs: int = 4, force: bool = False, parallel: Optional[int] = None):
+        self.output_dir = output_dir
+        self.platform = platform
+        self.jobs = jobs
+        self.force = force
+        self.parallel = parallel
+        self.strategy_agent = ContentStrategyAgent()
+        self.scriptwriter_agent = ContentScriptwriterAgent()
+        self.visual_planner_agent = VisualContentPlannerAgent()
+        self.stage_runs = {stage: 0 for stage in STAGES}
+        self.stage_skips = {stage: 0 for stage in STAGES}
+        self.stage_seconds = {stage: 0.0 for stage in STAGES}
+        self.videos = 0
+        self.invalid_records = 0
+        self.failures: List[Dict[str, Any]] = []
+
+    async def _stage(self, stage: str, source_path: str, output_path: str, produce: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """Run one stage unless its checkpoint is up to date"""
+        if not self.force and _up_to_date(output_path, source_path):
+            self.stage_skips[stage] += 1
+            return await asyncio.to_thread(_read_json, output_path)
+        started = time.perf_counter()
+        result = await produce()
+        await asyncio.to_thread(_write_json, output_path, result)
+        self.stage_runs[stage] += 1
+        self.stage_seconds[stage] += time.perf_counter() - started
+        return result
+
+    async def run_file(self, input_path: str, stem: str):
+        paths = {stage: os.path.join(self.output_dir, f"{stem}.{stage}.json") for stage in STAGES}
+
+        async def analyze() -> Dict[str, Any]:
+            result = await analyze_videos_from_file(input_path, parallel=self.parallel, agent=self.strategy_agent)
+            self.videos += result["ingest"]["valid"]
+            self.invalid_records += result["ingest"]["invalid"]
+            return result
+
+        analysis = await self._stage("analysis", input_path, paths["analysis"], analyze)
+
+        script = await self._stage("script", paths["analysis"], paths["script"], lambda: asyncio.to_thread(
+            generate_script_from_analysis, analysis, self.platform, self.scriptwriter_agent
+        ))
+
+        script_data = {**script, "platform": script.get("platform") or VISUAL_PLATFORMS.get(self.platform, "TikTok")}
+        await self._stage("visual_plan", paths["script"], paths["visual_plan"], lambda: asyncio.to_thread(
+            create_visual_plan, script_data, self.visual_planner_agent
+        ))
+
+    async def run(self, input_dir: str) -> Dict[str, Any]:
+        inputs = sorted(
+            (os.path.join(input_dir, name), _stem(name))
+            for name in os.listdir(input_dir)
+            if _stem(name) and os.path.isfile(os.path.join(input_dir, name))
+        )
+        os.makedirs(self.output_dir, exist_ok=True)
+        # The script and visual agents are synchronous; give every job a thread
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=max(4, self.jobs)))
+        semaphore = asyncio.Semaphore(max(1, self.jobs))
+        started = time.perf_counter()
+
+        async def process(input_path: str, stem: str):
+            async with semaphore:
+                file_started = time.perf_counter()
+                try:
+                    await self.run_file(input_path, stem)
+                    print(f"OK    {input_path} ({time.perf_counter() - file_started:.1f}s)")
+                except Exception as e:
+                    self.failures.append({"file": input_path, "error": str(e)})
+                    print(f"FAIL  {input_path}: {str(e)}")
+
+        await asyncio.gather(*[process(path, stem) for path, stem in inputs])
+        return self.summary(len(inputs), time.perf_counter() - started)
+
+    def summary(self, files: int, elapsed: float) -> Dict[str, Any]:
+        completed = files - len(self.failures)
+        return {
+            "files": files,
+            "completed": completed,
+            "failed": len(self.failures),
+            "failures": self.failures,
+            "stages_run": self.stage_runs,
+            "stages_skipped": self.stage_skips,
+            "stage_avg_seconds": {
+                stage: round(self.stage_seconds[stage] / self.stage_runs[stage], 2) if self.stage_runs[stage] else None
+                for stage in STAGES
+            },
+            "videos_analyzed": self.videos,
+            "invalid_records": self.invalid_records,
+            "elapsed_seconds": round(elapsed, 2),
+            "files_per_minute": round(completed / elapsed * 60, 2) if elapsed else None,
+            "videos_per_second": round(self.videos / elapsed, 2) if elapsed else None
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description='Run analysis, script generation and visual planning for every video export in a directory')
+    parser.add_argument('--input', '-i', type=str, required=True, help='Directory of video exports (.json, .ndjson, optionally .gz)')
+    parser.add_argument('--output', '-o', type=str, default=None, help='Directory for <name>.analysis/.script/.visual_plan.json (default: <input>/pipeline)')
+    parser.add_argument('--platform', '-p', type=str, default="all", choices=list(VISUAL_PLATFORMS), help='Target platform for the scripts')
+    parser.add_argument('--jobs', '-j', type=int, default=4, help='Files processed concurrently')
+    parser.add_argument('--parallel', type=int, default=None, help='Analysis shards per file analyzed concurrently (large exports)')
+    parser.add_argument('--force', action='store_true', help='Re-run every stage even if its output is up to date')
+    parser.add_argument('--summary', type=str, default=None, help='Also save the throughput summary as JSON')
+
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.input):
+        print(f"Input directory not found: {args.input}")
+        sys.exit(1)
+
+    output_dir = args.output or os.path.join(args.input, "pipeline")
+    runner = PipelineRunner(output_dir, args.platform, args.jobs, args.force, args.parallel)
+    summary = asyncio.run(runner.run(args.input))
+
+    print("\n===== PIPELINE SUMMARY =====")
+    print(f"Files: {summary['completed']}/{summary['files']} completed, {summary['failed']} failed")
+    for stage in STAGES:
+        print(f"{stage}: {summary['stages_run'][stage]} run, {summary['stages_skipped'][stage]} up to date, avg {summary['stage_avg_seconds'][stage]}s")
+    print(f"Videos analyzed: {summary['videos_analyzed']} ({summary['invalid_records']} invalid records skipped)")
+    print(f"Elapsed: {summary['elapsed_seconds']}s, {summary['files_per_minute']} files/min, {summary['videos_per_second']} videos/s")
+
+    if args.summary:
+        with open(args.summary, 'w') as f:
+            json.dump(summary, f, indent=2)
+        print(f"\nSummary saved to {args.summary}")
+
+    if summary['failed']:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
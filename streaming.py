@@ -0,0 +1,72 @@
+from typing import Dict, Any, Callable, Awaitable, AsyncIterator
+import asyncio
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Callback used by producers to publish an event
+Emit = Callable[[str, Dict[str, Any]], Awaitable[None]]
+
+MEDIA_TYPES = {
+    "sse": "text/event-stream",
+    "ndjson": "application/x-ndjson",
+}
+
+STREAM_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",
+}
+
+
+def format_event(event: str, data: Dict[str, Any], fmt: str = "sse") -> str:
+    """Serialize one event as an SSE frame or an NDJSON line"""
+    if fmt == "ndjson":
+        return json.dumps({"event": event, "data": data}, default=str) + "\n"
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def heartbeat(fmt: str = "sse") -> str:
+    """Keep-alive frame so proxies and clients don't drop an idle stream"""
+    if fmt == "ndjson":
+        return json.dumps({"event": "heartbeat", "data": {}}) + "\n"
+    return ": keep-alive\n\n"
+
+
+async def event_stream(producer: Callable[[Emit], Awaitable[None]], fmt: str = "sse", heartbeat_interval: float = 15.0) -> AsyncIterator[str]:
+    """
+    Run ``producer`` in the background and yield its events as they arrive.
+
+    A failure inside the producer becomes a final ``error`` event. When the
+    client disconnects the generator is closed and the producer is cancelled.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    done = object()
+
+    async def emit(event: str, data: Dict[str, Any]):
+        await queue.put((event, data))
+
+    async def run():
+        try:
+            await producer(emit)
+        except Exception as e:
+            logger.error(f"Stream producer failed: {str(e)}")
+            await queue.put(("error", {"error": str(e)}))
+        finally:
+            await queue.put(done)
+
+    task = asyncio.create_task(run())
+    try:
+        while True:
+            try:
+                item = await asyncio.wait_for(queue.get(), timeout=heartbeat_interval)
+            except asyncio.TimeoutError:
+                yield heartbeat(fmt)
+                continue
+            if item is done:
+                break
+            event, data = item
+            yield format_event(event, data, fmt)
+    finally:
+        if not task.done():
+            task.cancel()
@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+
+from admission import AdmissionController, AdmissionRejected, MemoryBucketStore, SQLiteBucketStore, client_id
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        store = MemoryBucketStore(rate=0.001, burst=20)
+    else:
+        store = SQLiteBucketStore(rate=0.001, burst=20, db_path=str(tmp_path / "buckets.db"))
+    yield store
+    store.close()
+
+
+def test_bucket_spends_and_refunds(store):
+    assert store.take("a", 15) == (True, pytest.approx(5, abs=0.1))
+    allowed, tokens = store.take("a", 10)
+    assert not allowed
+    assert tokens == pytest.approx(5, abs=0.1)
+    assert store.take("a", -15)[1] == pytest.approx(20, abs=0.1)
+    assert store.take("b", 20)[0]
+
+
+def test_cost_above_burst_leaves_the_bucket_in_debt(store):
+    allowed, tokens = store.take("big", 100)
+    assert allowed
+    assert tokens == pytest.approx(-80, abs=0.1)
+    assert not store.take("big", 1)[0]
+
+
+def test_cost_above_burst_needs_a_full_bucket(store):
+    store.take("a", 1)
+    assert not store.take("a", 100)[0]
+
+
+def test_large_requests_cost_more():
+    controller = AdmissionController(MemoryBucketStore(rate=1, burst=20), videos_per_token=50)
+    small = controller.estimate_cost("full-pipeline", {"videos": [{}] * 10, "platform": "TikTok"})
+    large = controller.estimate_cost("full-pipeline", {"videos": [{}] * 10000, "platforms": ["TikTok", "YouTube"]})
+    assert large > small
+    assert large == pytest.approx(1 + 10000 / 50 + 2 * 2)
+    assert controller.estimate_cost("generate-script", [{}] * 500) == 500
+    assert controller.estimate_cost("analyze", {"videos": [{}] * 10000, "analysis_type": "fast"}) == 1
+
+
+def test_admit_charges_large_requests_in_full():
+    async def run():
+        controller = AdmissionController(MemoryBucketStore(rate=2, burst=20))
+        assert await controller.admit("client", 500) == 500
+        controller.release()
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.admit("client", 1)
+        assert rejected.value.status_code == 429
+        # (1 token needed + 480 of debt) at 2 tokens per second
+        assert rejected.value.retry_after == pytest.approx(241, abs=1)
+        assert controller.rejected_quota == 1
+
+    asyncio.run(run())
+
+
+def test_queue_timeout_refunds_the_charge():
+    async def run():
+        store = MemoryBucketStore(rate=0.001, burst=20)
+        controller = AdmissionController(store, max_in_flight=1, queue_timeout=0.01)
+        await controller.admit("first", 1)
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.admit("second", 5)
+        assert rejected.value.status_code == 503
+        assert store.take("second", 0)[1] == pytest.approx(20, abs=0.1)
+        controller.release()
+
+    asyncio.run(run())
+
+
+def test_client_id_ignores_spoofed_forwarded_for():
+    first = client_id(None, "1.1.1.1, 203.0.113.7", "10.0.0.2", trusted_proxies=1)
+    second = client_id(None, "9.9.9.9, 203.0.113.7", "10.0.0.2", trusted_proxies=1)
+    assert first == second == "ip:203.0.113.7"
+    assert client_id(None, "1.1.1.1, 198.51.100.4, 203.0.113.7", "10.0.0.2", trusted_proxies=2) == "ip:198.51.100.4"
+
+
+def test_client_id_falls_back_to_the_peer_address():
+    assert client_id(None, "1.1.1.1", "10.0.0.2") == "ip:10.0.0.2"
+    assert client_id(None, "203.0.113.7", "10.0.0.2", trusted_proxies=2) == "ip:10.0.0.2"
+    assert client_id(None, None, None, trusted_proxies=1) == "ip:unknown"
+
+
+def test_client_id_uses_configured_api_keys_only():
+    controller = AdmissionController(MemoryBucketStore(rate=1, burst=5), api_keys=["secret", ""])
+    key = client_id("secret", "1.1.1.1", "10.0.0.2", 1, controller.api_keys)
+    assert key.startswith("key:")
+    assert "secret" not in key
+    assert key == client_id("secret", None, "10.0.0.3", 0, controller.api_keys)
+    # Unknown keys can't buy a fresh bucket per request
+    assert client_id("random-1", None, "10.0.0.2", 0, controller.api_keys) == "ip:10.0.0.2"
+    assert client_id("secret", None, "10.0.0.2") == "ip:10.0.0.2"
+
+
+def test_stats_hide_client_addresses():
+    controller = AdmissionController(MemoryBucketStore(rate=1, burst=5))
+    controller.store.take("ip:203.0.113.7", 1)
+    lowest = controller.stats()["lowest_buckets"]
+    assert len(lowest) == 1
+    assert "203.0.113.7" not in next(iter(lowest))
+
+
+def test_sqlite_store_opens_on_first_use(tmp_path):
+    db_path = tmp_path / "limits" / "buckets.db"
+    store = SQLiteBucketStore(rate=1, burst=5, db_path=str(db_path))
+    assert not db_path.exists()
+    assert store.take("a", 1)[0]
+    assert db_path.exists()
+    store.close()
@@ -0,0 +1,133 @@
+import asyncio
+from concurrent.futures import Future
+
+import httpx
+
+from agent_executor import AgentExecutor
+from llm_client import LLMClient, attach_llm_client
+from metrics import current_agent
+
+
+class DeferredPool:
+    """Pool whose jobs are already picked up, so cancelling them has no effect, but only run on demand"""
+
+    def __init__(self):
+        self.jobs = []
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_running_or_notify_cancel()
+        self.jobs.append((future, fn, args))
+        return future
+
+    def run_all(self):
+        for future, fn, args in self.jobs:
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                future.set_exception(e)
+
+    def shutdown(self, wait=False):
+        pass
+
+
+class Agent:
+    def __init__(self):
+        self.calls = []
+
+    def analyze(self, name):
+        self.calls.append(name)
+        return name
+
+
+def test_call_cancelled_before_its_thread_starts_never_runs():
+    executor = AgentExecutor()
+    executor._pool = pool = DeferredPool()
+    agent = Agent()
+
+    async def scenario():
+        task = asyncio.create_task(executor.run("strategy", agent, "analyze", "late"))
+        await asyncio.sleep(0)
+        assert pool.jobs
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        # The thread gets to the job only after the caller gave up
+        pool.run_all()
+
+    asyncio.run(scenario())
+
+    stats = executor.stats()["agents"]["strategy"]
+    assert agent.calls == []
+    assert (stats["queued"], stats["in_flight"], stats["calls"]) == (0, 0, 0)
+
+
+def test_completed_calls_are_counted():
+    executor = AgentExecutor(max_workers=2)
+    agent = Agent()
+
+    async def scenario():
+        return await asyncio.gather(*(executor.run("strategy", agent, "analyze", i) for i in range(3)))
+
+    try:
+        assert asyncio.run(scenario()) == [0, 1, 2]
+    finally:
+        executor.shutdown()
+
+    stats = executor.stats()["agents"]["strategy"]
+    assert (stats["queued"], stats["in_flight"], stats["calls"], stats["errors"]) == (0, 0, 3, 0)
+
+
+def test_llm_calls_of_threaded_agents_are_attributed_to_the_agent():
+    seen = []
+
+    class Transport:
+        async def post(self, path, json):
+            seen.append(current_agent.get())
+            return httpx.Response(200, json={"choices": []})
+
+    class LLMAgent:
+        def analyze(self):
+            return self.llm_client.chat_completion("model", [])
+
+    executor = AgentExecutor(max_workers=1)
+    client = LLMClient()
+    client._client = Transport()
+    agent = LLMAgent()
+    attach_llm_client(agent, client=client)
+
+    async def scenario():
+        client._semaphore = asyncio.Semaphore(1)
+        client._loop = asyncio.get_running_loop()
+        return await executor.run("strategy", agent, "analyze")
+
+    try:
+        assert asyncio.run(scenario()) == {"choices": []}
+    finally:
+        executor.shutdown()
+
+    assert seen == ["strategy"]
+    assert client.requests == 1
+
+
+def test_run_coroutine_holds_an_agent_slot():
+    executor = AgentExecutor(default_limit=1)
+    active = []
+
+    async def stream(chunks):
+        active.append(current_agent.get())
+        assert len(active) == 1
+        for _ in range(chunks):
+            await asyncio.sleep(0)
+        active.pop()
+        return chunks
+
+    async def scenario():
+        return await asyncio.gather(*(executor.run_coroutine("scriptwriter", stream, n) for n in (3, 1)))
+
+    try:
+        assert asyncio.run(scenario()) == [3, 1]
+    finally:
+        executor.shutdown()
+
+    stats = executor.stats()["agents"]["scriptwriter"]
+    assert (stats["queued"], stats["in_flight"], stats["calls"]) == (0, 0, 2)
@@ -0,0 +1,38 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from chunked_analysis import chunked_analyze, chunked_analyze_stream
+
+
+def _video(index):
+    return SimpleNamespace(title=f"Video {index}", description="x" * 200, channel="c", views=1000 - index)
+
+
+async def _analyze(shard):
+    return {
+        "hook_patterns": [{"type": "question-based", "example": shard[0].title}],
+        "format_trends": ["talking head"],
+        "engagement_tactics": [],
+        "content_themes": []
+    }
+
+
+@pytest.mark.parametrize("batches", [[], [[]], [[], []]])
+def test_stream_without_videos_raises_value_error(batches):
+    with pytest.raises(ValueError, match="No videos"):
+        asyncio.run(chunked_analyze_stream(iter(batches), _analyze))
+
+
+def test_chunked_analyze_without_videos_raises_value_error():
+    with pytest.raises(ValueError, match="No videos"):
+        asyncio.run(chunked_analyze([], _analyze))
+
+
+def test_stream_skips_empty_batches():
+    batches = [[], [_video(i) for i in range(30)], [], [_video(i) for i in range(30, 45)], []]
+    result = asyncio.run(chunked_analyze_stream(iter(batches), _analyze, token_budget=1000, max_parallel=2))
+    assert result["chunking"]["videos"] == 45
+    assert result["chunking"]["failed_shards"] == []
+    assert result["format_trends"]
@@ -0,0 +1,59 @@
+from types import SimpleNamespace
+
+import pytest
+
+from hook_classifier import classify, label_videos, narrow
+
+
+def _video(title, views=100, description=""):
+    return SimpleNamespace(title=title, description=description, views=views)
+
+
+def test_labels_hooks_formats_and_engagement():
+    labels = label_videos([
+        _video("5 Morning Habits that changed my life"),
+        _video("Why does nobody talk about this?"),
+        _video("My grandma's kitchen")
+    ])
+
+    assert "numbered-list" in labels[0]["hooks"]
+    assert "Numbered list / countdown" in labels[0]["formats"]
+    assert labels[1]["hooks"][0] == "question-based"
+    assert labels[2] == {"hooks": [], "formats": [], "engagement": []}
+
+
+def test_classify_ranks_by_views_and_leaves_themes_empty():
+    result = classify([
+        _video("How to cook rice", views=100),
+        _video("How to fold a shirt", views=300),
+        _video("Why is rice sticky?", views=50),
+        _video("No hook here", views=None)
+    ])
+
+    assert [p["type"] for p in result["hook_patterns"]] == ["how-to", "question-based"]
+    assert result["hook_patterns"][0]["example"] == "How to fold a shirt"
+    assert result["hook_patterns"][0]["videos"] == 2
+    assert result["content_themes"] == []
+    assert result["heuristics"]["unmatched_videos"] == 1
+
+
+def test_classify_rejects_an_empty_batch():
+    with pytest.raises(ValueError):
+        classify([])
+
+
+def test_narrow_an_empty_batch():
+    kept, summary = narrow([])
+
+    assert kept == []
+    assert (summary["videos"], summary["sent"]) == (0, 0)
+
+
+def test_narrow_keeps_top_examples_and_unexplained_videos():
+    videos = [_video(f"How to cook dish {i}", views=i) for i in range(6)]
+    videos.append(_video("Grandma's kitchen", views=1))
+
+    kept, summary = narrow(videos, per_label=2)
+
+    assert [v.title for v in kept] == ["How to cook dish 4", "How to cook dish 5", "Grandma's kitchen"]
+    assert (summary["videos"], summary["sent"], summary["per_label"]) == (7, 3, 2)
@@ -0,0 +1,148 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from incremental_analysis import incremental_analyze
+from memory import ContentMemory, MemoryConfig
+
+VERSION = "model:v1:full"
+
+
+@pytest.fixture
+def memory(tmp_path):
+    memory = ContentMemory(MemoryConfig(
+        db_path=str(tmp_path / "memory.db"),
+        backup_enabled=False,
+        backup_location=str(tmp_path / "backups")
+    ))
+    yield memory
+    memory.close()
+
+
+def _video(index, title=None):
+    return SimpleNamespace(
+        video_id=f"vid{index}",
+        title=title or f"How I fixed my sleep in {index} days",
+        description="What happened when I tried it",
+        views=1000 * (index + 1),
+        publishedAt="2026-10-01",
+        channel="SleepLab"
+    )
+
+
+class Agent:
+    def __init__(self):
+        self.calls = []
+
+    async def __call__(self, videos):
+        self.calls.append([v.video_id for v in videos])
+        return {
+            "hook_patterns": [{"type": "personal-experiment", "example": videos[0].title}],
+            "format_trends": ["talking head"],
+            "engagement_tactics": ["comment prompt"],
+            "content_themes": ["sleep"],
+            "summary": "ok",
+            "chunking": {"shards": 1}
+        }
+
+
+def _run(videos, agent, memory, platform="youtube"):
+    return asyncio.run(incremental_analyze(videos, agent, memory, VERSION, platform))
+
+
+def _stored(memory):
+    with memory._pool.connection() as conn:
+        return (
+            conn.execute("SELECT COUNT(*) FROM content_memory").fetchone()[0],
+            conn.execute("SELECT COUNT(*) FROM analysis_batches").fetchone()[0]
+        )
+
+
+def test_batch_analysis_is_stored_once(memory):
+    agent = Agent()
+    result = _run([_video(i) for i in range(10)], agent, memory)
+
+    assert result["incremental"]["analyzed"] == 10
+    assert _stored(memory) == (10, 1)
+    record = memory.get_content("vid0")
+    assert "batch_analysis" not in record
+    batches = memory.get_analysis_batches([record["analysis_id"]])
+    assert batches[record["analysis_id"]]["content_themes"] == ["sleep"]
+    assert "chunking" not in batches[record["analysis_id"]]
+
+
+def test_only_new_and_changed_videos_are_analyzed(memory):
+    agent = Agent()
+    _run([_video(i) for i in range(5)], agent, memory)
+    videos = [_video(i) for i in range(5)] + [_video(5)]
+    videos[2] = _video(2, title="A new title")
+
+    result = _run(videos, agent, memory)
+
+    assert agent.calls[-1] == ["vid2", "vid5"]
+    assert result["incremental"]["new"] == 1
+    assert result["incremental"]["changed"] == 1
+    assert result["incremental"]["merged_analyses"] == 2
+    assert result["format_trends"]
+
+    _run(videos, agent, memory)
+    assert len(agent.calls) == 2
+
+
+def test_expired_batch_analysis_is_recomputed(memory):
+    agent = Agent()
+    _run([_video(i) for i in range(3)], agent, memory)
+    with memory._transaction() as conn:
+        conn.execute("DELETE FROM analysis_batches")
+
+    result = _run([_video(i) for i in range(3)], agent, memory)
+
+    assert len(agent.calls) == 2
+    assert result["incremental"]["analyzed"] == 3
+
+
+def test_videos_without_platform_stay_out_of_trends(memory):
+    _run([_video(i) for i in range(3)], Agent(), memory, platform=None)
+    _run([_video(i) for i in range(3, 5)], Agent(), memory, platform="TikTok")
+
+    trends = memory.trends(since="2026-09-01", until="2026-10-31", group_by="platform")
+
+    assert [group["platform"] for group in trends["groups"]] == ["tiktok"]
+    assert trends["groups"][0]["totals"]["videos"] == 2
+
+
+def test_records_carry_matching_themes_and_triggers(memory):
+    videos = [_video(0), _video(1, title="Morning routine for busy parents")]
+    videos[1].description = "No filler"
+    videos[0].emotional_triggers = "curiosity, relief"
+
+    _run(videos, Agent(), memory)
+
+    assert memory.get_content("vid0")["content_themes"] == ["sleep"]
+    assert memory.get_content("vid1")["content_themes"] == []
+    trends = memory.trends(since="2026-09-01", until="2026-10-31")
+    assert trends["top"]["theme"] == [{"value": "sleep", "videos": 1, "views": 1000}]
+    assert [t["value"] for t in trends["top"]["emotional_trigger"]] == ["curiosity", "relief"]
+
+
+def test_known_videos_get_their_views_refreshed(memory):
+    agent = Agent()
+    _run([_video(i) for i in range(2)], agent, memory)
+    with memory._transaction() as conn:
+        conn.execute("UPDATE content_memory SET last_updated = datetime('now', '-10 days')")
+    videos = [_video(i) for i in range(2)]
+    videos[0].views = 5000
+
+    result = _run(videos, agent, memory)
+
+    assert len(agent.calls) == 1
+    assert result["incremental"]["refreshed"] == 2
+    assert memory.get_content("vid0")["views"] == 5000
+    assert memory.search(min_views=5000)["total"] == 1
+    with memory._pool.connection() as conn:
+        assert conn.execute(
+            "SELECT COUNT(*) FROM content_memory WHERE last_updated < datetime('now', '-1 days')"
+        ).fetchone()[0] == 0
+    trends = memory.trends(since="2026-09-01", until="2026-10-31")
+    assert trends["totals"] == {"videos": 2, "views": 7000}
@@ -0,0 +1,165 @@
+import asyncio
+
+import pytest
+
+from job_queue import JobQueue, JobStore, WebhookURLError, check_webhook_url
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    yield store
+    store.close()
+
+
+@pytest.mark.parametrize("url", [
+    "http://127.0.0.1:8000/hook",
+    "http://localhost/hook",
+    "http://169.254.169.254/latest/meta-data/",
+    "http://10.0.0.5/hook",
+    "http://192.168.1.10/hook",
+    "http://[::1]/hook",
+    "http://[::ffff:127.0.0.1]/hook",
+    "http://0.0.0.0/hook",
+    "ftp://93.184.216.34/hook",
+    "http:///hook"
+])
+def test_webhook_url_rejects_internal_targets(url):
+    with pytest.raises(WebhookURLError):
+        check_webhook_url(url)
+
+
+def test_webhook_url_accepts_public_address():
+    assert check_webhook_url("https://93.184.216.34/hook") == "https://93.184.216.34/hook"
+
+
+def test_webhook_allowlist():
+    allowed = ("hooks.example.com", ".internal.example")
+    assert check_webhook_url("https://hooks.example.com/x", allowed)
+    assert check_webhook_url("http://ci.internal.example/x", allowed)
+    with pytest.raises(WebhookURLError):
+        check_webhook_url("https://93.184.216.34/hook", allowed)
+
+
+def test_submit_rejects_internal_webhook(store):
+    async def handler(payload, progress):
+        return {}
+
+    queue = JobQueue(store, {"full-pipeline": handler})
+    with pytest.raises(WebhookURLError):
+        asyncio.run(queue.submit("full-pipeline", {}, webhook_url="http://127.0.0.1/hook"))
+    assert store.counts()["queued"] == 0
+
+
+def _expire_lease(store, job_id):
+    with store._connection() as conn:
+        conn.execute("UPDATE jobs SET heartbeat_at = 0 WHERE id = ?", (job_id,))
+
+
+def test_claim_takes_highest_priority_first(store):
+    low = store.create("full-pipeline", {"n": 1})
+    high = store.create("full-pipeline", {"n": 2}, priority=5)
+    later = store.create("full-pipeline", {"n": 3})
+
+    assert store.get(later)["queue_position"] == 2
+    assert store.claim("w1", lease=60, max_attempts=3)["job_id"] == high
+    assert store.claim("w1", lease=60, max_attempts=3)["job_id"] == low
+    assert store.claim("w1", lease=60, max_attempts=3)["job_id"] == later
+    assert store.claim("w1", lease=60, max_attempts=3) is None
+
+
+def test_live_lease_is_not_reclaimed(store):
+    job_id = store.create("full-pipeline", {})
+    store.claim("w1", lease=60, max_attempts=3)
+    store.heartbeat(job_id, "w1")
+
+    assert store.claim("w2", lease=60, max_attempts=3) is None
+    assert store.get(job_id)["status"] == "running"
+
+
+def test_expired_lease_is_reclaimed_by_another_worker(store):
+    job_id = store.create("full-pipeline", {"videos": []})
+    assert store.claim("w1", lease=60, max_attempts=3)["attempts"] == 1
+    _expire_lease(store, job_id)
+
+    job = store.claim("w2", lease=60, max_attempts=3)
+
+    assert job["job_id"] == job_id
+    assert job["attempts"] == 2
+    assert job["payload"] == {"videos": []}
+    # The lost worker can no longer renew the lease
+    store.heartbeat(job_id, "w1")
+    _expire_lease(store, job_id)
+    store.heartbeat(job_id, "w1")
+    with store._connection() as conn:
+        assert conn.execute("SELECT heartbeat_at FROM jobs WHERE id = ?", (job_id,)).fetchone()[0] == 0
+
+
+def test_job_is_abandoned_after_max_attempts(store):
+    job_id = store.create("full-pipeline", {})
+    for _ in range(2):
+        assert store.claim("w", lease=60, max_attempts=2)["job_id"] == job_id
+        _expire_lease(store, job_id)
+
+    assert store.claim("w", lease=60, max_attempts=2) is None
+    job = store.get(job_id)
+    assert job["status"] == "failed"
+    assert job["error"] == "Worker lost too many times"
+
+
+def test_finish_requeue_and_cancel(store):
+    done = store.create("full-pipeline", {})
+    store.claim("w", lease=60, max_attempts=3)
+    store.finish(done, "w", "succeeded", {"ok": True})
+    assert store.get(done)["result"] == {"ok": True}
+
+    interrupted = store.create("full-pipeline", {})
+    store.claim("w", lease=60, max_attempts=3)
+    store.requeue(interrupted, "w")
+    assert store.get(interrupted)["status"] == "queued"
+
+    assert store.cancel(interrupted)
+    assert not store.cancel(done)
+    assert store.counts() == {"queued": 0, "running": 0, "succeeded": 1, "failed": 0, "cancelled": 1}
+
+
+def test_queue_runs_jobs_and_records_failures(store):
+    async def run():
+        async def handler(payload, progress):
+            await progress({"step": 1})
+            if payload.get("fail"):
+                raise RuntimeError("boom")
+            return {"echo": payload["n"]}
+
+        queue = JobQueue(store, {"full-pipeline": handler}, workers=1, poll_interval=0.01)
+        queue.start()
+        ok = await queue.submit("full-pipeline", {"n": 1})
+        bad = await queue.submit("full-pipeline", {"n": 2, "fail": True})
+        for _ in range(200):
+            jobs = [await queue.get(ok["job_id"]), await queue.get(bad["job_id"])]
+            if all(job["status"] in ("succeeded", "failed") for job in jobs):
+                break
+            await asyncio.sleep(0.01)
+        await queue.stop()
+        return jobs
+
+    ok, bad = asyncio.run(run())
+    assert ok["status"] == "succeeded"
+    assert ok["result"] == {"echo": 1}
+    assert ok["progress"] == {"step": 1}
+    assert bad["status"] == "failed"
+    assert bad["error"] == "boom"
+
+
+def test_stale_worker_cannot_finish_reclaimed_job(store):
+    job_id = store.create("full-pipeline", {})
+    store.claim("old", lease=60, max_attempts=3)
+    _expire_lease(store, job_id)
+    store.claim("new", lease=60, max_attempts=3)
+
+    store.finish(job_id, "old", "failed", None, "late")
+    store.requeue(job_id, "old")
+    assert store.get(job_id)["status"] == "running"
+
+    store.finish(job_id, "new", "succeeded", {"ok": True})
+    assert store.get(job_id)["status"] == "succeeded"
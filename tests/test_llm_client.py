@@ -0,0 +1,200 @@
+import asyncio
+
+import httpx
+import pytest
+
+from llm_client import CircuitBreaker, CircuitOpenError, LLMClient, LLMRequestError, SyncLLMClient, attach_llm_client
+
+
+class FakeTransport:
+    """Stands in for the httpx client: answers every POST with ``respond()``"""
+
+    def __init__(self, respond):
+        self.respond = respond
+        self.calls = 0
+
+    async def post(self, path, json):
+        self.calls += 1
+        return await self.respond()
+
+
+def _client(respond, **options):
+    client = LLMClient(max_retries=0, backoff_base=0, **options)
+    client._client = FakeTransport(respond)
+    client._semaphore = asyncio.Semaphore(4)
+    return client
+
+
+def _half_open(client):
+    client.breaker.opened_at = 0.0
+    assert client.breaker.state == "half-open"
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    assert breaker.rejected == 1
+
+
+def test_half_open_lets_a_single_trial_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+
+def test_cancelled_trial_releases_the_breaker():
+    async def run():
+        async def hang():
+            await asyncio.Event().wait()
+
+        client = _client(hang, reset_timeout=60)
+        _half_open(client)
+        trial = asyncio.ensure_future(client.post_json("/chat/completions", {}))
+        await asyncio.sleep(0)
+        assert client.breaker.trial_in_flight
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+        assert not client.breaker.trial_in_flight
+        assert client.breaker.state == "half-open"
+
+        async def ok():
+            return httpx.Response(200, json={"choices": []})
+
+        client._client = FakeTransport(ok)
+        assert await client.post_json("/chat/completions", {}) == {"choices": []}
+        assert client.breaker.state == "closed"
+
+    asyncio.run(run())
+
+
+def test_cancelled_call_does_not_release_another_trial():
+    async def run():
+        async def hang():
+            await asyncio.Event().wait()
+
+        client = _client(hang, reset_timeout=60)
+        regular = asyncio.ensure_future(client.post_json("/chat/completions", {}))
+        await asyncio.sleep(0)
+        _half_open(client)
+        trial = asyncio.ensure_future(client.post_json("/chat/completions", {}))
+        await asyncio.sleep(0)
+        regular.cancel()
+        await asyncio.gather(regular, return_exceptions=True)
+        assert client.breaker.trial_in_flight
+        with pytest.raises(CircuitOpenError):
+            await client.post_json("/chat/completions", {})
+        trial.cancel()
+        await asyncio.gather(trial, return_exceptions=True)
+
+    asyncio.run(run())
+
+
+def test_undecodable_trial_response_reopens_the_circuit():
+    async def run():
+        async def garbage():
+            return httpx.Response(200, content=b"<html>")
+
+        client = _client(garbage, reset_timeout=60)
+        _half_open(client)
+        with pytest.raises(ValueError):
+            await client.post_json("/chat/completions", {})
+        assert not client.breaker.trial_in_flight
+        assert client.breaker.state == "open"
+        assert client.failures == 1
+
+    asyncio.run(run())
+
+
+def test_non_retryable_status_keeps_the_circuit_closed():
+    async def bad_request():
+        return httpx.Response(400, text="bad request")
+
+    client = _client(bad_request, failure_threshold=1)
+    with pytest.raises(LLMRequestError) as raised:
+        asyncio.run(client.post_json("/chat/completions", {}))
+    assert raised.value.status_code == 400
+    assert client.breaker.state == "closed"
+
+
+def test_non_retryable_trial_leaves_the_circuit_half_open():
+    async def run():
+        async def bad_request():
+            return httpx.Response(400, text="bad request")
+
+        client = _client(bad_request, reset_timeout=60)
+        _half_open(client)
+        client.breaker.failures = 3
+        with pytest.raises(LLMRequestError):
+            await client.post_json("/chat/completions", {})
+        assert not client.breaker.trial_in_flight
+        assert client.breaker.state == "half-open"
+        assert client.breaker.failures == 3
+
+    asyncio.run(run())
+
+
+def test_hedged_send_cancelled_during_first_wait_cancels_the_primary():
+    async def run():
+        started = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        async def hang():
+            started.set()
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        client = _client(hang, hedge_after=60)
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(client._hedged_send("/chat/completions", {}), timeout=0.05)
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
+        assert started.is_set()
+        assert client.in_flight == 0
+
+    asyncio.run(run())
+
+
+def test_sync_client_runs_calls_on_the_client_loop():
+    async def run():
+        async def ok():
+            return httpx.Response(200, json={"choices": [], "usage": {"prompt_tokens": 3}})
+
+        client = _client(ok)
+        client._loop = asyncio.get_running_loop()
+        sync = SyncLLMClient(client)
+
+        with pytest.raises(RuntimeError):
+            sync.chat_completion("model", [])
+        assert await asyncio.to_thread(sync.chat_completion, "model", []) == {"choices": [], "usage": {"prompt_tokens": 3}}
+        assert client.requests == 1
+
+    asyncio.run(run())
+
+
+def test_attach_gives_blocking_agents_the_sync_client():
+    class BlockingAgent:
+        def analyze(self):
+            pass
+
+    class AsyncAgent:
+        async def analyze(self):
+            pass
+
+    client = LLMClient()
+    blocking, native = BlockingAgent(), AsyncAgent()
+    attach_llm_client(blocking, native, client=client)
+
+    assert isinstance(blocking.llm_client, SyncLLMClient)
+    assert blocking.llm_client.client is client
+    assert native.llm_client is client
@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+import memory_codecs
+from memory import ContentMemory, MemoryConfig
+
+ANALYSIS = {
+    "title": "Café routine ☕",
+    "views": 1234,
+    "hook_patterns": [{"type": "question-based", "example": "Why?"}],
+    "content_themes": ["habits"],
+    "niche_insights": {"problems": [{"value": "No time", "count": 2, "views": 10}]},
+    "nested": {"empty": [], "none": None, "flag": True, "ratio": 0.5}
+}
+
+
+@pytest.mark.parametrize("codec", sorted(memory_codecs.available_codecs()))
+def test_every_codec_round_trips(codec):
+    encoded = memory_codecs.encode(ANALYSIS, codec)
+
+    assert memory_codecs.format_version(encoded) == memory_codecs.available_codecs()[codec]
+    assert memory_codecs.decode(encoded) == ANALYSIS
+
+
+def test_zlib_is_smaller_than_json():
+    assert len(memory_codecs.encode(ANALYSIS, "zlib")) < len(memory_codecs.encode(ANALYSIS, "json"))
+
+
+def test_legacy_text_rows_and_errors():
+    assert memory_codecs.decode(json.dumps(ANALYSIS)) == ANALYSIS
+    assert memory_codecs.format_version(json.dumps(ANALYSIS)) == 0
+    assert memory_codecs.decode(None) is None
+    with pytest.raises(ValueError):
+        memory_codecs.decode(bytes((250,)) + b"{}")
+    with pytest.raises(ValueError):
+        memory_codecs.get_codec("lz4")
+
+
+def test_migrate_codec_rewrites_rows_in_the_target_format(tmp_path):
+    memory = ContentMemory(MemoryConfig(
+        db_path=str(tmp_path / "memory.db"),
+        backup_enabled=False,
+        backup_location=str(tmp_path / "backups"),
+        codec="json"
+    ))
+    try:
+        memory.add_content("a", "youtube", ANALYSIS)
+        with memory._transaction() as conn:
+            conn.execute("INSERT INTO content_memory (video_id, platform, analysis_data) VALUES ('b', 'youtube', ?)", (json.dumps(ANALYSIS),))
+
+        assert memory.migrate_codec("zlib", batch_size=1) == {"scanned": 2, "migrated": 2}
+        assert memory.migrate_codec("zlib") == {"scanned": 2, "migrated": 0}
+        assert memory.get_many(["a", "b"]) == {"a": ANALYSIS, "b": ANALYSIS}
+    finally:
+        memory.close()
@@ -0,0 +1,68 @@
+import asyncio
+import json
+
+import pytest
+
+from memory import ContentMemory, MemoryConfig
+from memory_maintenance import MemoryMaintenance
+
+
+@pytest.fixture
+def memory(tmp_path):
+    memory = ContentMemory(MemoryConfig(
+        db_path=str(tmp_path / "memory.db"),
+        backup_enabled=True,
+        backup_location=str(tmp_path / "backups")
+    ))
+    yield memory
+    memory.close()
+
+
+def _worker(memory, runs):
+    """A scheduler as one gunicorn worker would build it, with counting tasks"""
+    maintenance = MemoryMaintenance(memory, cleanup_interval=3600, backup_interval=86400, vacuum_interval=0, analyze_interval=0)
+    for task in maintenance.tasks:
+        task.action = lambda name=task.name: runs.append(name)
+        task.next_run = 0
+    return maintenance
+
+
+def test_round_is_not_repeated_by_another_worker(memory):
+    runs = []
+    first, second = _worker(memory, runs), _worker(memory, runs)
+
+    asyncio.run(first.run_due())
+    asyncio.run(second.run_due())
+
+    assert runs == ["cleanup", "backup"]
+    assert all(task.next_run > 0 for task in second.tasks if task.interval)
+
+
+def test_task_runs_again_once_its_interval_has_elapsed(memory):
+    runs = []
+    first = _worker(memory, runs)
+    asyncio.run(first.run_due())
+
+    with open(first.state_path) as f:
+        state = json.load(f)
+    state["cleanup"] -= 3601
+    with open(first.state_path, "w") as f:
+        json.dump(state, f)
+
+    asyncio.run(_worker(memory, runs).run_due())
+
+    assert runs == ["cleanup", "backup", "cleanup"]
+
+
+def test_busy_lock_defers_to_the_running_worker(memory):
+    runs = []
+    first, second = _worker(memory, runs), _worker(memory, runs)
+    lock = first._try_lock()
+    try:
+        asyncio.run(second.run_due())
+    finally:
+        lock.close()
+
+    assert runs == []
+    asyncio.run(second.run_due())
+    assert runs == ["cleanup", "backup"]
@@ -0,0 +1,62 @@
+import json
+import sqlite3
+
+from memory import ContentMemory, MemoryConfig
+
+
+def _config(tmp_path):
+    return MemoryConfig(
+        db_path=str(tmp_path / "memory.db"),
+        backup_enabled=False,
+        backup_location=str(tmp_path / "backups"),
+        batch_size=2
+    )
+
+
+def test_search_columns_are_backfilled_on_upgrade(tmp_path):
+    # A database written before search existed: no search columns, no FTS index
+    conn = sqlite3.connect(tmp_path / "memory.db")
+    conn.execute('''
+        CREATE TABLE content_memory (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            video_id TEXT UNIQUE,
+            platform TEXT,
+            analysis_data TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.executemany(
+        "INSERT INTO content_memory (video_id, platform, analysis_data) VALUES (?, ?, ?)",
+        [
+            (f"v{i}", "youtube", json.dumps({"title": f"Sleep better tip {i}", "views": i * 100, "niche": "Health"}))
+            for i in range(5)
+        ]
+    )
+    conn.commit()
+    conn.close()
+
+    memory = ContentMemory(_config(tmp_path))
+    try:
+        result = memory.search(query="sleep", facets=["niche"])
+        assert result["total"] == 5
+        assert result["results"][0]["views"] == 400
+        assert result["facets"]["niche"] == [{"value": "Health", "count": 5}]
+    finally:
+        memory.close()
+
+
+def test_search_schema_is_not_backfilled_again(tmp_path):
+    memory = ContentMemory(_config(tmp_path))
+    memory.add_content("v1", "youtube", {"title": "Sleep better", "views": 10})
+    memory.close()
+
+    memory = ContentMemory(_config(tmp_path))
+    try:
+        calls = []
+        memory.reindex_search = lambda *args: calls.append(args)
+        memory._initialize_database()
+        assert calls == []
+        assert memory.search(query="sleep")["total"] == 1
+    finally:
+        memory.close()
@@ -0,0 +1,60 @@
+from types import SimpleNamespace
+
+import pytest
+
+from near_duplicates import _MIN_LENGTH, cluster_texts, collapse_near_duplicates
+
+
+def _video(title, views=100, description=""):
+    return SimpleNamespace(title=title, description=description, views=views)
+
+
+def test_texts_below_min_length_are_never_merged():
+    short = "a" * (_MIN_LENGTH - 1)
+    long = "a" * _MIN_LENGTH
+
+    assert cluster_texts([short, short]) == [0, 1]
+    assert cluster_texts([long, long]) == [0, 0]
+
+
+def test_threshold_decides_which_candidates_merge():
+    base = "the quick brown fox jumps over the lazy dog every single morning"
+    edited = base.replace("lazy", "sleepy")
+
+    assert cluster_texts([base, edited], threshold=0.5) == [0, 0]
+    assert cluster_texts([base, edited], threshold=1.0) == [0, 1]
+    unrelated = "completely different words about cooking rice at home tonight"
+    assert cluster_texts([base, unrelated], threshold=0.3) == [0, 1]
+
+
+def test_reuploads_collapse_into_the_most_viewed_with_summed_views():
+    videos = [
+        _video("5 Morning Habits That Changed My Life", views=100),
+        _video("5 morning habits that changed my life (reupload) #shorts", views=300),
+        _video("How to cook rice perfectly every time", views=50)
+    ]
+
+    kept, report = collapse_near_duplicates(videos)
+
+    assert [v.views for v in kept] == [400, 50]
+    assert kept[0].title == videos[1].title
+    assert videos[1].views == 300
+    assert (report["clusters"], report["duplicates"], report["collapsed_clusters"]) == (2, 1, 1)
+    assert report["largest_clusters"] == [{"title": videos[1].title, "size": 2, "views": 400}]
+
+
+def test_template_titles_stay_apart_at_the_default_threshold():
+    videos = [_video("5 Morning Habits That Changed My Life"), _video("5 Evening Habits That Changed My Life")]
+
+    kept, report = collapse_near_duplicates(videos)
+
+    assert len(kept) == 2
+    assert report["duplicates"] == 0
+
+
+def test_invalid_threshold_and_empty_batch():
+    with pytest.raises(ValueError):
+        collapse_near_duplicates([_video("anything at all")], threshold=0)
+    kept, report = collapse_near_duplicates([])
+    assert kept == []
+    assert report["clusters"] == 0
@@ -0,0 +1,69 @@
+from types import SimpleNamespace
+
+import pytest
+
+from niche_engine import INSIGHT_FIELDS, filter_and_aggregate, insight_values
+
+
+def _video(views, **fields):
+    values = dict.fromkeys(INSIGHT_FIELDS.values())
+    values.update(fields)
+    return SimpleNamespace(views=views, **values)
+
+
+VIDEOS = [
+    _video(100, niche="Home Fitness", problem="No time", audience="Busy parents"),
+    _video(300, niche="home fitness", problem="No time", audience="Students"),
+    _video(50, niche="Café Culture", problem="Bad coffee", audience="Busy parents"),
+    _video(None, niche="Fitness Nutrition", problem=None, audience="Athletes")
+]
+
+
+def test_filters_are_case_and_accent_insensitive():
+    filtered, _ = filter_and_aggregate(VIDEOS, target_niche="CAFE")
+    assert filtered == [VIDEOS[2]]
+
+    filtered, _ = filter_and_aggregate(VIDEOS, target_niche="fitness", target_audience="busy")
+    assert filtered == [VIDEOS[0]]
+
+
+def test_match_modes():
+    assert len(filter_and_aggregate(VIDEOS, target_niche="fit", match_mode="substring")[0]) == 3
+    assert filter_and_aggregate(VIDEOS, target_niche="fit", match_mode="token")[0] == []
+    assert len(filter_and_aggregate(VIDEOS, target_niche="fitness home", match_mode="token")[0]) == 2
+    assert filter_and_aggregate(VIDEOS, target_niche="fit nut", match_mode="prefix")[0] == [VIDEOS[3]]
+    with pytest.raises(ValueError):
+        filter_and_aggregate(VIDEOS, target_niche="fit", match_mode="regex")
+
+
+def test_insights_merge_spellings_and_rank_by_views():
+    _, insights = filter_and_aggregate(VIDEOS)
+
+    assert insights["niches"] == [
+        {"value": "Home Fitness", "count": 2, "views": 400},
+        {"value": "Café Culture", "count": 1, "views": 50},
+        {"value": "Fitness Nutrition", "count": 1, "views": 0}
+    ]
+    assert insights["problems"][0] == {"value": "No time", "count": 2, "views": 400}
+    assert insights["solutions"] == []
+    assert set(insights) == set(INSIGHT_FIELDS)
+
+
+def test_top_k_and_empty_input():
+    _, insights = filter_and_aggregate(VIDEOS, top_k=1)
+    assert [entry["value"] for entry in insights["audiences"]] == ["Students"]
+
+    filtered, insights = filter_and_aggregate([], target_niche="fitness")
+    assert filtered == []
+    assert all(entries == [] for entries in insights.values())
+
+
+def test_insight_values_keeps_the_script_request_shape():
+    _, insights = filter_and_aggregate(VIDEOS)
+
+    values = insight_values(insights)
+
+    assert values["niches"] == ["Home Fitness", "Café Culture", "Fitness Nutrition"]
+    assert values["solutions"] == []
+    # Analyses stored before the ranked shape pass through unchanged
+    assert insight_values({"problems": ["No time"]}) == {"problems": ["No time"]}
@@ -0,0 +1,99 @@
+import asyncio
+import gzip
+import json
+from types import SimpleNamespace
+
+import pytest
+from starlette.datastructures import Headers
+
+import responses
+from responses import CompressionMiddleware, select_fields
+
+RESULT = {
+    "summary": "ok",
+    "script": {"title": "T", "body": "B"},
+    "variants": [
+        {"platform": "tiktok", "script": {"title": "A", "body": "x"}},
+        {"platform": "youtube", "script": {"title": "B", "body": "y"}}
+    ]
+}
+
+
+def test_select_fields_nested_paths():
+    assert select_fields(RESULT, "script.title,variants.script.title") == {
+        "script": {"title": "T"},
+        "variants": [{"script": {"title": "A"}}, {"script": {"title": "B"}}]
+    }
+    # A shorter path selects the whole value, whatever the order
+    assert select_fields(RESULT, "script.title,script") == {"script": RESULT["script"]}
+    assert select_fields(RESULT, "script,script.title") == {"script": RESULT["script"]}
+
+
+def test_select_fields_ignores_unknown_paths_and_keeps_input():
+    assert select_fields(RESULT, "missing,summary.length,script.missing, ,") == {"summary": "ok", "script": {}}
+    assert select_fields(RESULT, None) is RESULT
+    assert select_fields(RESULT, "") is RESULT
+    assert RESULT["script"] == {"title": "T", "body": "B"}
+
+
+def _encoding(accept_encoding):
+    return CompressionMiddleware(None)._encoding(Headers({"accept-encoding": accept_encoding}))
+
+
+@pytest.fixture
+def with_brotli(monkeypatch):
+    # Only its presence matters for the choice
+    monkeypatch.setattr(responses, "brotli", SimpleNamespace())
+
+
+def test_encoding_without_brotli(monkeypatch):
+    monkeypatch.setattr(responses, "brotli", None)
+    assert _encoding("gzip, deflate, br") == "gzip"
+    assert _encoding("br") is None
+    assert _encoding("") is None
+    assert _encoding("gzip;q=0") is None
+
+
+def test_encoding_follows_client_preference(with_brotli):
+    assert _encoding("gzip, br") == "br"
+    assert _encoding("br;q=0.5, gzip") == "gzip"
+    assert _encoding("br;q=bogus, gzip;q=0.1") == "gzip"
+    assert _encoding("identity") is None
+
+
+def _respond(app_body, accept_encoding, content_type=b"application/json", minimum_size=100):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", content_type)]})
+        await send({"type": "http.response.body", "body": app_body})
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "headers": [(b"accept-encoding", accept_encoding)]}
+    asyncio.run(CompressionMiddleware(app, minimum_size=minimum_size)(scope, None, send))
+    return Headers(raw=sent[0]["headers"]), sent[1]["body"]
+
+
+def test_large_json_is_gzipped(monkeypatch):
+    monkeypatch.setattr(responses, "brotli", None)
+    body = json.dumps({"items": ["same text"] * 100}).encode()
+
+    headers, compressed = _respond(body, b"gzip")
+
+    assert headers["content-encoding"] == "gzip"
+    assert headers["vary"] == "Accept-Encoding"
+    assert int(headers["content-length"]) == len(compressed)
+    assert gzip.decompress(compressed) == body
+
+
+def test_small_or_binary_responses_pass_through(monkeypatch):
+    monkeypatch.setattr(responses, "brotli", None)
+    small = b'{"ok":true}'
+    assert _respond(small, b"gzip") == (Headers(raw=[(b"content-type", b"application/json")]), small)
+
+    image = b"\x89PNG" * 100
+    headers, body = _respond(image, b"gzip", content_type=b"image/png")
+    assert "content-encoding" not in headers
+    assert body == image
@@ -0,0 +1,93 @@
+import asyncio
+
+from result_cache import ResultCache
+
+
+class SharedTier:
+    def __init__(self):
+        self.data = {}
+
+    def get_cached_result(self, key):
+        return self.data.get(key)
+
+    def put_cached_result(self, key, value, ttl):
+        self.data[key] = value
+
+
+def test_shared_tier_is_opened_on_first_use():
+    opened = []
+
+    def factory():
+        opened.append(SharedTier())
+        return opened[-1]
+
+    cache = ResultCache(shared_factory=factory)
+    assert opened == []
+
+    async def compute():
+        return {"answer": 42}
+
+    assert asyncio.run(cache.get_or_compute("k", compute)) == {"answer": 42}
+    assert len(opened) == 1
+    assert opened[0].data["k"] == '{"answer": 42}'
+    assert cache.stats()["shared_tier"]
+
+
+def test_failing_shared_tier_is_disabled():
+    def factory():
+        raise OSError("read-only file system")
+
+    cache = ResultCache(shared_factory=factory)
+
+    async def compute():
+        return 1
+
+    assert asyncio.run(cache.get_or_compute("k", compute)) == 1
+    assert not cache.stats()["shared_tier"]
+
+
+def test_coalesced_request_survives_cancelled_leader():
+    async def run():
+        cache = ResultCache()
+        started = asyncio.Event()
+        calls = []
+
+        async def slow():
+            calls.append("leader")
+            started.set()
+            await asyncio.Event().wait()
+
+        async def fast():
+            calls.append("waiter")
+            return {"value": 1}
+
+        leader = asyncio.ensure_future(cache.get_or_compute("k", slow))
+        await started.wait()
+        waiter = asyncio.ensure_future(cache.get_or_compute("k", fast))
+        await asyncio.sleep(0)
+        leader.cancel()
+
+        assert await waiter == {"value": 1}
+        assert leader.cancelled()
+        assert calls == ["leader", "waiter"]
+        assert cache.coalesced == 1
+        assert await cache.get_or_compute("k", slow) == {"value": 1}
+
+    asyncio.run(run())
+
+
+def test_coalesced_requests_share_one_computation():
+    async def run():
+        cache = ResultCache()
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return [1, 2]
+
+        results = await asyncio.gather(*[cache.get_or_compute("k", compute) for _ in range(5)])
+        assert results == [[1, 2]] * 5
+        assert len(calls) == 1
+
+    asyncio.run(run())
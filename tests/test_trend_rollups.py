@@ -0,0 +1,126 @@
+from datetime import datetime
+
+import pytest
+
+from memory import ContentMemory, MemoryConfig
+
+
+@pytest.fixture
+def memory(tmp_path):
+    memory = ContentMemory(MemoryConfig(
+        db_path=str(tmp_path / "memory.db"),
+        backup_enabled=False,
+        backup_location=str(tmp_path / "backups")
+    ))
+    yield memory
+    memory.close()
+
+
+def _analysis(hook_type, views):
+    return {
+        "niche": "Fitness",
+        "views": views,
+        "publishedAt": datetime.utcnow().strftime("%Y-%m-%d"),
+        "hook_type": hook_type,
+        "content_themes": ["habits"]
+    }
+
+
+def _rows(memory):
+    with memory._pool.connection() as conn:
+        return sorted(conn.execute("SELECT * FROM trend_rollups WHERE videos > 0").fetchall())
+
+
+def _expire(memory, video_id):
+    with memory._transaction() as conn:
+        conn.execute(
+            "UPDATE content_memory SET last_updated = datetime('now', '-365 days') WHERE video_id = ?",
+            (video_id,)
+        )
+
+
+def test_upsert_replaces_previous_contribution(memory):
+    memory.add_content("a", "YouTube", _analysis("question-based", 100))
+    memory.add_many([("a", "youtube", _analysis("how-to", 300)), ("b", "youtube", _analysis("how-to", 50))])
+
+    result = memory.trends(days=1)
+
+    assert result["totals"] == {"videos": 2, "views": 350}
+    assert result["top"]["hook_type"] == [{"value": "how-to", "videos": 2, "views": 350}]
+
+
+def test_rollups_outlive_content_retention(memory):
+    memory.add_content("a", "youtube", _analysis("how-to", 100))
+    memory.add_content("b", "youtube", _analysis("how-to", 10))
+    _expire(memory, "a")
+
+    assert memory.cleanup_old_entries() == 1
+    assert memory.trends(days=1)["totals"] == {"videos": 2, "views": 110}
+
+    # Ingested again after expiring: replaces its old contribution
+    memory.add_content("a", "youtube", _analysis("how-to", 150))
+    result = memory.trends(days=1)
+
+    assert result["totals"] == {"videos": 2, "views": 160}
+    assert result["top"]["theme"] == [{"value": "habits", "videos": 2, "views": 160}]
+
+
+def test_prune_drops_days_before_rollup_retention(memory):
+    old = {**_analysis("how-to", 100), "publishedAt": "2020-01-01"}
+    memory.add_many([("a", "youtube", old), ("b", "youtube", _analysis("how-to", 10))])
+
+    memory.cleanup_old_entries()
+
+    with memory._pool.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM trend_rollups WHERE day < '2021-01-01'").fetchone()[0] == 0
+        assert conn.execute("SELECT video_id FROM trend_rollup_ledger").fetchall() == [("b",)]
+    # Re-ingesting a pruned video does not take back counts that are gone
+    memory.add_content("a", "youtube", old)
+    assert memory.trends(since="2020-01-01", until="2020-01-01")["totals"] == {"videos": 1, "views": 100}
+
+
+def test_ledger_is_backfilled_on_upgrade(tmp_path):
+    config = MemoryConfig(
+        db_path=str(tmp_path / "memory.db"),
+        backup_enabled=False,
+        backup_location=str(tmp_path / "backups")
+    )
+    memory = ContentMemory(config)
+    memory.add_many([("a", "youtube", _analysis("how-to", 100)), ("b", "youtube", _analysis("how-to", 10))])
+    with memory._transaction() as conn:
+        conn.execute("DROP TABLE trend_rollup_ledger")
+    memory.close()
+
+    memory = ContentMemory(config)
+    try:
+        assert memory.trends(days=1)["totals"] == {"videos": 2, "views": 110}
+        memory.add_content("a", "youtube", _analysis("how-to", 50))
+        assert memory.trends(days=1)["totals"] == {"videos": 2, "views": 60}
+    finally:
+        memory.close()
+
+
+def test_incremental_rollups_match_rebuild(memory):
+    memory.add_many([
+        ("a", "youtube", _analysis("how-to", 100)),
+        ("b", "tiktok", _analysis("shock-based", 20)),
+        ("a", "youtube", _analysis("question-based", 150))
+    ])
+    incremental = _rows(memory)
+
+    memory.rebuild_rollups()
+
+    assert _rows(memory) == incremental
+
+
+def test_group_by_and_filters(memory):
+    memory.add_many([
+        ("a", "youtube", _analysis("how-to", 100)),
+        ("b", "tiktok", _analysis("shock-based", 200))
+    ])
+
+    grouped = memory.trends(days=1, group_by="platform", dimensions=["hook_type"])
+    assert [g["platform"] for g in grouped["groups"]] == ["tiktok", "youtube"]
+    assert memory.trends(days=1, platform="YouTube")["totals"] == {"videos": 1, "views": 100}
+    with pytest.raises(ValueError):
+        memory.trends(group_by="channel")
@@ -0,0 +1,91 @@
+import gzip
+import io
+import json
+
+from pydantic import BaseModel
+
+from video_ingest import IngestReport, iter_batches, iter_records, open_input
+
+
+class Video(BaseModel):
+    title: str
+    views: int
+
+
+def _records(text, read_size=64):
+    return list(iter_records(io.StringIO(text), read_size))
+
+
+def _errors(records):
+    return [(number, str(value)) for number, value in records if isinstance(value, Exception)]
+
+
+def test_ndjson_skips_blank_lines_and_reports_malformed_ones():
+    records = _records('{"title": "a", "views": 1}\n\n{broken\n  {"title": "b", "views": 2}\n')
+
+    assert [(n, v) for n, v in records if not isinstance(v, Exception)] == [
+        (1, {"title": "a", "views": 1}),
+        (4, {"title": "b", "views": 2})
+    ]
+    assert [n for n, _ in _errors(records)] == [3]
+
+
+def test_array_elements_span_read_buffers():
+    videos = [{"title": "x" * 100, "views": i * 1000003} for i in range(20)]
+
+    records = _records("  \n" + json.dumps(videos, indent=2), read_size=7)
+
+    assert records == list(enumerate(videos, 1))
+
+
+def test_unclosed_and_malformed_arrays():
+    assert _errors(_records('[{"title": "a", "views": 1},')) == [(2, "Unexpected end of input: the JSON array is not closed")]
+    records = _records('[{"title": "a", "views": 1}, {oops}, {"title": "b", "views": 2}]')
+    assert records[0] == (1, {"title": "a", "views": 1})
+    assert len(records) == 2
+    assert "the rest of the array was skipped" in str(records[1][1])
+
+
+def _truncated_gzip(path, text):
+    data = gzip.compress(text.encode("utf-8"))
+    path.write_bytes(data[:len(data) // 2])
+    return str(path)
+
+
+def test_truncated_gzip_ndjson_keeps_the_records_before_the_damage(tmp_path):
+    text = "\n".join(json.dumps({"title": f"video {i}", "views": i}) for i in range(5000))
+    path = _truncated_gzip(tmp_path / "export.ndjson.gz", text)
+
+    with open_input(path) as f:
+        records = list(iter_records(f))
+
+    assert len(records) > 1
+    assert all(isinstance(value, dict) for _, value in records[:-1])
+    number, error = records[-1]
+    assert number == records[-2][0] + 1
+    assert "truncated or corrupt" in str(error)
+
+
+def test_truncated_gzip_array_keeps_the_records_before_the_damage(tmp_path):
+    text = json.dumps([{"title": f"video {i}", "views": i} for i in range(5000)])
+    path = _truncated_gzip(tmp_path / "export.json.gz", text)
+
+    with open_input(path) as f:
+        records = list(iter_records(f, read_size=4096))
+
+    assert records[0] == (1, {"title": "video 0", "views": 0})
+    assert "truncated or corrupt" in str(records[-1][1])
+
+
+def test_batches_validate_and_report(tmp_path):
+    records = _records('[{"title": "a", "views": 1}, 5, {"title": "b"}, {"title": "c", "views": 3}, {"title": "d", "views": 4}]')
+    report = IngestReport(error_file=str(tmp_path / "errors.ndjson"))
+
+    batches = list(iter_batches(iter(records), Video, 2, report))
+    report.close()
+
+    assert [[v.title for v in batch] for batch in batches] == [["a", "c"], ["d"]]
+    summary = report.summary()
+    assert (summary["records"], summary["valid"], summary["invalid"]) == (5, 3, 2)
+    assert [e["record"] for e in summary["errors"]] == [2, 3]
+    assert len((tmp_path / "errors.ndjson").read_text().splitlines()) == 2
@@ -0,0 +1,278 @@
+"""
+Materialized trend rollups over ContentMemory.
+
+``trend_rollups`` holds, per publish day, platform and niche, how many
+stored videos carry each hook type, theme and emotional trigger and their
+total views, plus a ``total`` row per day. ContentMemory applies the delta
+of every write (the video's previous contribution removed, the new one
+added) in the same transaction, so the rollups never need a recompute and
+/trends only sums a few hundred pre-aggregated rows.
+
+Rollups keep their own history: retention cleanup of content_memory does
+not touch them. What each video currently contributes is kept in
+``trend_rollup_ledger``, so a video that expires from content memory and
+is ingested again replaces its old contribution instead of being counted
+twice. Days before the rollup retention window, their ledger entries and
+emptied counters are pruned.
+"""
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from datetime import datetime, timedelta
+import json
+import re
+import sqlite3
+
+from memory_search import hook_types, published_day
+
+DIMENSIONS = ("hook_type", "theme", "emotional_trigger")
+GROUP_BY = ("platform", "niche")
+
+# Videos without a niche are rolled up under this key
+UNKNOWN = ""
+
+_CREATE_ROLLUP_TABLE = '''
+    CREATE TABLE IF NOT EXISTS trend_rollups (
+        day TEXT NOT NULL,
+        platform TEXT NOT NULL,
+        niche TEXT NOT NULL,
+        dimension TEXT NOT NULL,
+        value TEXT NOT NULL,
+        videos INTEGER NOT NULL,
+        views INTEGER NOT NULL,
+        PRIMARY KEY (day, platform, niche, dimension, value)
+    ) WITHOUT ROWID
+'''
+_APPLY_DELTA = '''
+    INSERT INTO trend_rollups (day, platform, niche, dimension, value, videos, views)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (day, platform, niche, dimension, value) DO UPDATE SET
+        videos = videos + excluded.videos,
+        views = views + excluded.views
+'''
+_CREATE_LEDGER_TABLE = '''
+    CREATE TABLE IF NOT EXISTS trend_rollup_ledger (
+        video_id TEXT PRIMARY KEY,
+        day TEXT NOT NULL,
+        contribution TEXT NOT NULL
+    )
+'''
+_CREATE_LEDGER_DAY_INDEX = 'CREATE INDEX IF NOT EXISTS idx_trend_rollup_ledger_day ON trend_rollup_ledger (day)'
+_SELECT_LEDGER = 'SELECT video_id, contribution FROM trend_rollup_ledger WHERE video_id IN ({placeholders})'
+_UPSERT_LEDGER = '''
+    INSERT INTO trend_rollup_ledger (video_id, day, contribution) VALUES (?, ?, ?)
+    ON CONFLICT (video_id) DO UPDATE SET day = excluded.day, contribution = excluded.contribution
+'''
+_DELETE_LEDGER = 'DELETE FROM trend_rollup_ledger WHERE video_id = ?'
+_DELETE_EMPTY = 'DELETE FROM trend_rollups WHERE videos <= 0'
+_DELETE_BEFORE = 'DELETE FROM trend_rollups WHERE day < ?'
+_DELETE_LEDGER_BEFORE = 'DELETE FROM trend_rollup_ledger WHERE day < ?'
+
+_SPLIT = re.compile(r"\s*[,;]\s*")
+
+# (day, platform, niche, dimension, value)
+RollupKey = Tuple[str, str, str, str, str]
+# The rollup keys one video counts towards, and its views
+Contribution = Tuple[List[RollupKey], int]
+
+
+def ensure_rollup_schema(conn: sqlite3.Connection) -> bool:
+    """Create the rollup tables. Returns False when they have to be (re)filled"""
+    existed = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'trend_rollup_ledger'"
+    ).fetchone()
+    conn.execute(_CREATE_ROLLUP_TABLE)
+    conn.execute(_CREATE_LEDGER_TABLE)
+    conn.execute(_CREATE_LEDGER_DAY_INDEX)
+    return existed is not None
+
+
+def load_ledger(conn: sqlite3.Connection, video_ids: List[str]) -> Dict[str, Contribution]:
+    """Current contribution of each of ``video_ids`` that has one"""
+    if not video_ids:
+        return {}
+    sql = _SELECT_LEDGER.format(placeholders=",".join("?" * len(video_ids)))
+    ledger = {}
+    for video_id, contribution in conn.execute(sql, video_ids):
+        keys, views = json.loads(contribution)
+        ledger[video_id] = ([tuple(key) for key in keys], views)
+    return ledger
+
+
+def _values(value: Any) -> List[str]:
+    """Distinct casefolded items of a list or a comma-separated string"""
+    if not value:
+        return []
+    items = value if isinstance(value, (list, tuple)) else _SPLIT.split(str(value))
+    return list(dict.fromkeys(str(item).strip().casefold() for item in items if str(item).strip()))
+
+
+def contributions(platform: str, analysis_data: Dict[str, Any], fallback_day: str) -> Contribution:
+    """
+    Rollup keys one stored analysis counts towards, and its views.
+
+    The day is the publish date, or ``fallback_day`` (the row's creation
+    date) when the analysis has none. Themes come from ``content_themes`` or
+    ``theme``, emotional triggers from ``emotional_triggers``. Rows stored
+    without a platform count towards nothing.
+    """
+    platform = (platform or "").strip().casefold()
+    if not platform or not isinstance(analysis_data, dict):
+        return [], 0
+    try:
+        views = int(analysis_data.get("views") or 0)
+    except (TypeError, ValueError):
+        views = 0
+    day = published_day(analysis_data) or fallback_day
+    niche = (str(analysis_data.get("niche") or UNKNOWN)).strip().casefold()
+    values = {
+        "hook_type": hook_types(analysis_data),
+        "theme": _values(analysis_data.get("content_themes") or analysis_data.get("theme")),
+        "emotional_trigger": _values(analysis_data.get("emotional_triggers"))
+    }
+    keys = [(day, platform, niche, "total", "")]
+    keys.extend((day, platform, niche, dimension, value) for dimension in DIMENSIONS for value in values[dimension])
+    return keys, views
+
+
+class RollupDelta:
+    """Accumulates the rollup and ledger changes of a write batch before one executemany"""
+
+    def __init__(self):
+        self.deltas: Dict[RollupKey, List[int]] = {}
+        self.ledger: Dict[str, Contribution] = {}
+
+    def _add(self, contribution: Contribution, sign: int):
+        keys, views = contribution
+        for key in keys:
+            entry = self.deltas.get(key)
+            if entry is None:
+                self.deltas[key] = [sign, sign * views]
+            else:
+                entry[0] += sign
+                entry[1] += sign * views
+
+    def replace(
+        self,
+        video_id: str,
+        previous: Optional[Contribution],
+        platform: str,
+        analysis_data: Dict[str, Any],
+        fallback_day: str
+    ) -> Contribution:
+        """Swap a video's ``previous`` contribution for the one of ``analysis_data``; returns the new one"""
+        if previous is not None:
+            self._add(previous, -1)
+        contribution = contributions(platform, analysis_data, fallback_day)
+        self._add(contribution, 1)
+        self.ledger[video_id] = contribution
+        return contribution
+
+    def apply(self, conn: sqlite3.Connection):
+        rows = [(*key, videos, views) for key, (videos, views) in self.deltas.items() if videos or views]
+        if rows:
+            conn.executemany(_APPLY_DELTA, rows)
+        for video_id, (keys, views) in self.ledger.items():
+            if keys:
+                conn.execute(_UPSERT_LEDGER, (video_id, keys[0][0], json.dumps([keys, views])))
+            else:
+                conn.execute(_DELETE_LEDGER, (video_id,))
+        self.deltas = {}
+        self.ledger = {}
+
+
+def clear(conn: sqlite3.Connection):
+    conn.execute("DELETE FROM trend_rollups")
+    conn.execute("DELETE FROM trend_rollup_ledger")
+
+
+def prune(conn: sqlite3.Connection, retention_days: int) -> int:
+    """Drop rollups and ledger entries of days before the retention window, and emptied counters"""
+    before = (datetime.utcnow().date() - timedelta(days=retention_days)).isoformat()
+    deleted = conn.execute(_DELETE_BEFORE, (before,)).rowcount
+    conn.execute(_DELETE_LEDGER_BEFORE, (before,))
+    return deleted + conn.execute(_DELETE_EMPTY).rowcount
+
+
+def _window(days: int, since: Optional[str], until: Optional[str]) -> Tuple[str, str]:
+    until = until or datetime.utcnow().date().isoformat()
+    if not since:
+        since = (datetime.strptime(until, "%Y-%m-%d").date() - timedelta(days=days - 1)).isoformat()
+    return since, until
+
+
+def trends(
+    conn: sqlite3.Connection,
+    days: int = 7,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    platform: Optional[str] = None,
+    niche: Optional[str] = None,
+    group_by: Optional[str] = None,
+    dimensions: Optional[Iterable[str]] = None,
+    top_k: int = 10
+) -> Dict[str, Any]:
+    """
+    Top values per dimension over a window of publish days, both inclusive.
+
+    The window is the last ``days`` days up to ``until`` (today by default)
+    unless ``since`` is given. With ``group_by`` (``platform`` or ``niche``)
+    totals and top values are reported per group; ``daily`` always holds the
+    per-day video and view totals of the whole selection.
+    """
+    if group_by is not None and group_by not in GROUP_BY:
+        raise ValueError(f"Unknown group_by {group_by!r}; expected one of {', '.join(GROUP_BY)}")
+    dimensions = [d for d in (dimensions or DIMENSIONS) if d in DIMENSIONS]
+    since, until = _window(days, since, until)
+
+    clauses, params = ["day >= ?", "day <= ?"], [since, until]
+    if platform:
+        clauses.append("platform = ?")
+        params.append(platform.strip().casefold())
+    if niche:
+        clauses.append("niche = ?")
+        params.append(niche.strip().casefold())
+    where = " AND ".join(clauses)
+    group = group_by or "''"
+
+    top_rows = conn.execute(
+        f'''
+        SELECT grp, dimension, value, videos, views FROM (
+            SELECT {group} AS grp, dimension, value, SUM(videos) AS videos, SUM(views) AS views,
+                   ROW_NUMBER() OVER (PARTITION BY {group}, dimension ORDER BY SUM(views) DESC, SUM(videos) DESC, value) AS rank
+            FROM trend_rollups
+            WHERE {where} AND dimension IN ({",".join("?" * len(dimensions))})
+            GROUP BY {group}, dimension, value
+            HAVING SUM(videos) > 0
+        )
+        WHERE rank <= ?
+        ORDER BY grp, dimension, rank
+        ''',
+        (*params, *dimensions, top_k)
+    ).fetchall() if dimensions else []
+    total_rows = conn.execute(
+        f"SELECT {group}, SUM(videos), SUM(views) FROM trend_rollups WHERE {where} AND dimension = 'total' GROUP BY {group} HAVING SUM(videos) > 0",
+        params
+    ).fetchall()
+    daily_rows = conn.execute(
+        f"SELECT day, SUM(videos), SUM(views) FROM trend_rollups WHERE {where} AND dimension = 'total' GROUP BY day ORDER BY day",
+        params
+    ).fetchall()
+
+    groups: Dict[str, Dict[str, Any]] = {}
+    for key, videos, views in total_rows:
+        groups[key] = {"totals": {"videos": videos, "views": views}, "top": {d: [] for d in dimensions}}
+    for key, dimension, value, videos, views in top_rows:
+        entry = groups.setdefault(key, {"totals": {"videos": 0, "views": 0}, "top": {d: [] for d in dimensions}})
+        entry["top"][dimension].append({"value": value, "videos": videos, "views": views})
+
+    result: Dict[str, Any] = {
+        "window": {"since": since, "until": until},
+        "filters": {"platform": platform, "niche": niche},
+        "daily": [{"day": day, "videos": videos, "views": views} for day, videos, views in daily_rows]
+    }
+    if group_by:
+        ranked = sorted(groups.items(), key=lambda g: -g[1]["totals"]["views"])
+        result["groups"] = [{group_by: key or None, **entry} for key, entry in ranked]
+    else:
+        overall = groups.get("", {"totals": {"videos": 0, "views": 0}, "top": {d: [] for d in dimensions}})
+        result.update(overall)
+    return result
@@ -0,0 +1,172 @@
+"""
+Incremental reader for large video exports.
+
+Reads NDJSON (one object per line) or a top-level JSON array without loading
+the file: the array is decoded element by element from a fixed-size read
+buffer. Records are validated lazily in bounded batches, and invalid ones are
+skipped and reported instead of aborting the run. ``.gz`` files are
+decompressed on the fly; a truncated or corrupt one ends the input with an
+error record, keeping the records read before the damage.
+"""
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple, Type
+import gzip
+import json
+import re
+import zlib
+
+READ_SIZE = 1 << 20
+# A single array element larger than this is treated as malformed
+MAX_RECORD_CHARS = 16 << 20
+
+_SEPARATORS = re.compile(r"[\s,]*")
+# Raised by gzip reads of truncated or corrupt files
+_READ_ERRORS = (EOFError, gzip.BadGzipFile, zlib.error)
+
+
+def _read_error(error: Exception) -> ValueError:
+    return ValueError(f"Input is truncated or corrupt: {str(error)}; the rest of the file was skipped")
+
+
+class IngestReport:
+    """Counts of read, valid and skipped records plus the first errors"""
+
+    def __init__(self, max_errors: int = 100, error_file: Optional[str] = None):
+        self.max_errors = max_errors
+        self.records = 0
+        self.valid = 0
+        self.invalid = 0
+        self.errors: List[Dict[str, Any]] = []
+        self._error_fp = open(error_file, "w", encoding="utf-8") if error_file else None
+
+    def error(self, record: int, message: str, raw: Any = None):
+        """Record a skipped record; every error goes to the error file when one is set"""
+        self.invalid += 1
+        entry = {"record": record, "error": message}
+        if len(self.errors) < self.max_errors:
+            self.errors.append(entry)
+        if self._error_fp is not None:
+            self._error_fp.write(json.dumps({**entry, "raw": raw}, default=str) + "\n")
+
+    def summary(self) -> Dict[str, Any]:
+        return {"records": self.records, "valid": self.valid, "invalid": self.invalid, "errors": self.errors}
+
+    def close(self):
+        if self._error_fp is not None:
+            self._error_fp.close()
+            self._error_fp = None
+
+
+def open_input(path: str) -> TextIO:
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8-sig")
+    return open(path, "r", encoding="utf-8-sig")
+
+
+def iter_records(fp: TextIO, read_size: int = READ_SIZE) -> Iterator[Tuple[int, Any]]:
+    """
+    Yield ``(record_number, value)`` for every record of an NDJSON or JSON
+    array input. ``value`` is a ValueError for records that are not valid JSON.
+    """
+    first = ""
+    while True:
+        char = fp.read(1)
+        if not char or not char.isspace():
+            first = char
+            break
+    if first == "[":
+        return _iter_array(fp, read_size)
+    fp.seek(0)
+    return _iter_ndjson(fp)
+
+
+def _iter_ndjson(fp: TextIO) -> Iterator[Tuple[int, Any]]:
+    number = 0
+    try:
+        for number, line in enumerate(fp, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                value = json.loads(line)
+            except ValueError as e:
+                value = ValueError(f"Malformed JSON: {str(e)}")
+            yield number, value
+    except _READ_ERRORS as e:
+        yield number + 1, _read_error(e)
+
+
+def _iter_array(fp: TextIO, read_size: int) -> Iterator[Tuple[int, Any]]:
+    # The opening "[" has already been consumed
+    decoder = json.JSONDecoder()
+    buffer, pos, eof, number = "", 0, False, 0
+
+    def refill():
+        nonlocal buffer, pos, eof
+        chunk = fp.read(read_size)
+        eof = not chunk
+        buffer, pos = buffer[pos:] + chunk, 0
+
+    try:
+        while True:
+            pos = _SEPARATORS.match(buffer, pos).end()
+            if pos >= len(buffer):
+                if eof:
+                    yield number + 1, ValueError("Unexpected end of input: the JSON array is not closed")
+                    return
+                refill()
+                continue
+            if buffer[pos] == "]":
+                return
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError as e:
+                if not eof and len(buffer) - pos < MAX_RECORD_CHARS:
+                    refill()
+                    continue
+                yield number + 1, ValueError(f"Malformed JSON: {e.msg}; the rest of the array was skipped")
+                return
+            if end == len(buffer) and not eof:
+                # A scalar may continue past the buffer, e.g. a number cut in half
+                refill()
+                continue
+            number += 1
+            yield number, value
+            pos = end
+    except _READ_ERRORS as e:
+        yield number + 1, _read_error(e)
+
+
+def _validation_message(error: Exception) -> str:
+    errors = getattr(error, "errors", None)
+    if callable(errors):
+        return "; ".join(f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}" for e in errors())
+    return str(error)
+
+
+def iter_batches(
+    records: Iterator[Tuple[int, Any]],
+    model: Type[Any],
+    batch_size: int,
+    report: IngestReport
+) -> Iterator[List[Any]]:
+    """Validate records into ``model`` instances, ``batch_size`` at a time"""
+    batch: List[Any] = []
+    for number, value in records:
+        report.records += 1
+        if isinstance(value, Exception):
+            report.error(number, str(value))
+            continue
+        if not isinstance(value, dict):
+            report.error(number, "Record is not a JSON object", value)
+            continue
+        try:
+            batch.append(model(**value))
+        except (TypeError, ValueError) as e:
+            report.error(number, _validation_message(e), value)
+            continue
+        report.valid += 1
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch